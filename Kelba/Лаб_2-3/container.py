@@ -5,6 +5,9 @@ class Container(ABC):
         self.ID = id
         self.capacity = capacity
         self.items = []
+        # Running totals of the loaded items, so the weight is not summed on every load
+        self.totalWeight = 0.0
+        self.itemCount = 0
 
     @abstractmethod
     def to_dict(self):
@@ -17,16 +20,38 @@ class Container(ABC):
         pass
 
     def getTotalWeight(self):
-        """Calculate the total weight of all items in the container."""
-        return sum(item.getTotalWeight() for item in self.items)
+        """Return the total weight of all items in the container."""
+        return self.totalWeight
 
     def loadItem(self, item: 'Item'):
         """Load an item into the container if compatible."""
         if self.canLoad(item):
             self.items.append(item)
+            self.totalWeight += item.getTotalWeight()
+            self.itemCount += item.count
             return True
         return False
 
+    def loadItems(self, items):
+        """Load a batch of items if every item passes canLoad, otherwise load none of them."""
+        loadedCount, totalWeight, itemCount = len(self.items), self.totalWeight, self.itemCount
+        for item in items:
+            if not self.loadItem(item):
+                # Roll the batch back by restoring the state from before it
+                del self.items[loadedCount:]
+                self.totalWeight, self.itemCount = totalWeight, itemCount
+                return False
+        return True
+
+    def unloadItem(self, item: 'Item'):
+        """Unload an item from the container."""
+        if item not in self.items:
+            return False
+        self.items.remove(item)
+        self.itemCount -= item.count
+        self.totalWeight = self.totalWeight - item.getTotalWeight() if self.items else 0.0
+        return True
+
 class BasicContainer(Container):
     def to_dict(self):
         return {"type": "BasicContainer", "ID": self.ID, "capacity": self.capacity}
@@ -0,0 +1,63 @@
+import unittest
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from container import BasicContainer
+from item import Small, Heavy
+
+
+class FragileContainer(BasicContainer):
+    """A container that refuses heavy items whatever their weight."""
+
+    def canLoad(self, item) -> bool:
+        return not isinstance(item, Heavy) and super().canLoad(item)
+
+
+class TestContainer(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Creates a test container and items for testing.
+        """
+        self.container = BasicContainer(1, 100)
+        self.small = Small(1, 10, 2, 1)
+        self.heavy = Heavy(2, 10, 2, 1)
+
+    def test_running_totals(self):
+        """
+        Tests that the weight and item count follow loading and unloading items.
+        """
+        self.assertTrue(self.container.loadItem(self.small))
+        self.assertTrue(self.container.loadItem(self.heavy))
+        self.assertEqual(self.container.getTotalWeight(), 50)
+        self.assertEqual(self.container.itemCount, 4)
+
+        self.assertTrue(self.container.unloadItem(self.small))
+        self.assertEqual(self.container.getTotalWeight(), 30)
+        self.assertEqual(self.container.itemCount, 2)
+
+    def test_load_items(self):
+        """
+        Tests that a batch is either loaded as a whole or rejected as a whole.
+        """
+        self.assertTrue(self.container.loadItems([self.small, self.heavy]))
+        self.assertEqual(self.container.getTotalWeight(), 50)
+
+        self.assertFalse(self.container.loadItems([Small(3, 10, 1, 1), Small(4, 50, 1, 1)]))
+        self.assertEqual(self.container.items, [self.small, self.heavy])
+        self.assertEqual(self.container.getTotalWeight(), 50)
+        self.assertEqual(self.container.itemCount, 4)
+
+    def test_load_items_uses_can_load(self):
+        """
+        Tests that a batch is checked with the canLoad of the container class.
+        """
+        container = FragileContainer(2, 1000)
+        self.assertFalse(container.loadItems([self.small, self.heavy]))
+        self.assertEqual((container.items, container.getTotalWeight(), container.itemCount), ([], 0.0, 0))
+        self.assertTrue(container.loadItems([self.small]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,266 +1,508 @@
-import json
-import math
-from abc import ABC, abstractmethod
-
-# -------------------- Interfaces
-class IPort(ABC):
-    @abstractmethod
-    def incomingShip(self, ship):
-        pass
-
-    @abstractmethod
-    def outgoingShip(self, ship):
-        pass
-
-class IShip(ABC):
-    @abstractmethod
-    def sailTo(self, port):
-        pass
-
-    @abstractmethod
-    def reFuel(self, fuel):
-        pass
-
-    @abstractmethod
-    def load(self, container):
-        pass
-
-    @abstractmethod
-    def unLoad(self, container):
-        pass
-
-# -----Container Classes
-class Container(ABC):
-    def __init__(self, ID, weight):
-        self.ID = ID
-        self.weight = weight
-    
-    @abstractmethod
-    def consumption(self):
-        pass
-
-    def __eq__(self, other):
-        return isinstance(other, Container) and self.ID == other.ID and self.weight == other.weight
-
-class BasicContainer(Container):
-    def consumption(self):
-        return 2.5 * self.weight
-
-class HeavyContainer(Container):
-    def consumption(self):
-        return 3.0 * self.weight
-
-class RefrigeratedContainer(HeavyContainer):
-    def consumption(self):
-        return 5.0 * self.weight
-
-class LiquidContainer(HeavyContainer):
-    def consumption(self):
-        return 4.0 * self.weight
-
-# --------------------Ship Class
-class Ship(IShip):
-    def __init__(self, ID, currentPort, totalWeightCapacity, maxAllContainers, maxHeavyContainers,
-                 maxRefrigeratedContainers, maxLiquidContainers, fuelConsumptionPerKM):
-        self.ID = ID
-        self.fuel = 0
-        self.currentPort = currentPort
-        self.totalWeightCapacity = totalWeightCapacity
-        self.maxAllContainers = maxAllContainers
-        self.maxHeavyContainers = maxHeavyContainers
-        self.maxRefrigeratedContainers = maxRefrigeratedContainers
-        self.maxLiquidContainers = maxLiquidContainers
-        self.fuelConsumptionPerKM = fuelConsumptionPerKM
-        self.containers = []
-
-    def sailTo(self, port):
-        distance = self.currentPort.getDistance(port)
-        required_fuel = self.fuelConsumptionPerKM * distance + sum(c.consumption() * distance for c in self.containers)
-        if self.fuel >= required_fuel:
-            self.fuel -= required_fuel
-            self.currentPort.outgoingShip(self)
-            port.incomingShip(self)
-            self.currentPort = port
-            return True
-        return False
-
-    def reFuel(self, fuel):
-        self.fuel += fuel
-
-    def load(self, container):
-        if len(self.containers) < self.maxAllContainers and sum(c.weight for c in self.containers) + container.weight <= self.totalWeightCapacity:
-            self.containers.append(container)
-            return True
-        return False
-
-    def unLoad(self, container):
-        if container in self.containers:
-            self.containers.remove(container)
-            return True
-        return False
-
-    def getCurrentContainers(self):
-        return sorted(self.containers, key=lambda c: c.ID)
-
-# ---------------------------- Port Class
-class Port(IPort):
-    def __init__(self, ID, latitude, longitude, containers=None):
-        self.ID = ID
-        self.latitude = latitude
-        self.longitude = longitude
-        self.containers = containers if containers else []
-        self.history = []
-        self.current = []
-
-
-    def incomingShip(self, ship):
-        if ship not in self.current:
-            self.current.append(ship)
-
-    def outgoingShip(self, ship):
-        if ship in self.current:
-            self.current.remove(ship)
-        if ship not in self.history:
-            self.history.append(ship)
-
-    def getDistance(self, otherPort):
-        # Calculate distance using the Haversine formula for geospatial distance
-        R = 6371  # Radius of the earth in kilometers
-        lat1, lon1 = math.radians(self.latitude), math.radians(self.longitude)
-        lat2, lon2 = math.radians(otherPort.latitude), math.radians(otherPort.longitude)
-        dlat = lat2 - lat1
-        dlon = lon2 - lon1
-        a = math.sin(dlat/2)**2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlon/2)**2
-        c = 2 * math.atan2(math.sqrt(a), math.sqrt(1-a))
-        return R * c
-
-# -------------------- Main Class
-class Main:
-    def __init__(self, input_file, output_file):
-        self.ports = []
-        self.ships = []
-        self.containers = []
-        self.actions = []
-        self.input_file = input_file
-        self.output_file = output_file
-
-    def readInput(self):
-        with open(self.input_file, 'r') as file:
-            data = json.load(file)
-            self.processData(data)
-
-    def processData(self, data):
-        # Process ports, ships, and containers from the input JSON
-        for port_data in data.get('ports', []):
-            port = Port(port_data['ID'], port_data['latitude'], port_data['longitude'])
-            self.ports.append(port)
-        
-        for ship_data in data.get('ships', []):
-            port = next(p for p in self.ports if p.ID == ship_data['portID'])
-            ship = Ship(ship_data['ID'], port, ship_data['totalWeightCapacity'], ship_data['maxAllContainers'],
-                        ship_data['maxHeavyContainers'], ship_data['maxRefrigeratedContainers'],
-                        ship_data['maxLiquidContainers'], ship_data['fuelConsumptionPerKM'])
-            self.ships.append(ship)
-            port.incomingShip(ship)
-        
-        for container_data in data.get('containers', []):
-            container = self.createContainer(container_data)
-            self.containers.append(container)
-            port = self.ports[0]  # Умовно додаємо контейнери в перший порт
-            port.containers.append(container)
-
-        self.actions = data.get('actions', [])
-    
-    def createContainer(self, container_data):
-        if container_data['type'] == 'Basic':
-            return BasicContainer(container_data['ID'], container_data['weight'])
-        elif container_data['type'] == 'Heavy':
-            return HeavyContainer(container_data['ID'], container_data['weight'])
-        elif container_data['type'] == 'Refrigerated':
-            return RefrigeratedContainer(container_data['ID'], container_data['weight'])
-        elif container_data['type'] == 'Liquid':
-            return LiquidContainer(container_data['ID'], container_data['weight'])
-
-    def executeActions(self):
-        for action in self.actions:
-            ship = next(s for s in self.ships if s.ID == action['shipID'])
-            
-            # Завантаження контейнера на корабель
-            if action['action'] == 'load_container':
-                container = next(c for c in self.containers if c.ID == action['containerID'])
-                port = ship.currentPort
-                if container in port.containers:
-                    if ship.load(container):
-                        port.containers.remove(container)
-                        print(f"Контейнер {container.ID} завантажено на корабель {ship.ID}.")
-                    else:
-                        print(f"Контейнер {container.ID} не може бути завантажений на корабель {ship.ID} через обмеження.")
-                else:
-                    print(f"Контейнер {container.ID} не знайдено в порту {port.ID}")
-                        
-            # Розвантаження контейнера з корабля
-            elif action['action'] == 'unload_container':
-                container = next((c for c in ship.getCurrentContainers() if c.ID == action['containerID']), None)
-                if container is not None:
-                    port = ship.currentPort
-                    if ship.unLoad(container):
-                        port.containers.append(container)
-                        print(f"Контейнер {container.ID} розвантажено в порту {port.ID}.")
-                else:
-                    print(f"Контейнер {action['containerID']} не знайдено на кораблі {ship.ID}")
-            
-            # Заправка корабля
-            elif action['action'] == 'refuel':
-                ship.reFuel(action['fuelAmount'])
-                print(f"Корабель {ship.ID} заправлено на {action['fuelAmount']} одиниць палива.")
-            
-            # Переміщення корабля в інший порт
-            elif action['action'] == 'sail':
-                destination_port = next(p for p in self.ports if p.ID == action['destinationPortID'])
-                distance = ship.currentPort.getDistance(destination_port)
-                required_fuel = ship.fuelConsumptionPerKM * distance
-                if ship.fuel >= required_fuel:
-                    if ship.sailTo(destination_port):
-                        print(f"Корабель {ship.ID} успішно прибув до порту {destination_port.ID}.")
-                    else:
-                        print(f"Не вдалося переміститися до порту {destination_port.ID}.")
-                else:
-                    print(f"Недостатньо палива для переміщення корабля {ship.ID} до порту {destination_port.ID}.")
-                    # Якщо корабель не має достатньо пального, ви можете запланувати заповнення
-                    # або зробити це автоматично, як ви хотіли раніше.
-
-    def writeOutput(self):
-        output_data = {}
-        for port in sorted(self.ports, key=lambda p: p.ID):
-            port_info = {
-                'lat': round(port.latitude, 2),
-                'lon': round(port.longitude, 2),
-                'basic_container': [c.ID for c in port.containers if isinstance(c, BasicContainer)],
-                'heavy_container': [c.ID for c in port.containers if isinstance(c, HeavyContainer)],
-                'refrigerated_container': [c.ID for c in port.containers if isinstance(c, RefrigeratedContainer)],
-                'liquid_container': [c.ID for c in port.containers if isinstance(c, LiquidContainer)],
-                'ships': {
-                    ship.ID: {
-                        'fuel_left': round(ship.fuel, 2),
-                        'basic_container': [c.ID for c in ship.getCurrentContainers() if isinstance(c, BasicContainer)],
-                        'heavy_container': [c.ID for c in ship.getCurrentContainers() if isinstance(c, HeavyContainer)],
-                        'refrigerated_container': [c.ID for c in ship.getCurrentContainers() if isinstance(c, RefrigeratedContainer)],
-                        'liquid_container': [c.ID for c in ship.getCurrentContainers() if isinstance(c, LiquidContainer)]
-                    } for ship in port.current
-                }
-            }
-            output_data[f'Port {port.ID}'] = port_info
-
-        with open(self.output_file, 'w') as file:
-            json.dump(output_data, file, indent=4)
-
-    def run(self):
-        self.readInput()
-        self.executeActions()  # Виконуємо всі дії
-        self.writeOutput()
-
-# -------------------- Execution
-if __name__ == "__main__":
-    # You can replace 'input.json' and 'output.json' with your actual file paths.
-    simulation = Main('input.json', 'output.json')
-    simulation.run()
+import json
+import math
+import tempfile
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+
+# -------------------- Interfaces
+class IPort(ABC):
+    @abstractmethod
+    def incomingShip(self, ship):
+        pass
+
+    @abstractmethod
+    def outgoingShip(self, ship):
+        pass
+
+class IShip(ABC):
+    @abstractmethod
+    def sailTo(self, port):
+        pass
+
+    @abstractmethod
+    def reFuel(self, fuel):
+        pass
+
+    @abstractmethod
+    def load(self, container):
+        pass
+
+    @abstractmethod
+    def unLoad(self, container):
+        pass
+
+# -----Container Classes
+class Container(ABC):
+    def __init__(self, ID, weight):
+        self.ID = ID
+        self.weight = weight
+    
+    @abstractmethod
+    def consumption(self):
+        pass
+
+    def __eq__(self, other):
+        return isinstance(other, Container) and self.ID == other.ID and self.weight == other.weight
+
+class BasicContainer(Container):
+    def consumption(self):
+        return 2.5 * self.weight
+
+class HeavyContainer(Container):
+    def consumption(self):
+        return 3.0 * self.weight
+
+class RefrigeratedContainer(HeavyContainer):
+    def consumption(self):
+        return 5.0 * self.weight
+
+class LiquidContainer(HeavyContainer):
+    def consumption(self):
+        return 4.0 * self.weight
+
+# --------------------Ship Class
+class Ship(IShip):
+    def __init__(self, ID, currentPort, totalWeightCapacity, maxAllContainers, maxHeavyContainers,
+                 maxRefrigeratedContainers, maxLiquidContainers, fuelConsumptionPerKM):
+        self.ID = ID
+        self.fuel = 0
+        self.currentPort = currentPort
+        self.totalWeightCapacity = totalWeightCapacity
+        self.maxAllContainers = maxAllContainers
+        self.maxHeavyContainers = maxHeavyContainers
+        self.maxRefrigeratedContainers = maxRefrigeratedContainers
+        self.maxLiquidContainers = maxLiquidContainers
+        self.fuelConsumptionPerKM = fuelConsumptionPerKM
+        # Вантаж корабля за ID, разом із поточною вагою та споживанням усіх контейнерів
+        self.containers = {}
+        self.containersWeight = 0
+        self.containersConsumption = 0
+
+    def sailTo(self, port):
+        distance = self.currentPort.getDistance(port)
+        required_fuel = self.fuelConsumptionPerKM * distance + self.containersConsumption * distance
+        if self.fuel >= required_fuel:
+            self.fuel -= required_fuel
+            self.currentPort.outgoingShip(self)
+            port.incomingShip(self)
+            self.currentPort = port
+            return True
+        return False
+
+    def reFuel(self, fuel):
+        self.fuel += fuel
+
+    def load(self, container):
+        if container.ID in self.containers:
+            return False
+        if len(self.containers) < self.maxAllContainers and self.containersWeight + container.weight <= self.totalWeightCapacity:
+            self.containers[container.ID] = container
+            self.containersWeight += container.weight
+            self.containersConsumption += container.consumption()
+            return True
+        return False
+
+    def hasContainer(self, container):
+        return self.containers.get(container.ID) == container
+
+    def unLoad(self, container):
+        if self.hasContainer(container):
+            del self.containers[container.ID]
+            if self.containers:
+                self.containersWeight -= container.weight
+                self.containersConsumption -= container.consumption()
+            else:
+                # Порожній корабель - скидаємо суми, щоб не накопичувалася похибка
+                self.containersWeight = 0
+                self.containersConsumption = 0
+            return True
+        return False
+
+    def getCurrentContainers(self):
+        return sorted(self.containers.values(), key=lambda c: c.ID)
+
+# ---------------------------- Port Class
+class Port(IPort):
+    HISTORY_LIMIT = 1000
+
+    def __init__(self, ID, latitude, longitude, containers=None):
+        self.ID = ID
+        self.latitude = latitude
+        self.longitude = longitude
+        # Контейнери в порту зберігаються за ID, щоб пошук і видалення були O(1)
+        self.containers = {c.ID: c for c in containers} if containers else {}
+        # Кораблі в порту за ID; історія - лише останні візити, а лічильник
+        # візитів відповідає на "чи був корабель у порту" за O(1)
+        self.current = {}
+        self.history = deque(maxlen=self.HISTORY_LIMIT)
+        self.visits = {}
+
+
+    def incomingShip(self, ship):
+        self.current[ship.ID] = ship
+
+    def outgoingShip(self, ship):
+        self.current.pop(ship.ID, None)
+        self.history.append(ship)
+        self.visits[ship.ID] = self.visits.get(ship.ID, 0) + 1
+
+    def hasVisited(self, ship):
+        return ship.ID in self.visits
+
+    def getDistance(self, otherPort):
+        # Calculate distance using the Haversine formula for geospatial distance
+        R = 6371  # Radius of the earth in kilometers
+        lat1, lon1 = math.radians(self.latitude), math.radians(self.longitude)
+        lat2, lon2 = math.radians(otherPort.latitude), math.radians(otherPort.longitude)
+        dlat = lat2 - lat1
+        dlon = lon2 - lon1
+        a = math.sin(dlat/2)**2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlon/2)**2
+        c = 2 * math.atan2(math.sqrt(a), math.sqrt(1-a))
+        return R * c
+
+# -------------------- Streaming input
+class StreamingJSONReader:
+    # Reads a scenario file ({"ports": [...], "ships": [...], ...}) record by record,
+    # so only the current chunk of the file is held in memory
+    def __init__(self, file, chunkSize=1 << 16):
+        self.file = file
+        self.chunkSize = chunkSize
+        self.decoder = json.JSONDecoder()
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+
+    def records(self):
+        # Yields (section, record) for every element of the top-level arrays
+        # and (section, value) for top-level values that are not arrays
+        self.expect('{')
+        if self.peek() == '}':
+            self.pos += 1
+            return
+        while True:
+            key = self.decodeValue()
+            if not isinstance(key, str):
+                raise ValueError(f"Expected a section name at {self.pos} in the scenario file")
+            self.expect(':')
+            if self.peek() == '[':
+                self.pos += 1
+                if self.peek() == ']':
+                    self.pos += 1
+                else:
+                    while True:
+                        yield key, self.decodeValue()
+                        if self.separator(']'):
+                            break
+            else:
+                yield key, self.decodeValue()
+            if self.separator('}'):
+                return
+
+    def peek(self):
+        # Returns the next character that is not whitespace
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos].isspace():
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self.readChunk():
+                raise ValueError('Unexpected end of the scenario file')
+
+    def separator(self, closing):
+        # Consumes ',' or the closing bracket after a value; True if it was the bracket
+        char = self.peek()
+        self.pos += 1
+        if char == closing:
+            return True
+        if char != ',':
+            raise ValueError(f"Expected ',' or '{closing}' at {self.pos - 1} in the scenario file")
+        return False
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError(f"Expected '{char}' at {self.pos} in the scenario file")
+        self.pos += 1
+
+    def decodeValue(self):
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+                # A value that is not followed by a delimiter (e.g. "6." of "6.75") may
+                # continue in the next chunk
+                if self.eof or (end < len(self.buffer) and (self.buffer[end] in ',:]}' or self.buffer[end].isspace())):
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self.readChunk()
+
+    def readChunk(self):
+        chunk = self.file.read(self.chunkSize)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+# -------------------- Main Class
+class Main:
+    ENTITY_SECTIONS = ('ports', 'ships', 'containers')
+
+    def __init__(self, input_file, output_file, verbose=True):
+        self.ports = []
+        self.ships = []
+        self.containers = []
+        self.portsByID = {}
+        self.shipsByID = {}
+        self.containersByID = {}
+        self.actionStats = {}
+        # Дії виконуються через таблицю обробників, сутності шукаються за ID у словниках
+        self.handlers = {
+            'load_container': self.loadContainer,
+            'unload_container': self.unloadContainer,
+            'refuel': self.refuelShip,
+            'sail': self.sailShip,
+        }
+        self.verbose = verbose
+        self.input_file = input_file
+        self.output_file = output_file
+        # Розділи файлу, які вже прочитані повністю, і записи, що чекають на свій порт
+        self.completedSections = set()
+        self.currentSection = None
+        self.pendingShips = {}
+        self.pendingContainers = []
+        # Дії, що прийшли раніше за кораблі, порти чи контейнери, чекають у тимчасовому файлі
+        self.spilledActions = None
+
+    def readInput(self):
+        # Objects are built while the file is streamed; actions are executed as they are
+        # read once all ports, ships and containers are known
+        with open(self.input_file, 'r') as file:
+            for section, record in StreamingJSONReader(file).records():
+                self.processRecord(section, record)
+        self.finishInput()
+
+    def processData(self, data):
+        # Process ports, ships, and containers from the input JSON
+        for section in self.ENTITY_SECTIONS:
+            for record in data.get(section, []):
+                self.processRecord(section, record)
+        self.completedSections.update(self.ENTITY_SECTIONS)
+        for record in data.get('actions', []):
+            self.processRecord('actions', record)
+        self.finishInput()
+
+    def processRecord(self, section, record):
+        if section != self.currentSection:
+            if self.currentSection is not None:
+                self.completedSections.add(self.currentSection)
+            self.currentSection = section
+        if section == 'ports':
+            port = Port(record['ID'], record['latitude'], record['longitude'])
+            self.ports.append(port)
+            self.portsByID[port.ID] = port
+            if len(self.ports) == 1:
+                for container in self.pendingContainers:
+                    port.containers[container.ID] = container
+                self.pendingContainers = []
+            for ship_record in self.pendingShips.pop(port.ID, []):
+                self.addShip(ship_record, port)
+        elif section == 'ships':
+            port = self.portsByID.get(record['portID'])
+            if port is None:
+                self.pendingShips.setdefault(record['portID'], []).append(record)
+            else:
+                self.addShip(record, port)
+        elif section == 'containers':
+            container = self.createContainer(record)
+            self.containers.append(container)
+            self.containersByID[container.ID] = container
+            if self.ports:
+                port = self.ports[0]  # Умовно додаємо контейнери в перший порт
+                port.containers[container.ID] = container
+            else:
+                self.pendingContainers.append(container)
+        elif section == 'actions':
+            if self.spilledActions is None and self.completedSections.issuperset(self.ENTITY_SECTIONS):
+                self.checkPending()
+                self.executeAction(record)
+            else:
+                if self.spilledActions is None:
+                    self.spilledActions = tempfile.TemporaryFile('w+', encoding='utf-8')
+                self.spilledActions.write(json.dumps(record) + '\n')
+
+    def addShip(self, record, port):
+        ship = Ship(record['ID'], port, record['totalWeightCapacity'], record['maxAllContainers'],
+                    record['maxHeavyContainers'], record['maxRefrigeratedContainers'],
+                    record['maxLiquidContainers'], record['fuelConsumptionPerKM'])
+        self.ships.append(ship)
+        self.shipsByID[ship.ID] = ship
+        port.incomingShip(ship)
+
+    def checkPending(self):
+        # Після прочитання всіх портів жоден корабель чи контейнер не може залишитися без порту
+        if self.pendingShips:
+            port_id, records = next(iter(self.pendingShips.items()))
+            raise ValueError(f"Ship {records[0]['ID']} refers to unknown port {port_id}")
+        if self.pendingContainers:
+            raise ValueError(f"Container {self.pendingContainers[0].ID} cannot be placed: there are no ports")
+
+    def finishInput(self):
+        # Виконує дії, які довелося відкласти, після того як відомі всі сутності
+        self.checkPending()
+        if self.spilledActions is None:
+            return
+        with self.spilledActions as spilled:
+            self.spilledActions = None
+            spilled.seek(0)
+            self.executeActions(json.loads(line) for line in spilled)
+
+    def createContainer(self, container_data):
+        if container_data['type'] == 'Basic':
+            return BasicContainer(container_data['ID'], container_data['weight'])
+        elif container_data['type'] == 'Heavy':
+            return HeavyContainer(container_data['ID'], container_data['weight'])
+        elif container_data['type'] == 'Refrigerated':
+            return RefrigeratedContainer(container_data['ID'], container_data['weight'])
+        elif container_data['type'] == 'Liquid':
+            return LiquidContainer(container_data['ID'], container_data['weight'])
+
+    def executeActions(self, actions):
+        for action in actions:
+            self.executeAction(action)
+
+    def executeAction(self, action):
+        ship = self.shipsByID[action['shipID']]
+        handler = self.handlers.get(action['action'])
+        if handler is None:
+            return
+        started = time.perf_counter()
+        handler(ship, action)
+        stats = self.actionStats.setdefault(action['action'], [0, 0.0])
+        stats[0] += 1
+        stats[1] += time.perf_counter() - started
+
+    # Завантаження контейнера на корабель
+    def loadContainer(self, ship, action):
+        container = self.containersByID[action['containerID']]
+        port = ship.currentPort
+        if port.containers.get(container.ID) == container:
+            if ship.load(container):
+                del port.containers[container.ID]
+                self.log(f"Контейнер {container.ID} завантажено на корабель {ship.ID}.")
+            else:
+                self.log(f"Контейнер {container.ID} не може бути завантажений на корабель {ship.ID} через обмеження.")
+        else:
+            self.log(f"Контейнер {container.ID} не знайдено в порту {port.ID}")
+
+    # Розвантаження контейнера з корабля
+    def unloadContainer(self, ship, action):
+        container = self.containersByID.get(action['containerID'])
+        if container is not None and ship.hasContainer(container):
+            port = ship.currentPort
+            if ship.unLoad(container):
+                port.containers[container.ID] = container
+                self.log(f"Контейнер {container.ID} розвантажено в порту {port.ID}.")
+        else:
+            self.log(f"Контейнер {action['containerID']} не знайдено на кораблі {ship.ID}")
+
+    # Заправка корабля
+    def refuelShip(self, ship, action):
+        ship.reFuel(action['fuelAmount'])
+        self.log(f"Корабель {ship.ID} заправлено на {action['fuelAmount']} одиниць палива.")
+
+    # Переміщення корабля в інший порт
+    def sailShip(self, ship, action):
+        destination_port = self.portsByID[action['destinationPortID']]
+        distance = ship.currentPort.getDistance(destination_port)
+        required_fuel = ship.fuelConsumptionPerKM * distance
+        if ship.fuel >= required_fuel:
+            if ship.sailTo(destination_port):
+                self.log(f"Корабель {ship.ID} успішно прибув до порту {destination_port.ID}.")
+            else:
+                self.log(f"Не вдалося переміститися до порту {destination_port.ID}.")
+        else:
+            self.log(f"Недостатньо палива для переміщення корабля {ship.ID} до порту {destination_port.ID}.")
+            # Якщо корабель не має достатньо пального, ви можете запланувати заповнення
+            # або зробити це автоматично, як ви хотіли раніше.
+
+    def log(self, message):
+        if self.verbose:
+            print(message)
+
+    def throughputReport(self):
+        # Кількість дій кожного типу, час їх виконання та швидкість (дій за секунду)
+        return {
+            action: {
+                'count': count,
+                'seconds': round(seconds, 6),
+                'actions_per_second': round(count / seconds) if seconds > 0 else None
+            } for action, (count, seconds) in self.actionStats.items()
+        }
+
+    def writeOutput(self, backend='pretty'):
+        # Кожен порт серіалізується окремо і одразу пишеться у файл,
+        # тож у пам'яті ніколи немає всього результату
+        dumps = self.outputDumps(backend)
+        pretty = backend == 'pretty'
+        with open(self.output_file, 'w') as file:
+            file.write('{')
+            for index, port in enumerate(sorted(self.ports, key=lambda p: p.ID)):
+                port_info = {
+                    'lat': round(port.latitude, 2),
+                    'lon': round(port.longitude, 2),
+                    **self.containerBuckets(port.containers.values()),
+                    'ships': {
+                        ship.ID: {
+                            'fuel_left': round(ship.fuel, 2),
+                            **self.containerBuckets(ship.getCurrentContainers())
+                        } for ship in port.current.values()
+                    }
+                }
+                separator = ',' if index else ''
+                if pretty:
+                    file.write(f"{separator}\n    {json.dumps(f'Port {port.ID}')}: {dumps(port_info)}")
+                else:
+                    file.write(f"{separator}{json.dumps(f'Port {port.ID}')}:{dumps(port_info)}")
+            file.write('\n}' if pretty and self.ports else '}')
+
+    @staticmethod
+    def containerBuckets(containers):
+        # Розкладає контейнери за типами за один прохід
+        buckets = {'basic_container': [], 'heavy_container': [], 'refrigerated_container': [], 'liquid_container': []}
+        for c in containers:
+            if isinstance(c, BasicContainer):
+                buckets['basic_container'].append(c.ID)
+            if isinstance(c, HeavyContainer):
+                buckets['heavy_container'].append(c.ID)
+            if isinstance(c, RefrigeratedContainer):
+                buckets['refrigerated_container'].append(c.ID)
+            if isinstance(c, LiquidContainer):
+                buckets['liquid_container'].append(c.ID)
+        return buckets
+
+    @staticmethod
+    def outputDumps(backend):
+        # 'pretty' - як раніше (indent=4), 'compact' - без пробілів, 'orjson' - швидка бібліотека orjson
+        if backend == 'pretty':
+            return lambda data: json.dumps(data, indent=4).replace('\n', '\n    ')
+        if backend == 'compact':
+            return lambda data: json.dumps(data, separators=(',', ':'))
+        if backend == 'orjson':
+            import orjson
+            return lambda data: orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS).decode()
+        raise ValueError(f'Unknown output backend: {backend}')
+
+    def run(self):
+        self.readInput()  # Дії виконуються під час читання
+        self.writeOutput()
+
+# -------------------- Execution
+if __name__ == "__main__":
+    # You can replace 'input.json' and 'output.json' with your actual file paths.
+    simulation = Main('input.json', 'output.json')
+    simulation.run()
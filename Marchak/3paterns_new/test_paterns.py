@@ -0,0 +1,196 @@
+import contextlib
+import io
+import json
+import os
+import tempfile
+import unittest
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from paterns import BasicContainer, LiquidContainer, Main, Port, Ship, StreamingJSONReader
+
+SCENARIO = {
+    'ports': [
+        {'ID': 1, 'latitude': 50.45, 'longitude': 30.52},
+        {'ID': 2, 'latitude': 51.50, 'longitude': -0.12},
+    ],
+    'ships': [
+        {'ID': 100, 'portID': 1, 'totalWeightCapacity': 20000, 'maxAllContainers': 50,
+         'maxHeavyContainers': 30, 'maxRefrigeratedContainers': 10, 'maxLiquidContainers': 10,
+         'fuelConsumptionPerKM': 0.5},
+        {'ID': 101, 'portID': 2, 'totalWeightCapacity': 30000, 'maxAllContainers': 40,
+         'maxHeavyContainers': 20, 'maxRefrigeratedContainers': 5, 'maxLiquidContainers': 5,
+         'fuelConsumptionPerKM': 8.7},
+    ],
+    'containers': [
+        {'ID': 1, 'type': 'Basic', 'weight': 2500},
+        {'ID': 2, 'type': 'Liquid', 'weight': 4000},
+    ],
+    'actions': [
+        {'action': 'load_container', 'shipID': 100, 'containerID': 1},
+        {'action': 'load_container', 'shipID': 100, 'containerID': 2},
+        {'action': 'refuel', 'shipID': 100, 'fuelAmount': 100000000},
+        {'action': 'sail', 'shipID': 100, 'destinationPortID': 2},
+        {'action': 'unload_container', 'shipID': 100, 'containerID': 2},
+    ],
+}
+
+
+def flatten(data):
+    return [(section, record) for section, records in data.items() for record in records]
+
+
+class TestStreamingJSONReader(unittest.TestCase):
+
+    def records(self, text, chunkSize=1 << 16):
+        return list(StreamingJSONReader(io.StringIO(text), chunkSize).records())
+
+    def test_every_chunk_size(self):
+        text = json.dumps(SCENARIO, indent=4)
+        for chunkSize in range(1, 40):
+            self.assertEqual(self.records(text, chunkSize), flatten(SCENARIO), chunkSize)
+
+    def test_numbers_and_literals_split_by_chunks(self):
+        text = '{"values": [12345, 6.75e2, true, null, "a\\"b"], "count": 1024}'
+        expected = [('values', 12345), ('values', 675.0), ('values', True), ('values', None),
+                    ('values', 'a"b'), ('count', 1024)]
+        for chunkSize in (1, 2, 3, 5):
+            self.assertEqual(self.records(text, chunkSize), expected)
+
+    def test_empty_object_and_arrays(self):
+        self.assertEqual(self.records('{}'), [])
+        self.assertEqual(self.records('{"ports": [], "ships": [ ]}'), [])
+
+    def test_malformed_input(self):
+        for text in ('', '[1, 2]', '{"ports": [1, 2', '{"ports": [1 2]}', '{"ports": [1,, 2]}',
+                     '{"ports": [1, 2] "ships": []}', '{1: []}', '{"ports" []}', '{"ports": [tru]}'):
+            with self.assertRaises(ValueError, msg=text):
+                self.records(text, 3)
+
+
+class TestShipManifest(unittest.TestCase):
+
+    def test_running_totals(self):
+        ship = Ship(1, Port(1, 0, 0), 10000, 3, 3, 3, 3, 1.0)
+        basic, liquid = BasicContainer(1, 2000), LiquidContainer(2, 3000)
+        self.assertTrue(ship.load(basic))
+        self.assertFalse(ship.load(basic))
+        self.assertTrue(ship.load(liquid))
+        self.assertFalse(ship.load(BasicContainer(3, 5001)))
+        self.assertEqual((ship.containersWeight, ship.containersConsumption), (5000, 17000.0))
+        self.assertFalse(ship.unLoad(LiquidContainer(2, 1000)))
+        self.assertTrue(ship.unLoad(liquid))
+        self.assertFalse(ship.hasContainer(liquid))
+        self.assertEqual((ship.containersWeight, ship.containersConsumption), (2000, 5000.0))
+        self.assertEqual(ship.getCurrentContainers(), [basic])
+        self.assertTrue(ship.unLoad(basic))
+        self.assertEqual((ship.containersWeight, ship.containersConsumption), (0, 0))
+
+
+class TestMainInput(unittest.TestCase):
+
+    def run_scenario(self, text):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        input_file = os.path.join(directory.name, 'input.json')
+        with open(input_file, 'w') as file:
+            file.write(text)
+        main = Main(input_file, os.path.join(directory.name, 'output.json'), verbose=False)
+        main.readInput()
+        return main
+
+    def state(self, main):
+        return {
+            'ports': {port.ID: sorted(port.containers) for port in main.ports},
+            'ships': {ship.ID: (ship.currentPort.ID, round(ship.fuel, 6), [c.ID for c in ship.getCurrentContainers()])
+                      for ship in main.ships},
+            'actions': {action: stats[0] for action, stats in main.actionStats.items()},
+        }
+
+    def test_sections_in_any_order(self):
+        expected = self.state(self.run_scenario(json.dumps(SCENARIO)))
+        self.assertEqual(expected['ships'][100][0], 2)
+        self.assertEqual(expected['ports'][2], [2])
+        for order in (('actions', 'containers', 'ships', 'ports'), ('ships', 'actions', 'ports', 'containers'),
+                      ('containers', 'ports', 'ships', 'actions')):
+            text = json.dumps({section: SCENARIO[section] for section in order})
+            self.assertEqual(self.state(self.run_scenario(text)), expected, order)
+
+    def test_ship_with_unknown_port(self):
+        scenario = dict(SCENARIO, ships=SCENARIO['ships'] + [dict(SCENARIO['ships'][0], ID=102, portID=9)])
+        with self.assertRaises(ValueError):
+            self.run_scenario(json.dumps(scenario))
+
+    def test_containers_without_ports(self):
+        with self.assertRaises(ValueError):
+            self.run_scenario(json.dumps({'containers': SCENARIO['containers']}))
+
+
+
+class TestMainOutput(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.input_file = os.path.join(self.directory, 'input.json')
+        with open(self.input_file, 'w') as file:
+            json.dump(SCENARIO, file)
+
+    def run_main(self, backend='pretty', verbose=False):
+        output_file = os.path.join(self.directory, f'output-{backend}.json')
+        main = Main(self.input_file, output_file, verbose=verbose)
+        main.readInput()
+        main.writeOutput(backend)
+        with open(output_file) as file:
+            return main, file.read()
+
+    def test_pretty_output(self):
+        _, text = self.run_main()
+        output = json.loads(text)
+        self.assertEqual(text, json.dumps(output, indent=4))
+        self.assertEqual(output['Port 2']['liquid_container'], [2])
+        self.assertEqual(output['Port 2']['ships']['100']['basic_container'], [1])
+        self.assertEqual(output['Port 1']['ships'], {})
+
+    def test_compact_output_matches_pretty(self):
+        _, pretty = self.run_main()
+        _, compact = self.run_main('compact')
+        self.assertEqual(json.loads(compact), json.loads(pretty))
+        self.assertEqual(compact, json.dumps(json.loads(compact), separators=(',', ':')))
+
+    @unittest.skipIf(orjson is None, 'orjson is not installed')
+    def test_orjson_output_matches_pretty(self):
+        _, pretty = self.run_main()
+        _, text = self.run_main('orjson')
+        self.assertEqual(json.loads(text), json.loads(pretty))
+
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            Main.outputDumps('yaml')
+
+    def test_throughput_report(self):
+        main, _ = self.run_main()
+        report = main.throughputReport()
+        self.assertEqual({action: stats['count'] for action, stats in report.items()},
+                         {'load_container': 2, 'refuel': 1, 'sail': 1, 'unload_container': 1})
+        for stats in report.values():
+            self.assertGreaterEqual(stats['seconds'], 0)
+            if stats['actions_per_second'] is not None:
+                self.assertGreater(stats['actions_per_second'], 0)
+
+    def test_verbose(self):
+        for verbose, expected in ((False, ''), (True, 'Контейнер 1 завантажено на корабель 100.')):
+            output = io.StringIO()
+            with contextlib.redirect_stdout(output):
+                self.run_main(verbose=verbose)
+            self.assertIn(expected, output.getvalue())
+            if not verbose:
+                self.assertEqual(output.getvalue(), '')
+
+
+if __name__ == '__main__':
+    unittest.main()
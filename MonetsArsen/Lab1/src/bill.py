@@ -2,17 +2,31 @@
 Bill Management Module
 
 This module provides functionality for managing customer bills, including
-debt tracking, limit checking, and payment processing.
+debt tracking, limit checking, and payment processing. Every bill changes its
+debt under a lock, so it can be charged and paid from several threads. A bill with
+a journal records every change of its debt and limit there before making it (see
+src.journal), so a change the journal rejects is not made.
 
 Classes:
     Bill: Represents a customer's bill with methods for debt management.
 
+Dependencies:
+    - src.events
+
 Example:
     bill = Bill(customer_id=123, limiting_amount=500)
     bill.add(100)
     bill.pay(50)
 """
 
+import threading
+from typing import TYPE_CHECKING, Optional
+
+from src import events
+
+if TYPE_CHECKING:
+    from src.journal import BillJournal
+
 
 class Bill:
     """
@@ -22,13 +36,20 @@ class Bill:
     including adding charges, making payments, and checking against a debt limit.
     """
 
-    def __init__(self, customer_id: int, limiting_amount: float = 100) -> None:
+    def __init__(self, customer_id: int, limiting_amount: float = 100,
+                 lock: Optional[threading.Lock] = None,
+                 journal: Optional['BillJournal'] = None) -> None:
         """
         Initialize a Bill object.
 
         Args:
             customer_id (int): The unique identifier for the customer.
             limiting_amount (float, optional): The maximum allowable debt. Defaults to 100.
+            lock (Optional[threading.Lock], optional): The lock that guards the debt, e.g. one
+                shared by the bills of a ledger shard. Defaults to None, which creates a lock
+                for this bill.
+            journal (Optional[BillJournal], optional): The journal to record the changes in.
+                Defaults to None.
 
         Returns:
             None
@@ -37,6 +58,8 @@ class Bill:
         self.current_debt: float = 0.0
         self._is_reached_limit: bool = False
         self.customer_id: int = customer_id
+        self._lock: threading.Lock = lock if lock is not None else threading.Lock()
+        self.journal: Optional['BillJournal'] = journal
 
     def check(self, amount: float) -> bool:
         """
@@ -48,37 +71,66 @@ class Bill:
         Returns:
             bool: True if the limit would be exceeded, False otherwise.
 
-        Prints:
-            A message indicating by how much the limit has been exceeded, if applicable.
+        Emits:
+            'limit_exceeded' with the limit and by how much it would be exceeded, if applicable.
         """
         temp_value = self.current_debt + amount
         if temp_value > self.limiting_amount:
-            print(f"Current limit {self.limiting_amount} has been exceeded by {temp_value - self.limiting_amount}")
+            events.emit('limit_exceeded', customer_id=self.customer_id, limit=self.limiting_amount,
+                        excess=temp_value - self.limiting_amount)
             return True
         return False
 
-    def add(self, amount: float) -> None:
+    def add(self, amount: float) -> bool:
         """
         Add the given amount to the current debt if it doesn't exceed the limit.
 
-        This method first checks if adding the amount would exceed the limiting amount.
-        If not, it adds the amount to the current debt.
+        The check and the addition happen atomically under the lock of the bill.
 
         Args:
             amount (float): The amount to be added to the current debt.
 
         Returns:
-            None
+            bool: True if the amount was added, False if it would exceed the limit.
 
-        Note:
-            This method does not return any value, but it may modify the `current_debt`
-            attribute of the object if the check passes.
+        Emits:
+            'limit_exceeded' with the limit and by how much it would be exceeded, if applicable.
         """
-        if not self.check(amount):
-            self._is_reached_limit = False
-            self.current_debt += amount
-        else:
+        with self._lock:
+            temp_value = self.current_debt + amount
+            if temp_value <= self.limiting_amount:
+                if self.journal is not None:
+                    self.journal.added(self.customer_id, amount)
+                self._is_reached_limit = False
+                self.current_debt = temp_value
+                return True
             self._is_reached_limit = True
+            limit = self.limiting_amount
+        events.emit('limit_exceeded', customer_id=self.customer_id, limit=limit, excess=temp_value - limit)
+        return False
+
+    def add_if_fits(self, amount: float) -> bool:
+        """
+        Add the given amount to the current debt only if it doesn't exceed the limit.
+
+        Unlike `add`, a rejected amount leaves the bill unchanged and emits no event, so
+        a total can be tried before its parts are added one by one.
+
+        Args:
+            amount (float): The amount to be added to the current debt.
+
+        Returns:
+            bool: True if the amount was added, False otherwise.
+        """
+        with self._lock:
+            temp_value = self.current_debt + amount
+            if temp_value > self.limiting_amount:
+                return False
+            if self.journal is not None:
+                self.journal.added(self.customer_id, amount)
+            self._is_reached_limit = False
+            self.current_debt = temp_value
+            return True
 
     def pay(self, amount: float) -> None:
         """
@@ -93,7 +145,10 @@ class Bill:
         Returns:
             None
         """
-        self.current_debt = max(0.0, self.current_debt - amount)
+        with self._lock:
+            if self.journal is not None:
+                self.journal.paid(self.customer_id, amount)
+            self.current_debt = max(0.0, self.current_debt - amount)
 
     def change_limit(self, amount: float) -> None:
         """
@@ -105,11 +160,14 @@ class Bill:
         Returns:
             None
 
-        Prints:
-            A message confirming the new limit.
+        Emits:
+            'limit_changed' with the new limit.
         """
-        self.limiting_amount = amount
-        print(f"Limit has changed to {self.limiting_amount}")
+        with self._lock:
+            if self.journal is not None:
+                self.journal.limit_changed(self.customer_id, amount)
+            self.limiting_amount = amount
+        events.emit('limit_changed', customer_id=self.customer_id, limit=self.limiting_amount)
 
     def is_reached_limit(self) -> bool:
         """
@@ -10,12 +10,14 @@ Classes:
 
 Dependencies:
     - src.bill.Bill
+    - src.events
     - src.operator.Operator (for type checking)
 """
 
 import string
 from typing import List, TYPE_CHECKING, Self, Dict
 
+from src import events
 from src.bill import Bill
 
 if TYPE_CHECKING:
@@ -76,7 +78,9 @@ class Customer:
         operator = self.operators[operator_id]
         operator.calculate_talking_cost(duration=duration, customer=self)
         bill = operator.get_bill(customer_id=self.id)
-        _print_with_check(f"{self.first_name} has talked to {other_customer.first_name} for {duration} minutes", bill)
+        if not bill.is_reached_limit():
+            events.emit('call', operator_id=operator_id, customer_id=self.id, first_name=self.first_name,
+                        peer_id=other_customer.id, peer_name=other_customer.first_name, duration=duration)
 
     def message(self, quantity: float, other_customer: Self, operator_id: int) -> None:
         """
@@ -95,7 +99,9 @@ class Customer:
         operator = self.operators[operator_id]
         operator.calculate_message_cost(quantity=quantity, customer=self, other_customer=other_customer)
         bill = operator.get_bill(customer_id=self.id)
-        _print_with_check(f"{self.first_name} has sent {quantity} message(s) to {other_customer.first_name}", bill)
+        if not bill.is_reached_limit():
+            events.emit('message', operator_id=operator_id, customer_id=self.id, first_name=self.first_name,
+                        peer_id=other_customer.id, peer_name=other_customer.first_name, quantity=quantity)
 
     def connection(self, amount: float, operator_id: int) -> None:
         """
@@ -113,7 +119,9 @@ class Customer:
         operator = self.operators[operator_id]
         operator.calculate_network_cost(amount=amount, customer=self)
         bill = operator.get_bill(customer_id=self.id)
-        _print_with_check(f"{self.first_name} has used {amount} megabyte(s)", bill)
+        if not bill.is_reached_limit():
+            events.emit('network', operator_id=operator_id, customer_id=self.id, first_name=self.first_name,
+                        amount=amount)
 
     def get_bill(self, operator_id: int) -> Bill:
         """
@@ -127,18 +135,3 @@ class Customer:
         """
         operator = self.operators[operator_id]
         return operator.get_bill(self.id)
-
-
-def _print_with_check(text: str, bill: 'Bill') -> None:
-    """
-    Print the given text if the bill has not reached its limit.
-
-    Args:
-        text (str): The text to print.
-        bill (Bill): The bill to check.
-
-    Returns:
-        None
-    """
-    if not bill.is_reached_limit():
-        print(text)
\ No newline at end of file
@@ -0,0 +1,417 @@
+"""
+Billing Events Module
+
+This module replaces the console messages of the billing system with structured events.
+Bills, operators and customers report what happens (a bill was created, a limit was
+exceeded, a customer made a call, ...) by emitting an event with a name and fields to
+the current sink, which decides what to do with it:
+    - StreamSink formats the events as the familiar console messages and writes them to
+      a stream (stdout by default), optionally in batches. It is the default sink.
+    - NullSink drops all events.
+    - MemorySink keeps the events in memory, e.g. for tests.
+    - AsyncFileSink writes the events as JSON Lines from a background thread, so file
+      I/O stays off the billing hot path.
+Emitting can also be switched off entirely with `set_sink(None)`, in which case `emit`
+returns immediately.
+
+Classes:
+    Event: A named billing event with its fields.
+    EventSink: The base class of the sinks.
+    NullSink: Drops all events.
+    MemorySink: Keeps the events in memory.
+    StreamSink: Writes the events as text to a stream.
+    AsyncFileSink: Writes the events as JSON Lines from a background thread.
+
+Functions:
+    emit: Sends an event to the current sink.
+    get_sink: Returns the current sink.
+    set_sink: Replaces the current sink.
+"""
+
+import json
+import queue
+import sys
+import threading
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Any, Deque, Dict, List, NamedTuple, Optional, TextIO
+
+# Console messages of the events, filled in with the fields of the event
+FORMATS: Dict[str, str] = {
+    'bill_created': "New bill for customer %(first_name)s is created",
+    'limit_exceeded': "Current limit %(limit)s has been exceeded by %(excess)s",
+    'limit_changed': "Limit has changed to %(limit)s",
+    'call': "%(first_name)s has talked to %(peer_name)s for %(duration)s minutes",
+    'message': "%(first_name)s has sent %(quantity)s message(s) to %(peer_name)s",
+    'network': "%(first_name)s has used %(amount)s megabyte(s)",
+}
+
+
+class Event(NamedTuple):
+    """
+    A named billing event with its fields.
+
+    Attributes:
+        name (str): The name of the event, e.g. 'bill_created'.
+        fields (Dict[str, Any]): The details of the event.
+    """
+
+    name: str
+    fields: Dict[str, Any]
+
+    def format(self) -> str:
+        """
+        Format the event as a console message.
+
+        Returns:
+            str: The message, or the name and fields for events without a format.
+        """
+        template = FORMATS.get(self.name)
+        if template is None:
+            return f"{self.name} {self.fields}"
+        return template % self.fields
+
+
+class EventSink(ABC):
+    """
+    The base class of the sinks. A sink receives every emitted event.
+    """
+
+    @abstractmethod
+    def emit(self, event: Event) -> None:
+        """
+        Receive an event.
+
+        Args:
+            event (Event): The event.
+
+        Returns:
+            None
+        """
+
+    def flush(self) -> None:
+        """
+        Write out the buffered events, if the sink buffers them.
+
+        Returns:
+            None
+        """
+
+    def close(self) -> None:
+        """
+        Flush the sink and release its resources.
+
+        Returns:
+            None
+        """
+        self.flush()
+
+
+class NullSink(EventSink):
+    """
+    Drops all events.
+    """
+
+    def emit(self, event: Event) -> None:
+        """
+        Drop an event.
+
+        Args:
+            event (Event): The event.
+
+        Returns:
+            None
+        """
+
+
+class MemorySink(EventSink):
+    """
+    Keeps the events in memory.
+
+    Attributes:
+        events (Deque[Event]): The received events, oldest first.
+    """
+
+    def __init__(self, limit: Optional[int] = None) -> None:
+        """
+        Initialize a MemorySink object.
+
+        Args:
+            limit (Optional[int]): The number of most recent events to keep. Defaults to
+                None, which keeps all events.
+
+        Returns:
+            None
+        """
+        self.events: Deque[Event] = deque(maxlen=limit)
+
+    def emit(self, event: Event) -> None:
+        """
+        Keep an event.
+
+        Args:
+            event (Event): The event.
+
+        Returns:
+            None
+        """
+        self.events.append(event)
+
+    def names(self) -> List[str]:
+        """
+        Get the names of the kept events.
+
+        Returns:
+            List[str]: The names, oldest first.
+        """
+        return [event.name for event in self.events]
+
+
+class StreamSink(EventSink):
+    """
+    Writes the events as console messages to a stream.
+
+    With a buffer size above 1, the messages are written in batches, so they can appear
+    after other output written to the same stream in the meantime.
+    """
+
+    def __init__(self, stream: Optional[TextIO] = None, buffer_size: int = 1) -> None:
+        """
+        Initialize a StreamSink object.
+
+        Args:
+            stream (Optional[TextIO]): The stream to write to. Defaults to None, which
+                writes to the sys.stdout of the moment of writing.
+            buffer_size (int): The number of messages written at once. Defaults to 1.
+
+        Returns:
+            None
+        """
+        self.stream = stream
+        self.buffer_size = buffer_size
+        self._buffer: List[str] = []
+        self._lock = threading.Lock()
+
+    def emit(self, event: Event) -> None:
+        """
+        Write the message of an event, or buffer it.
+
+        Args:
+            event (Event): The event.
+
+        Returns:
+            None
+        """
+        if self.buffer_size <= 1:
+            (self.stream if self.stream is not None else sys.stdout).write(event.format() + '\n')
+            return
+        with self._lock:
+            self._buffer.append(event.format())
+            if len(self._buffer) >= self.buffer_size:
+                self._write()
+
+    def flush(self) -> None:
+        """
+        Write the buffered messages.
+
+        Returns:
+            None
+        """
+        with self._lock:
+            self._write()
+
+    def _write(self) -> None:
+        """
+        Write the buffered messages; the lock must be held.
+
+        Returns:
+            None
+        """
+        if self._buffer:
+            stream = self.stream if self.stream is not None else sys.stdout
+            stream.write('\n'.join(self._buffer) + '\n')
+            self._buffer.clear()
+
+
+class AsyncFileSink(EventSink):
+    """
+    Writes the events as JSON Lines from a background thread.
+
+    Events are collected in batches. A full batch is handed to the writer thread through
+    a bounded queue, so emitting costs an append most of the time and blocks only when
+    the writer falls more than `max_pending` batches behind.
+
+    If writing a batch fails, the writer keeps running and the error is raised by the
+    next call to `emit`, `flush` or `close`.
+
+    Attributes:
+        path (str): The file the events are appended to.
+    """
+
+    def __init__(self, path: str, batch_size: int = 1000, max_pending: int = 8) -> None:
+        """
+        Initialize an AsyncFileSink object and start its writer thread.
+
+        Args:
+            path (str): The file to append the events to.
+            batch_size (int): The number of events handed to the writer at once. Defaults to 1000.
+            max_pending (int): The number of batches that can wait for the writer. Defaults to 8.
+
+        Returns:
+            None
+        """
+        self.path = path
+        self.batch_size = batch_size
+        self._batch: List[Event] = []
+        self._lock = threading.Lock()
+        self._queue: 'queue.Queue[Optional[List[Event]]]' = queue.Queue(maxsize=max_pending)
+        self._error: Optional[Exception] = None
+        self._closed = False
+        self._file = open(path, 'a', encoding='utf-8')
+        self._writer = threading.Thread(target=self._write_batches, name='billing-events', daemon=True)
+        self._writer.start()
+
+    def emit(self, event: Event) -> None:
+        """
+        Add an event to the current batch, handing the batch to the writer when it is full.
+
+        Args:
+            event (Event): The event.
+
+        Returns:
+            None
+
+        Raises:
+            ValueError: If the sink is closed.
+            Exception: The error of a failed write of an earlier batch.
+        """
+        self._raise_error()
+        with self._lock:
+            if self._closed:
+                raise ValueError("Event sink is closed")
+            self._batch.append(event)
+            if len(self._batch) < self.batch_size:
+                return
+            batch, self._batch = self._batch, []
+            # Under the lock, so close cannot stop the writer before the batch is queued
+            self._queue.put(batch)
+
+    def flush(self) -> None:
+        """
+        Hand the current batch to the writer and wait until everything is written.
+
+        Returns:
+            None
+
+        Raises:
+            Exception: The error of a failed write.
+        """
+        with self._lock:
+            batch, self._batch = self._batch, []
+            if batch:
+                self._queue.put(batch)
+        self._queue.join()
+        self._raise_error()
+
+    def close(self) -> None:
+        """
+        Write all events, stop the writer thread and close the file.
+
+        Returns:
+            None
+
+        Raises:
+            Exception: The error of a failed write. The sink is closed nevertheless.
+        """
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            batch, self._batch = self._batch, []
+            if batch:
+                self._queue.put(batch)
+            self._queue.put(None)
+        self._writer.join()
+        self._file.close()
+        self._raise_error()
+
+    def _write_batches(self) -> None:
+        """
+        Write the batches from the queue until the sink is closed.
+
+        Returns:
+            None
+        """
+        encode = json.JSONEncoder().encode
+        while True:
+            batch = self._queue.get()
+            try:
+                if batch is None:
+                    return
+                self._file.write(''.join([encode({'event': name, **fields}) + '\n' for name, fields in batch]))
+                self._file.flush()
+            except Exception as error:
+                # Keep draining the queue, so emit and flush do not block on a dead writer
+                if self._error is None:
+                    self._error = error
+            finally:
+                self._queue.task_done()
+
+    def _raise_error(self) -> None:
+        """
+        Raise the error of a failed write once, if there was one.
+
+        Returns:
+            None
+
+        Raises:
+            Exception: The error.
+        """
+        error, self._error = self._error, None
+        if error is not None:
+            raise error
+
+
+_sink: Optional[EventSink] = StreamSink()
+
+
+def emit(name: str, **fields: Any) -> None:
+    """
+    Send an event to the current sink.
+
+    Args:
+        name (str): The name of the event.
+        **fields: The details of the event.
+
+    Returns:
+        None
+    """
+    if _sink is not None:
+        _sink.emit(Event(name, fields))
+
+
+def get_sink() -> Optional[EventSink]:
+    """
+    Get the current sink.
+
+    Returns:
+        Optional[EventSink]: The current sink, or None if events are switched off.
+    """
+    return _sink
+
+
+def set_sink(sink: Optional[EventSink]) -> Optional[EventSink]:
+    """
+    Replace the current sink. The previous sink is flushed, but not closed.
+
+    Args:
+        sink (Optional[EventSink]): The new sink, or None to switch events off.
+
+    Returns:
+        Optional[EventSink]: The previous sink.
+    """
+    global _sink
+    previous, _sink = _sink, sink
+    if previous is not None:
+        previous.flush()
+    return previous
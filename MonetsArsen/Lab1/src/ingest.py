@@ -0,0 +1,303 @@
+"""
+CDR Ingestion Module
+
+This module feeds call-detail records (CDRs) from files into the billing system. Each
+record is one usage event with the fields customer_id, operator_id, kind ('talk',
+'message' or 'network'), quantity and peer_id (the other customer, empty for network
+usage). Records are read from CSV files with a header row or from JSON Lines files,
+optionally gzip-compressed.
+
+The pipeline is built from generators: records are read line by line, validated, grouped
+into chunks of columns and rated chunk by chunk with `rate_batch`. Only one chunk is in
+memory at a time, so files of any size are processed in constant memory. Reading can
+run ahead of rating in a background thread; the chunks it reads wait in a bounded queue,
+and the reader blocks when the queue is full, so a slow rating step holds the reader back
+instead of letting chunks pile up.
+
+Invalid records (unknown kind, customer or operator, a customer who is not a client of
+the operator, a malformed or negative quantity) are counted and skipped.
+
+Classes:
+    IngestReport: Counts of the records processed by an ingestion.
+
+Functions:
+    read_records: Reads the raw records of a CSV or JSON Lines file.
+    parse_record: Validates a raw record.
+    chunked: Groups parsed records into chunks of columns.
+    prefetch: Reads ahead of the consumer through a bounded queue.
+    ingest: Rates the records of CDR files.
+
+Dependencies:
+    - src.rating
+    - src.operator.Operator (for type checking)
+    - src.customer.Customer (for type checking)
+"""
+
+import csv
+import gzip
+import json
+import queue
+import threading
+from dataclasses import dataclass, field
+from typing import (IO, TYPE_CHECKING, Any, Iterable, Iterator, List, Mapping, Optional, Tuple,
+                    TypeVar, Union)
+
+from src.rating import KINDS, MESSAGE, NETWORK, NO_PEER, index_by_id, rate_batch
+
+if TYPE_CHECKING:
+    from src.customer import Customer
+    from src.operator import Operator
+
+CDR_FIELDS = ('customer_id', 'operator_id', 'kind', 'quantity', 'peer_id')
+MAX_ERRORS = 20
+
+# A parsed record is (customer ID, operator ID, kind code, quantity, peer ID)
+Record = Tuple[int, int, int, float, int]
+Columns = Tuple[List[int], List[int], List[int], List[float], List[int]]
+T = TypeVar('T')
+
+
+@dataclass
+class IngestReport:
+    """
+    Counts of the records processed by an ingestion.
+
+    Attributes:
+        records (int): The number of records read.
+        rated (int): The number of records whose cost was added to a bill.
+        rejected (int): The number of valid records rejected by the limit of a bill.
+        invalid (int): The number of records skipped as invalid.
+        chunks (int): The number of chunks rated.
+        errors (List[str]): The first MAX_ERRORS validation errors, with file and line.
+    """
+
+    records: int = 0
+    rated: int = 0
+    rejected: int = 0
+    invalid: int = 0
+    chunks: int = 0
+    errors: List[str] = field(default_factory=list)
+
+
+def _open(path: str) -> IO[str]:
+    """
+    Open a text file, decompressing it if its name ends with '.gz'.
+
+    Args:
+        path (str): The path of the file.
+
+    Returns:
+        IO[str]: The open file.
+    """
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rt', newline='', encoding='utf-8')
+    return open(path, newline='', encoding='utf-8')
+
+
+def read_records(path: str) -> Iterator[Tuple[int, Any]]:
+    """
+    Read the raw records of a CDR file, one line at a time.
+
+    Files whose name (without '.gz') ends with '.jsonl' or '.ndjson' are read as JSON
+    Lines, all other files as CSV with a header row.
+
+    Args:
+        path (str): The path of the file.
+
+    Yields:
+        Tuple[int, Any]: The line number and the raw record: a dict, or the text of a
+        line that is not valid JSON.
+    """
+    name = path[:-3] if path.endswith('.gz') else path
+    with _open(path) as file:
+        if name.endswith(('.jsonl', '.ndjson')):
+            for line_number, line in enumerate(file, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    yield line_number, json.loads(line)
+                except json.JSONDecodeError:
+                    yield line_number, line.rstrip('\n')
+        else:
+            reader = csv.DictReader(file)
+            for row in reader:
+                yield reader.line_num, row
+
+
+def parse_record(raw: Any, operators: Mapping[int, 'Operator'], customers: Mapping[int, 'Customer']) -> Record:
+    """
+    Validate a raw record and convert its fields.
+
+    Args:
+        raw (Any): The raw record, a dict with the fields in CDR_FIELDS.
+        operators (Mapping[int, Operator]): The operators by ID.
+        customers (Mapping[int, Customer]): The customers by ID.
+
+    Returns:
+        Record: The customer ID, operator ID, kind code, quantity and peer ID.
+
+    Raises:
+        ValueError: If the record is invalid.
+    """
+    if isinstance(raw, str):
+        raise ValueError(f"Malformed JSON {raw[:40]!r}")
+    if not isinstance(raw, dict):
+        raise ValueError("Record is not an object")
+    try:
+        customer_id = int(raw['customer_id'])
+        operator_id = int(raw['operator_id'])
+        quantity = float(raw['quantity'])
+    except (KeyError, TypeError, ValueError) as error:
+        raise ValueError(f"Malformed record: {error}") from None
+    kind = KINDS.get(str(raw.get('kind', '')).strip().lower())
+    if kind is None:
+        raise ValueError(f"Unknown event kind {raw.get('kind')!r}")
+    if not quantity >= 0:
+        raise ValueError(f"Invalid quantity {quantity}")
+    customer = customers.get(customer_id)
+    if customer is None:
+        raise ValueError(f"Unknown customer {customer_id}")
+    if operator_id not in operators or operator_id not in customer.operators:
+        raise ValueError(f"Customer {customer_id} is not a client of operator {operator_id}")
+    peer = raw.get('peer_id')
+    if kind == NETWORK or peer in (None, ''):
+        if kind == MESSAGE:
+            raise ValueError("Message without a recipient")
+        return customer_id, operator_id, kind, quantity, NO_PEER
+    try:
+        peer_id = int(peer)
+    except (TypeError, ValueError):
+        raise ValueError(f"Malformed peer_id {peer!r}") from None
+    return customer_id, operator_id, kind, quantity, peer_id
+
+
+def chunked(records: Iterable[Record], chunk_size: int) -> Iterator[Columns]:
+    """
+    Group parsed records into chunks of columns.
+
+    Args:
+        records (Iterable[Record]): The parsed records.
+        chunk_size (int): The maximum number of records in a chunk.
+
+    Yields:
+        Columns: The customer IDs, operator IDs, kinds, quantities and peer IDs of a chunk.
+
+    Raises:
+        ValueError: If the chunk size is not positive.
+    """
+    if chunk_size < 1:
+        raise ValueError("Chunk size must be positive")
+    columns: Columns = ([], [], [], [], [])
+    for record in records:
+        for column, value in zip(columns, record):
+            column.append(value)
+        if len(columns[0]) == chunk_size:
+            yield columns
+            columns = ([], [], [], [], [])
+    if columns[0]:
+        yield columns
+
+
+def prefetch(items: Iterable[T], size: int) -> Iterator[T]:
+    """
+    Produce the items of an iterable in a background thread, at most `size` ahead.
+
+    The thread blocks while `size` items are waiting, so a slow consumer limits how much
+    is read ahead. An exception raised by the iterable is raised to the consumer.
+
+    Args:
+        items (Iterable[T]): The items to produce.
+        size (int): The maximum number of items waiting to be consumed.
+
+    Yields:
+        T: The items, in order.
+    """
+    buffer: 'queue.Queue[Tuple[bool, Any]]' = queue.Queue(maxsize=size)
+    stopped = threading.Event()
+    done = object()
+
+    def produce() -> None:
+        try:
+            for item in items:
+                while not stopped.is_set():
+                    try:
+                        buffer.put((True, item), timeout=0.1)
+                        break
+                    except queue.Full:
+                        continue
+                if stopped.is_set():
+                    return
+            buffer.put((True, done))
+        except BaseException as error:
+            buffer.put((False, error))
+
+    thread = threading.Thread(target=produce, name='cdr-prefetch', daemon=True)
+    thread.start()
+    try:
+        while True:
+            ok, item = buffer.get()
+            if not ok:
+                raise item
+            if item is done:
+                return
+            yield item
+    finally:
+        stopped.set()
+        # Let a blocked producer see the stop flag
+        while thread.is_alive():
+            try:
+                buffer.get(timeout=0.1)
+            except queue.Empty:
+                pass
+
+
+def ingest(paths: Union[str, Iterable[str]],
+           operators: Union[Mapping[int, 'Operator'], Iterable['Operator']],
+           customers: Union[Mapping[int, 'Customer'], Iterable['Customer']],
+           chunk_size: int = 10000, read_ahead: int = 2,
+           report: Optional[IngestReport] = None) -> IngestReport:
+    """
+    Rate the records of CDR files chunk by chunk.
+
+    Args:
+        paths (Union[str, Iterable[str]]): The CDR file or files, processed in order.
+        operators (Union[Mapping[int, Operator], Iterable[Operator]]): The operators, or a
+            mapping of them by ID.
+        customers (Union[Mapping[int, Customer], Iterable[Customer]]): The customers, or a
+            mapping of them by ID.
+        chunk_size (int): The number of records rated at once. Defaults to 10000.
+        read_ahead (int): The number of chunks read ahead in a background thread, or 0 to
+            read and rate in the calling thread. Defaults to 2.
+        report (Optional[IngestReport]): A report to add the counts to. Defaults to None,
+            which starts a new report.
+
+    Returns:
+        IngestReport: The counts of the processed records.
+    """
+    if isinstance(paths, str):
+        paths = [paths]
+    operators = index_by_id(operators)
+    customers = index_by_id(customers)
+    if report is None:
+        report = IngestReport()
+
+    def parsed() -> Iterator[Record]:
+        for path in paths:
+            for line_number, raw in read_records(path):
+                report.records += 1
+                try:
+                    yield parse_record(raw, operators, customers)
+                except ValueError as error:
+                    report.invalid += 1
+                    if len(report.errors) < MAX_ERRORS:
+                        report.errors.append(f"{path}:{line_number}: {error}")
+
+    chunks = chunked(parsed(), chunk_size)
+    if read_ahead > 0:
+        chunks = prefetch(chunks, read_ahead)
+    for columns in chunks:
+        rated = rate_batch(operators, customers, *columns).accepted_count
+        report.rated += rated
+        report.rejected += len(columns[0]) - rated
+        report.chunks += 1
+    return report
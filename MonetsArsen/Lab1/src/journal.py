@@ -0,0 +1,477 @@
+"""
+Billing Journal Module
+
+This module makes the bills of a ledger persistent. Every change of a bill (creation,
+accepted charge, payment, limit change) is appended to a journal file as a fixed-size
+binary record. The records are not written one by one: they are collected in memory and
+written together with a single fsync by a background thread every few milliseconds
+(group commit), or at once by `commit()`.
+
+A snapshot writes the state of all bills to a single compact file, after which the
+journal records it covers are deleted. The commit thread takes a snapshot whenever the
+journal file reaches a number of records, so replay time stays bounded. Journal files
+are numbered by generation: a snapshot of generation G contains everything from the
+journals of lower generations, so on startup the snapshot is loaded and only the
+journals of generation G and above are replayed. A crash while a snapshot is written
+leaves the previous snapshot and all journals in place, and a record cut off by a crash
+at the end of a journal is ignored. A failed write keeps its records pending for the
+next commit, and until a commit succeeds no further change of a bill is accepted.
+
+Only the debts, limits and the existence of bills are persisted; whether the last
+charge of a bill was rejected is not.
+
+Classes:
+    BillJournal: The write-ahead journal of a ledger.
+
+Functions:
+    open_ledger: Restores a ledger from a journal directory and keeps journaling it.
+    replay: Loads the snapshot and journals of a directory into a ledger.
+
+Dependencies:
+    - src.ledger.BillLedger
+"""
+
+import gc
+import os
+import struct
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from src.ledger import BillLedger
+
+CREATE = 0
+ADD = 1
+PAY = 2
+LIMIT = 3
+
+# Operation, customer ID, amount (the limit for CREATE and LIMIT)
+RECORD = struct.Struct('<Bqd')
+SNAPSHOT_MAGIC = b'BLSN'
+SNAPSHOT_VERSION = 1
+# Magic, version, generation, number of bills
+SNAPSHOT_HEADER = struct.Struct('<4sHQQ')
+# Customer ID, debt, limit
+SNAPSHOT_RECORD = struct.Struct('<qdd')
+SNAPSHOT_FILE = 'snapshot.bin'
+READ_SIZE = RECORD.size * 65536
+
+
+def _journal_name(generation: int) -> str:
+    """
+    Get the file name of the journal of a generation.
+
+    Args:
+        generation (int): The generation.
+
+    Returns:
+        str: The file name.
+    """
+    return f'journal-{generation:08d}.bin'
+
+
+def _journal_generations(directory: str) -> List[int]:
+    """
+    Get the generations of the journal files in a directory.
+
+    Args:
+        directory (str): The directory.
+
+    Returns:
+        List[int]: The generations, in ascending order.
+    """
+    generations = []
+    for name in os.listdir(directory):
+        if name.startswith('journal-') and name.endswith('.bin'):
+            try:
+                generations.append(int(name[len('journal-'):-len('.bin')]))
+            except ValueError:
+                continue
+    return sorted(generations)
+
+
+class BillJournal:
+    """
+    The write-ahead journal of a ledger.
+
+    If a commit fails, the records stay pending and the commit thread retries them. Until
+    a commit succeeds, recording a change raises the error, so no change is accepted
+    that may never be written.
+
+    Attributes:
+        directory (str): The directory of the snapshot and journal files.
+        generation (int): The generation of the journal file being written.
+        commit_interval (float): The seconds between group commits.
+        sync (bool): Whether every commit is forced to disk with fsync.
+        ledger (Optional[BillLedger]): The ledger the commit thread takes snapshots of.
+        snapshot_records (Optional[int]): The number of records in the journal file after
+            which the commit thread takes a snapshot of the ledger, or None to leave
+            snapshots to the caller.
+    """
+
+    def __init__(self, directory: str, generation: int = 0,
+                 commit_interval: float = 0.005, sync: bool = True,
+                 ledger: Optional[BillLedger] = None, snapshot_records: Optional[int] = 1_000_000) -> None:
+        """
+        Initialize a BillJournal object and start its commit thread.
+
+        Args:
+            directory (str): The directory of the snapshot and journal files. It is created
+                if it does not exist.
+            generation (int, optional): The generation of the journal file to append to.
+                Defaults to 0.
+            commit_interval (float, optional): The seconds between group commits. Defaults to 0.005.
+            sync (bool, optional): Whether every commit is forced to disk with fsync. Defaults to True.
+            ledger (Optional[BillLedger], optional): The ledger to take snapshots of. Defaults
+                to None, which leaves snapshots to the caller.
+            snapshot_records (Optional[int], optional): The number of records in the journal
+                file after which a snapshot is taken. Defaults to 1000000.
+
+        Returns:
+            None
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.directory: str = directory
+        self.generation: int = generation
+        self.commit_interval: float = commit_interval
+        self.sync: bool = sync
+        self.ledger: Optional[BillLedger] = ledger
+        self.snapshot_records: Optional[int] = snapshot_records
+        self._pending: List[Tuple[int, int, float]] = []
+        self._accepting: bool = True
+        self._error: Optional[Exception] = None
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._file = open(os.path.join(directory, _journal_name(generation)), 'ab', buffering=0)
+        self._size: int = os.fstat(self._file.fileno()).st_size
+        self._closed = threading.Event()
+        self._committer = threading.Thread(target=self._commit_periodically, name='bill-journal', daemon=True)
+        self._committer.start()
+
+    def record(self, operation: int, customer_id: int, amount: float) -> None:
+        """
+        Record a change of a bill. The record is written with the next group commit.
+
+        Callers record changes while they hold the lock of the bill, and before they make
+        the change, so the records of a bill are in the order the changes were made and a
+        change that cannot be recorded is not made.
+
+        Args:
+            operation (int): CREATE, ADD, PAY or LIMIT.
+            customer_id (int): The ID of the customer of the bill.
+            amount (float): The amount, or the limit for CREATE and LIMIT.
+
+        Returns:
+            None
+
+        Raises:
+            ValueError: If the journal is closed.
+            OSError: The error of the last commit, if it failed.
+        """
+        with self._lock:
+            if not self._accepting:
+                raise ValueError("Journal is closed")
+            if self._error is not None:
+                raise self._error
+            self._pending.append((operation, customer_id, amount))
+
+    def created(self, customer_id: int, limit: float) -> None:
+        """
+        Record the creation of a bill with no debt.
+
+        Args:
+            customer_id (int): The ID of the customer of the bill.
+            limit (float): The limit of the bill.
+
+        Returns:
+            None
+        """
+        self.record(CREATE, customer_id, limit)
+
+    def added(self, customer_id: int, amount: float) -> None:
+        """
+        Record an accepted charge.
+
+        Args:
+            customer_id (int): The ID of the customer of the bill.
+            amount (float): The amount added to the debt.
+
+        Returns:
+            None
+        """
+        self.record(ADD, customer_id, amount)
+
+    def paid(self, customer_id: int, amount: float) -> None:
+        """
+        Record a payment.
+
+        Args:
+            customer_id (int): The ID of the customer of the bill.
+            amount (float): The amount paid.
+
+        Returns:
+            None
+        """
+        self.record(PAY, customer_id, amount)
+
+    def limit_changed(self, customer_id: int, limit: float) -> None:
+        """
+        Record a change of the limit.
+
+        Args:
+            customer_id (int): The ID of the customer of the bill.
+            limit (float): The new limit.
+
+        Returns:
+            None
+        """
+        self.record(LIMIT, customer_id, limit)
+
+    def commit(self) -> None:
+        """
+        Write all recorded changes to the journal file and force them to disk.
+
+        Returns:
+            None
+
+        Raises:
+            ValueError: If the journal is closed.
+            OSError: If the changes cannot be written. They stay pending and are written
+                by the next commit.
+        """
+        with self._write_lock:
+            if self._file is None:
+                raise ValueError("Journal is closed")
+            self._commit()
+
+    def _commit(self) -> None:
+        """
+        Write all recorded changes while the write lock is held, see `commit`.
+
+        Returns:
+            None
+
+        Raises:
+            OSError: If the changes cannot be written.
+        """
+        with self._lock:
+            pending, self._pending = self._pending, []
+        if not pending:
+            return
+        pack = RECORD.pack
+        data = memoryview(b''.join([pack(*change) for change in pending]))
+        try:
+            while data:
+                data = data[self._file.write(data):]
+            if self.sync:
+                os.fsync(self._file.fileno())
+        except Exception as error:
+            # Drop what was written of the batch, it is written again with the next commit
+            try:
+                os.ftruncate(self._file.fileno(), self._size)
+            except OSError:
+                pass
+            with self._lock:
+                self._pending[:0] = pending
+                self._error = error
+            raise
+        self._size += len(pending) * RECORD.size
+        with self._lock:
+            self._error = None
+
+    def _commit_periodically(self) -> None:
+        """
+        Commit the recorded changes every `commit_interval` seconds until the journal is
+        closed, and take a snapshot when the journal file has `snapshot_records` records.
+
+        A failed commit or snapshot does not stop the thread; the error is kept for
+        `record` and the commit is retried.
+
+        Returns:
+            None
+        """
+        while not self._closed.wait(self.commit_interval):
+            try:
+                self.commit()
+                if (self.ledger is not None and self.snapshot_records is not None
+                        and self._size >= self.snapshot_records * RECORD.size):
+                    self.snapshot(self.ledger)
+            except Exception as error:
+                with self._lock:
+                    self._error = error
+
+    def snapshot(self, ledger: BillLedger) -> None:
+        """
+        Write the state of all bills of a ledger to the snapshot file and delete the journal
+        files it covers.
+
+        The ledger is frozen only while the bills are read and the journal moves to the
+        next generation; the snapshot file is written afterwards.
+
+        Args:
+            ledger (BillLedger): The ledger this journal belongs to.
+
+        Returns:
+            None
+
+        Raises:
+            ValueError: If the journal is closed.
+            OSError: If the journal or the snapshot cannot be written.
+        """
+        with ledger.frozen() as bills:
+            state = [(bill.customer_id, bill.current_debt, bill.limiting_amount) for bill in bills]
+            # Nothing can be recorded while the ledger is frozen
+            with self._write_lock:
+                if self._file is None:
+                    raise ValueError("Journal is closed")
+                self._commit()
+                self._file.close()
+                self.generation += 1
+                self._file = open(os.path.join(self.directory, _journal_name(self.generation)), 'ab', buffering=0)
+                self._size = 0
+        generation = self.generation
+
+        path = os.path.join(self.directory, SNAPSHOT_FILE)
+        with open(path + '.tmp', 'wb') as file:
+            file.write(SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, generation, len(state)))
+            pack = SNAPSHOT_RECORD.pack
+            file.write(b''.join([pack(*bill) for bill in state]))
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(path + '.tmp', path)
+        for old in _journal_generations(self.directory):
+            if old < generation:
+                os.remove(os.path.join(self.directory, _journal_name(old)))
+
+    def close(self) -> None:
+        """
+        Commit the recorded changes, stop the commit thread and close the journal file.
+        Changes recorded after this raise ValueError.
+
+        Returns:
+            None
+
+        Raises:
+            OSError: If the recorded changes cannot be written. The journal is closed
+                nevertheless.
+        """
+        if self._closed.is_set():
+            return
+        self._closed.set()
+        self._committer.join()
+        with self._write_lock:
+            with self._lock:
+                self._accepting = False
+            try:
+                self._commit()
+            finally:
+                self._file.close()
+                self._file = None
+
+
+def replay(directory: str, ledger: BillLedger) -> int:
+    """
+    Load the snapshot and replay the journals of a directory into a ledger.
+
+    The cyclic garbage collector is paused meanwhile: the millions of objects created
+    by a replay contain no cycles, but would trigger collections over and over.
+
+    Args:
+        directory (str): The directory of the snapshot and journal files.
+        ledger (BillLedger): The ledger to restore the bills into, usually an empty one.
+
+    Returns:
+        int: The generation to continue the journal with.
+
+    Raises:
+        ValueError: If the snapshot file is not a valid snapshot.
+    """
+    collecting = gc.isenabled()
+    gc.disable()
+    try:
+        return _replay(directory, ledger)
+    finally:
+        if collecting:
+            gc.enable()
+
+
+def _replay(directory: str, ledger: BillLedger) -> int:
+    """
+    Load the snapshot and replay the journals of a directory into a ledger, see `replay`.
+
+    Args:
+        directory (str): The directory of the snapshot and journal files.
+        ledger (BillLedger): The ledger to restore the bills into.
+
+    Returns:
+        int: The generation to continue the journal with.
+
+    Raises:
+        ValueError: If the snapshot file is not a valid snapshot.
+    """
+    # Customer ID -> [debt, limit]
+    state: Dict[int, List[float]] = {}
+    generation = 0
+    path = os.path.join(directory, SNAPSHOT_FILE)
+    if os.path.exists(path):
+        with open(path, 'rb') as file:
+            magic, version, generation, count = SNAPSHOT_HEADER.unpack(file.read(SNAPSHOT_HEADER.size))
+            if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+                raise ValueError(f"{path} is not a bill snapshot")
+            data = file.read(count * SNAPSHOT_RECORD.size)
+            if len(data) != count * SNAPSHOT_RECORD.size:
+                raise ValueError(f"{path} is truncated")
+            state = {customer_id: [debt, limit] for customer_id, debt, limit in SNAPSHOT_RECORD.iter_unpack(data)}
+
+    journals = [old for old in _journal_generations(directory) if old >= generation] if os.path.isdir(directory) else []
+    for old in journals:
+        journal_path = os.path.join(directory, _journal_name(old))
+        with open(journal_path, 'rb') as file:
+            while True:
+                data = file.read(READ_SIZE)
+                # A record cut off by a crash ends the journal
+                data = data[:len(data) - len(data) % RECORD.size]
+                if not data:
+                    break
+                for operation, customer_id, amount in RECORD.iter_unpack(data):
+                    if operation == ADD:
+                        state[customer_id][0] += amount
+                    elif operation == PAY:
+                        bill = state[customer_id]
+                        bill[0] = max(0.0, bill[0] - amount)
+                    elif operation == LIMIT:
+                        state[customer_id][1] = amount
+                    elif operation == CREATE:
+                        state[customer_id] = [0.0, amount]
+        valid_size = os.path.getsize(journal_path) // RECORD.size * RECORD.size
+        if valid_size != os.path.getsize(journal_path):
+            os.truncate(journal_path, valid_size)
+
+    ledger.restore_many((customer_id, debt, limit) for customer_id, (debt, limit) in state.items())
+    return max(journals + [generation])
+
+
+def open_ledger(directory: str, shard_count: int = 16, commit_interval: float = 0.005,
+                sync: bool = True, snapshot_records: Optional[int] = 1_000_000) -> BillLedger:
+    """
+    Restore a ledger from a journal directory and journal all further changes to it.
+
+    Args:
+        directory (str): The directory of the snapshot and journal files. It is created if
+            it does not exist.
+        shard_count (int, optional): The number of shards of the ledger. Defaults to 16.
+        commit_interval (float, optional): The seconds between group commits. Defaults to 0.005.
+        sync (bool, optional): Whether every commit is forced to disk with fsync. Defaults to True.
+        snapshot_records (Optional[int], optional): The number of journal records after which
+            a snapshot is taken, or None to leave snapshots to the caller. Defaults to 1000000.
+
+    Returns:
+        BillLedger: The restored ledger, with its journal in `ledger.journal`.
+    """
+    ledger = BillLedger(shard_count)
+    generation = replay(directory, ledger)
+    journal = BillJournal(directory, generation, commit_interval, sync, ledger, snapshot_records)
+    with ledger.frozen() as bills:
+        ledger.journal = journal
+        for bill in bills:
+            bill.journal = journal
+    return ledger
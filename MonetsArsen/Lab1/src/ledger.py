@@ -0,0 +1,287 @@
+"""
+Bill Ledger Module
+
+This module defines the BillLedger class, which holds the bills of an operator so they
+can be used from several threads at once. The bills are split into shards by customer ID
+and every shard has its own lock. Bills created by the ledger use the lock of their shard,
+so checking the limit and changing the debt happen atomically, and threads working on
+customers in different shards do not wait for each other.
+
+The ledger can be used like the dictionary of bills it replaces: `customer_id in ledger`,
+`ledger[customer_id]`, `ledger.get(customer_id)`, iteration over the customer IDs and
+`len(ledger)`.
+
+A ledger with a journal (see src.journal) attaches it to every bill it holds, so all
+changes of its bills are recorded.
+
+Classes:
+    BillLedger: A sharded, thread-safe collection of bills keyed by customer ID.
+
+Dependencies:
+    - src.bill.Bill
+"""
+
+import threading
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from src.bill import Bill
+
+if TYPE_CHECKING:
+    from src.journal import BillJournal
+
+
+class BillLedger:
+    """
+    A sharded, thread-safe collection of bills keyed by customer ID.
+
+    Attributes:
+        shard_count (int): The number of shards.
+        journal (Optional[BillJournal]): The journal the changes of the bills are recorded in.
+    """
+
+    def __init__(self, shard_count: int = 16, journal: Optional['BillJournal'] = None) -> None:
+        """
+        Initialize an empty BillLedger object.
+
+        Args:
+            shard_count (int, optional): The number of shards. Defaults to 16.
+            journal (Optional[BillJournal], optional): The journal to record the changes of
+                the bills in. Defaults to None.
+
+        Returns:
+            None
+
+        Raises:
+            ValueError: If the shard count is not positive.
+        """
+        if shard_count < 1:
+            raise ValueError("Shard count must be positive")
+        self.shard_count: int = shard_count
+        self._locks: List[threading.Lock] = [threading.Lock() for _ in range(shard_count)]
+        self._bills: List[Dict[int, Bill]] = [{} for _ in range(shard_count)]
+        self.journal: Optional['BillJournal'] = journal
+
+    def shard_of(self, customer_id: int) -> int:
+        """
+        Get the shard of a customer.
+
+        Args:
+            customer_id (int): The ID of the customer.
+
+        Returns:
+            int: The index of the shard.
+        """
+        return hash(customer_id) % self.shard_count
+
+    def __contains__(self, customer_id: object) -> bool:
+        """
+        Check if a customer has a bill.
+
+        Args:
+            customer_id (int): The ID of the customer.
+
+        Returns:
+            bool: True if the customer has a bill, False otherwise.
+        """
+        return customer_id in self._bills[hash(customer_id) % self.shard_count]
+
+    def __getitem__(self, customer_id: int) -> Bill:
+        """
+        Get the bill of a customer.
+
+        Args:
+            customer_id (int): The ID of the customer.
+
+        Returns:
+            Bill: The bill.
+
+        Raises:
+            KeyError: If the customer does not have a bill.
+        """
+        return self._bills[hash(customer_id) % self.shard_count][customer_id]
+
+    def __setitem__(self, customer_id: int, bill: Bill) -> None:
+        """
+        Put a bill into the ledger, replacing the customer's previous bill.
+
+        Bills created outside the ledger keep their own lock. With a journal, the bill is
+        recorded as created with its current limit and debt.
+
+        Args:
+            customer_id (int): The ID of the customer.
+            bill (Bill): The bill.
+
+        Returns:
+            None
+        """
+        shard = self.shard_of(customer_id)
+        with self._locks[shard]:
+            if self.journal is not None:
+                # A bill of this shard is already guarded by the held lock
+                own_lock = bill._lock if bill._lock is not self._locks[shard] else None
+                if own_lock is not None:
+                    own_lock.acquire()
+                try:
+                    self.journal.created(customer_id, bill.limiting_amount)
+                    if bill.current_debt:
+                        self.journal.added(customer_id, bill.current_debt)
+                    bill.journal = self.journal
+                finally:
+                    if own_lock is not None:
+                        own_lock.release()
+            self._bills[shard][customer_id] = bill
+
+    def get(self, customer_id: int, default: Optional[Bill] = None) -> Optional[Bill]:
+        """
+        Get the bill of a customer, or a default if the customer does not have one.
+
+        Args:
+            customer_id (int): The ID of the customer.
+            default (Optional[Bill], optional): The value to return if there is no bill. Defaults to None.
+
+        Returns:
+            Optional[Bill]: The bill or the default.
+        """
+        return self._bills[hash(customer_id) % self.shard_count].get(customer_id, default)
+
+    def get_or_create(self, customer_id: int,
+                      factory: Optional[Callable[..., Bill]] = None) -> Tuple[Bill, bool]:
+        """
+        Get the bill of a customer, creating it if the customer does not have one yet.
+
+        The lookup and the creation happen under the lock of the shard, so concurrent
+        callers get the same bill.
+
+        Args:
+            customer_id (int): The ID of the customer.
+            factory (Optional[Callable[..., Bill]], optional): Creates the bill from the
+                customer ID and the `lock` keyword argument. Defaults to None, which
+                creates a Bill with the default limit.
+
+        Returns:
+            Tuple[Bill, bool]: The bill and True if it was created by this call.
+        """
+        shard = self.shard_of(customer_id)
+        bills = self._bills[shard]
+        # Dictionary lookups are atomic, so existing bills are found without the lock
+        bill = bills.get(customer_id)
+        if bill is not None:
+            return bill, False
+        with self._locks[shard]:
+            bill = bills.get(customer_id)
+            if bill is not None:
+                return bill, False
+            bill = (factory or Bill)(customer_id, lock=self._locks[shard])
+            if self.journal is not None:
+                self.journal.created(customer_id, bill.limiting_amount)
+                bill.journal = self.journal
+            bills[customer_id] = bill
+            return bill, True
+
+    def restore(self, customer_id: int, current_debt: float, limiting_amount: float) -> Bill:
+        """
+        Put a bill with a known state into the ledger without recording it in the journal,
+        e.g. when the ledger is rebuilt from its journal.
+
+        Args:
+            customer_id (int): The ID of the customer.
+            current_debt (float): The debt of the bill.
+            limiting_amount (float): The limit of the bill.
+
+        Returns:
+            Bill: The restored bill.
+        """
+        shard = self.shard_of(customer_id)
+        bill = Bill(customer_id, limiting_amount, lock=self._locks[shard], journal=self.journal)
+        bill.current_debt = current_debt
+        with self._locks[shard]:
+            self._bills[shard][customer_id] = bill
+        return bill
+
+    def restore_many(self, bills: Iterable[Tuple[int, float, float]]) -> None:
+        """
+        Put many bills with a known state into the ledger at once, see `restore`.
+
+        Args:
+            bills (Iterable[Tuple[int, float, float]]): The customer ID, debt and limit of
+                every bill.
+
+        Returns:
+            None
+        """
+        by_shard: List[List[Tuple[int, float, float]]] = [[] for _ in range(self.shard_count)]
+        shard_count = self.shard_count
+        for bill in bills:
+            by_shard[hash(bill[0]) % shard_count].append(bill)
+        for shard, states in enumerate(by_shard):
+            lock, journal = self._locks[shard], self.journal
+            restored = {}
+            for customer_id, current_debt, limiting_amount in states:
+                bill = Bill(customer_id, limiting_amount, lock=lock, journal=journal)
+                bill.current_debt = current_debt
+                restored[customer_id] = bill
+            with lock:
+                self._bills[shard].update(restored)
+
+    @contextmanager
+    def frozen(self) -> Iterator[List[Bill]]:
+        """
+        Hold the locks of all shards, so no bill of the ledger changes and no bill is added.
+
+        Bills put into the ledger with `ledger[customer_id] = bill` keep their own lock and
+        are not frozen.
+
+        Yields:
+            List[Bill]: All bills of the ledger.
+        """
+        for lock in self._locks:
+            lock.acquire()
+        try:
+            yield [bill for bills in self._bills for bill in bills.values()]
+        finally:
+            for lock in reversed(self._locks):
+                lock.release()
+
+    def __iter__(self) -> Iterator[int]:
+        """
+        Iterate over the customer IDs that have a bill.
+
+        Returns:
+            Iterator[int]: The customer IDs, shard by shard.
+        """
+        for shard in range(self.shard_count):
+            with self._locks[shard]:
+                customer_ids = list(self._bills[shard])
+            yield from customer_ids
+
+    def __len__(self) -> int:
+        """
+        Get the number of bills.
+
+        Returns:
+            int: The number of bills.
+        """
+        return sum(len(bills) for bills in self._bills)
+
+    def items(self) -> Iterator[Tuple[int, Bill]]:
+        """
+        Iterate over the customer IDs and their bills.
+
+        Returns:
+            Iterator[Tuple[int, Bill]]: The customer IDs and bills, shard by shard.
+        """
+        for shard in range(self.shard_count):
+            with self._locks[shard]:
+                items = list(self._bills[shard].items())
+            yield from items
+
+    def values(self) -> Iterator[Bill]:
+        """
+        Iterate over the bills.
+
+        Returns:
+            Iterator[Bill]: The bills, shard by shard.
+        """
+        for _, bill in self.items():
+            yield bill
@@ -11,12 +11,28 @@ Classes:
 Dependencies:
     - src.customer.Customer
     - src.operator.Operator
+    - src.rating
+    - src.ingest
+    - src.events
+    - src.ledger.BillLedger
+    - src.journal
 """
 
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
 from typing import List
 
 from src.customer import Customer
 from src.operator import Operator
+from src.rating import MESSAGE, NETWORK, NO_PEER, TALK, rate_batch
+from src.ingest import ingest
+from src.events import AsyncFileSink, Event, MemorySink, NullSink, set_sink
+from src.ledger import BillLedger
+from src.journal import open_ledger
 
 
 class Main:
@@ -141,6 +157,300 @@ class Main:
               customers_with_different_and_same_operators[0].get_bill(operator_id).current_debt)
         print("Message discount test completed successfully.\n")
 
+    def test_batch_rating(self):
+        """Test that rating a batch of events gives the same bills as rating them one by one."""
+        operators = [Operator(identifier=0, message_cost=2, talking_charge=10, network_charge=1, discount_rate=0.5),
+                     Operator(identifier=1, message_cost=1.5, talking_charge=8, network_charge=1.2, discount_rate=0.4)]
+        customers = [Customer(identifier=0, first_name="Alice", last_name="Johnson", age=29, operators=operators),
+                     Customer(identifier=1, first_name="Linda", last_name="Johnson", age=14, operators=operators),
+                     Customer(identifier=2, first_name="Tom", last_name="Smith", age=75, operators=operators)]
+        events = [(0, 0, TALK, 5, 1), (1, 0, TALK, 5, 0), (2, 1, MESSAGE, 4, 0), (0, 1, MESSAGE, 4, 2),
+                  (1, 0, NETWORK, 30, NO_PEER), (0, 0, TALK, 6, 2), (2, 1, NETWORK, 20, NO_PEER)]
+        result = rate_batch(operators, customers, *zip(*events))
+        assert list(result.accepted) == [True, True, True, True, True, False, True], "Wrong events were rejected"
+
+        expected = {(0, 0): 50.0, (0, 1): 55.0, (1, 2): 30.0, (1, 0): 3.6}
+        for (operator_id, customer_id), debt in expected.items():
+            bill = operators[operator_id].get_bill(customer_id)
+            assert abs(bill.current_debt - debt) < 1e-9, f"Wrong debt {bill.current_debt} instead of {debt}"
+        assert operators[0].get_bill(0).is_reached_limit(), "Rejected call did not reach the limit"
+        print("Batch rating test completed successfully.\n")
+
+    def test_cdr_ingestion(self):
+        """Test rating call-detail records read from CSV and JSON Lines files."""
+        operators = [Operator(identifier=0, message_cost=2, talking_charge=10, network_charge=1, discount_rate=0.5)]
+        customers = [Customer(identifier=0, first_name="Alice", last_name="Johnson", age=29, operators=operators),
+                     Customer(identifier=1, first_name="Bob", last_name="Smith", age=34, operators=operators)]
+        with tempfile.TemporaryDirectory() as directory:
+            csv_path = os.path.join(directory, "cdr.csv")
+            with open(csv_path, "w") as file:
+                file.write("customer_id,operator_id,kind,quantity,peer_id\n"
+                           "0,0,talk,2,1\n"
+                           "1,0,message,3,0\n"
+                           "0,0,fax,1,1\n"
+                           "1,5,network,10,\n")
+            jsonl_path = os.path.join(directory, "cdr.jsonl")
+            with open(jsonl_path, "w") as file:
+                for record in [{"customer_id": 0, "operator_id": 0, "kind": "network", "quantity": 30},
+                               {"customer_id": 1, "operator_id": 0, "kind": "talk", "quantity": 20, "peer_id": 0},
+                               {"customer_id": 2, "operator_id": 0, "kind": "talk", "quantity": 1, "peer_id": 0}]:
+                    file.write(json.dumps(record) + "\n")
+                file.write("not json\n")
+
+            report = ingest([csv_path, jsonl_path], operators, customers, chunk_size=2)
+            assert (report.records, report.rated, report.rejected, report.invalid) == (8, 3, 1, 4), report
+            assert operators[0].get_bill(0).current_debt == 50, "Wrong debt from CDR files"
+            assert operators[0].get_bill(1).current_debt == 3, "Wrong debt from CDR files"
+            for error in report.errors:
+                print(error)
+        print("CDR ingestion test completed successfully.\n")
+
+    def test_event_sinks(self):
+        """Test that billing events go to the current sink instead of the console."""
+        operators = [Operator(identifier=0, message_cost=2, talking_charge=10, network_charge=1, discount_rate=0.5)]
+        alice = Customer(identifier=0, first_name="Alice", last_name="Johnson", age=29, operators=operators)
+        bob = Customer(identifier=1, first_name="Bob", last_name="Smith", age=34, operators=operators)
+
+        sink = MemorySink()
+        previous = set_sink(sink)
+        try:
+            alice.talk(8, bob, 0)
+            alice.talk(8, bob, 0)
+            alice.get_bill(0).change_limit(200)
+            assert sink.names() == ["bill_created", "call", "limit_exceeded", "limit_changed"], sink.names()
+            assert sink.events[2].format() == "Current limit 100 has been exceeded by 60.0"
+
+            set_sink(NullSink())
+            alice.connection(10, 0)
+            set_sink(None)
+            alice.connection(10, 0)
+            assert len(sink.events) == 4, "Events were sent to a replaced sink"
+
+            with tempfile.TemporaryDirectory() as directory:
+                path = os.path.join(directory, "events.jsonl")
+                file_sink = AsyncFileSink(path, batch_size=2)
+                set_sink(file_sink)
+                try:
+                    bob.message(3, alice, 0)
+                    bob.connection(5, 0)
+                finally:
+                    file_sink.close()
+                with open(path) as file:
+                    written = [json.loads(line) for line in file]
+            assert [event["event"] for event in written] == ["bill_created", "message", "network"], written
+            assert written[1]["peer_id"] == 0 and written[1]["quantity"] == 3
+        finally:
+            set_sink(previous)
+        print("Event sink test completed successfully.\n")
+
+    def test_event_sink_write_errors(self):
+        """Test that a failed write of the file sink is raised to the caller instead of blocking it."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "events.jsonl")
+            file_sink = AsyncFileSink(path, batch_size=1, max_pending=1)
+            # The writer cannot encode this event
+            file_sink.emit(Event("call", {"customer_id": object()}))
+            try:
+                file_sink.flush()
+            except TypeError:
+                pass
+            else:
+                raise AssertionError("The failed write was not raised")
+            for customer_id in range(3):
+                file_sink.emit(Event("call", {"customer_id": customer_id}))
+            file_sink.close()
+            with open(path) as file:
+                written = [json.loads(line) for line in file]
+            assert [event["customer_id"] for event in written] == [0, 1, 2], written
+        print("Event sink write error test completed successfully.\n")
+
+    def test_event_sink_concurrent_close(self):
+        """Test that every event the file sink accepted is written when it is closed while events are emitted."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "events.jsonl")
+            file_sink = AsyncFileSink(path, batch_size=1, max_pending=1)
+            accepted: List[List[int]] = [[] for _ in range(4)]
+
+            def emit_events(thread: int) -> None:
+                for number in range(100000):
+                    try:
+                        file_sink.emit(Event("call", {"thread": thread, "number": number}))
+                    except ValueError:
+                        return
+                    accepted[thread].append(number)
+
+            threads = [threading.Thread(target=emit_events, args=(thread,)) for thread in range(4)]
+            for thread in threads:
+                thread.start()
+            while not all(accepted):
+                time.sleep(0.001)
+            file_sink.close()
+            for thread in threads:
+                thread.join()
+            with open(path) as file:
+                written = [json.loads(line) for line in file]
+            for thread in range(4):
+                numbers = [event["number"] for event in written if event["thread"] == thread]
+                assert numbers == accepted[thread], f"Thread {thread} lost {len(accepted[thread]) - len(numbers)} events"
+        print("Event sink concurrent close test completed successfully.\n")
+
+    def test_concurrent_bills(self):
+        """Test that bills charged from several threads never exceed their limits."""
+        operator = Operator(identifier=0, message_cost=2, talking_charge=10, network_charge=1, discount_rate=0.5,
+                            ledger=BillLedger(shard_count=4))
+        customers = [Customer(identifier=i, first_name=f"Customer {i}", last_name="Smith", age=30,
+                              operators=[operator]) for i in range(8)]
+        start = threading.Barrier(8)
+
+        def charge(worker: int) -> None:
+            start.wait()
+            for _ in range(40):
+                for customer in customers:
+                    operator.calculate_network_cost(1, customer)
+                rate_batch([operator], customers, [worker] * 5, [0] * 5, [NETWORK] * 5, [1] * 5)
+
+        previous_sink = set_sink(None)
+        switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        try:
+            threads = [threading.Thread(target=charge, args=(worker,)) for worker in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            sys.setswitchinterval(switch_interval)
+            set_sink(previous_sink)
+
+        assert len(operator.customer_bills) == 8, "Concurrent callers created duplicate bills"
+        for customer in customers:
+            assert operator.get_bill(customer.id).current_debt == 100, "Limit was exceeded under concurrency"
+        print("Concurrent bills test completed successfully.\n")
+
+    def test_billing_journal(self):
+        """Test that bills survive a restart through the journal and its snapshots."""
+        previous_sink = set_sink(None)
+        journals = []
+        with tempfile.TemporaryDirectory() as directory:
+            try:
+                ledger = open_ledger(directory, shard_count=4, sync=False)
+                journals.append(ledger.journal)
+                operator = Operator(identifier=0, message_cost=2, talking_charge=10, network_charge=1,
+                                    discount_rate=0.5, ledger=ledger)
+                customers = [Customer(identifier=i, first_name=f"Customer {i}", last_name="Smith", age=30,
+                                      operators=[operator]) for i in range(3)]
+                customers[0].connection(40, 0)
+                customers[1].connection(30, 0)
+                ledger.journal.snapshot(ledger)
+                customers[0].connection(70, 0)  # Rejected by the limit
+                operator.get_bill(0).pay(15)
+                operator.get_bill(1).change_limit(200)
+                customers[1].connection(120, 0)
+                rate_batch([operator], customers, [2, 2], [0, 0], [NETWORK, NETWORK], [5, 6])
+                ledger.journal.close()
+                # A record cut off by a crash is ignored
+                with open(os.path.join(directory, "journal-00000001.bin"), "ab") as file:
+                    file.write(b"\x01\x02")
+
+                restored = open_ledger(directory, shard_count=4, sync=False)
+                journals.append(restored.journal)
+                state = {customer_id: (bill.current_debt, bill.limiting_amount)
+                         for customer_id, bill in restored.items()}
+                assert state == {0: (25, 100), 1: (150, 200), 2: (11, 100)}, state
+                restored[2].add(4)
+                restored.journal.close()
+                restored = open_ledger(directory, shard_count=4, sync=False)
+                journals.append(restored.journal)
+                assert restored[2].current_debt == 15
+                restored.journal.close()
+            finally:
+                # The journal files are removed with the directory, so close them first
+                for journal in journals:
+                    journal.close()
+                set_sink(previous_sink)
+        print("Billing journal test completed successfully.\n")
+
+    def test_billing_journal_failures(self):
+        """Test that the journal keeps changes it could not write and rejects changes after it is closed."""
+
+        class FailingFile:
+            """A journal file whose writes fail while `failing` is set."""
+
+            def __init__(self, file):
+                self.file = file
+                self.failing = True
+
+            def write(self, data):
+                if self.failing:
+                    raise OSError("No space left on device")
+                return self.file.write(data)
+
+            def fileno(self):
+                return self.file.fileno()
+
+            def close(self):
+                self.file.close()
+
+        previous_sink = set_sink(None)
+        journals = []
+        with tempfile.TemporaryDirectory() as directory:
+            try:
+                ledger = open_ledger(directory, shard_count=4, sync=False)
+                journals.append(ledger.journal)
+                bill, _ = ledger.get_or_create(0)
+                bill.add(10)
+                ledger.journal.commit()
+                with ledger.journal._write_lock:
+                    failing = ledger.journal._file = FailingFile(ledger.journal._file)
+                bill.add(5)
+                try:
+                    ledger.journal.commit()
+                except OSError:
+                    pass
+                else:
+                    raise AssertionError("The failed write was not raised")
+                try:
+                    bill.add(1)
+                except OSError:
+                    pass
+                else:
+                    raise AssertionError("A change was accepted while the journal cannot write")
+                assert bill.current_debt == 15 and ledger.journal._committer.is_alive()
+                failing.failing = False
+                ledger.journal.commit()
+                bill.add(1)
+                ledger.journal.close()
+                try:
+                    bill.add(20)
+                except ValueError:
+                    pass
+                else:
+                    raise AssertionError("A change was accepted after the journal was closed")
+                restored = open_ledger(directory, shard_count=4, sync=False)
+                journals.append(restored.journal)
+                assert restored[0].current_debt == bill.current_debt == 16, restored[0].current_debt
+                restored.journal.close()
+
+                # The commit thread takes a snapshot once the journal has enough records
+                ledger = open_ledger(directory, shard_count=4, commit_interval=0.001, sync=False, snapshot_records=10)
+                journals.append(ledger.journal)
+                for customer_id in range(1, 21):
+                    ledger.get_or_create(customer_id)[0].add(customer_id)
+                deadline = time.monotonic() + 5
+                while ledger.journal.generation < 1 and time.monotonic() < deadline:
+                    time.sleep(0.001)
+                assert ledger.journal.generation >= 1, "No snapshot was taken"
+                ledger.journal.close()
+                restored = open_ledger(directory, shard_count=4, sync=False)
+                journals.append(restored.journal)
+                state = {customer_id: bill.current_debt for customer_id, bill in restored.items()}
+                assert state == {customer_id: customer_id or 16 for customer_id in range(21)}, state
+            finally:
+                for journal in journals:
+                    journal.close()
+                set_sink(previous_sink)
+        print("Billing journal failure test completed successfully.\n")
+
 
 def run_tests():
     """Run all tests in the test suite."""
@@ -151,6 +461,14 @@ def run_tests():
     test_suite.test_reaching_and_changing_limit()
     test_suite.test_people_with_different_age()
     test_suite.test_message_discount()
+    test_suite.test_batch_rating()
+    test_suite.test_cdr_ingestion()
+    test_suite.test_event_sinks()
+    test_suite.test_event_sink_write_errors()
+    test_suite.test_event_sink_concurrent_close()
+    test_suite.test_concurrent_bills()
+    test_suite.test_billing_journal()
+    test_suite.test_billing_journal_failures()
 
 
 if __name__ == "__main__":
@@ -10,12 +10,16 @@ Classes:
 
 Dependencies:
     - src.bill.Bill
+    - src.events
+    - src.ledger.BillLedger
     - customer.Customer (for type checking)
 """
 
-from typing import TYPE_CHECKING, Dict
+from typing import TYPE_CHECKING, Optional
 
+from src import events
 from src.bill import Bill
+from src.ledger import BillLedger
 
 if TYPE_CHECKING:
     from customer import Customer
@@ -34,12 +38,12 @@ class Operator:
         talking_charge (float): Charge per minute of talking.
         network_charge (float): Charge per unit of network usage.
         discount_rate (float): Discount rate applied to certain customers or services.
-        customer_bills (Dict[int, Bill]): Dictionary of customer bills, keyed by customer ID.
+        customer_bills (BillLedger): Customer bills, keyed by customer ID.
     """
 
     def __init__(self, identifier: int, message_cost: float,
                  talking_charge: float, network_charge: float,
-                 discount_rate: float) -> None:
+                 discount_rate: float, ledger: Optional[BillLedger] = None) -> None:
         """
         Initialize an Operator object.
 
@@ -49,6 +53,8 @@ class Operator:
             talking_charge (float): Charge per minute of talking.
             network_charge (float): Charge per unit of network usage.
             discount_rate (float): Discount rate applied to certain customers or services.
+            ledger (Optional[BillLedger]): The ledger to keep the bills in. Defaults to None,
+                which creates a ledger with 16 shards.
 
         Returns:
             None
@@ -58,7 +64,7 @@ class Operator:
         self.talking_charge: float = talking_charge
         self.network_charge: float = network_charge
         self.discount_rate: float = discount_rate
-        self.customer_bills: Dict[int, Bill] = {}
+        self.customer_bills: BillLedger = ledger if ledger is not None else BillLedger()
 
     def _check_if_customer_has_bill(self, customer_id: int) -> bool:
         """
@@ -149,10 +155,24 @@ class Operator:
         Returns:
             None
         """
-        if self._check_if_customer_has_bill(customer_id=customer.id):
-            self.customer_bills[customer.id].add(cost)
-        else:
-            bill = Bill(customer_id=customer.id)
-            self.customer_bills[customer.id] = bill
-            print(f"New bill for customer {customer.first_name} is created")
-            bill.add(cost)
\ No newline at end of file
+        self.get_or_create_bill(customer).add(cost)
+
+    def get_or_create_bill(self, customer: 'Customer') -> Bill:
+        """
+        Retrieve a customer's bill, creating an empty one if the customer has none yet.
+
+        Concurrent callers get the same bill.
+
+        Args:
+            customer (Customer): The customer whose bill to retrieve.
+
+        Returns:
+            Bill: The customer's bill.
+
+        Emits:
+            'bill_created' with the operator and the customer, if the bill is new.
+        """
+        bill, created = self.customer_bills.get_or_create(customer.id)
+        if created:
+            events.emit('bill_created', operator_id=self.id, customer_id=customer.id, first_name=customer.first_name)
+        return bill
\ No newline at end of file
@@ -0,0 +1,325 @@
+"""
+Batch Rating Module
+
+This module rates usage events in bulk. The events are given as columns (customer IDs,
+operator IDs, kinds, quantities and peer IDs), the charges and discounts of all events
+are computed at once with NumPy, and the costs are folded into the bills with one
+grouped reduction per (operator, customer) pair instead of one `Bill.add` per event.
+
+The result is the same as rating the events one by one, in order, through
+`Customer.talk`, `Customer.message` and `Customer.connection`:
+    - calls are discounted for customers under 18 or over 65 years old,
+    - messages are discounted if the recipient has a bill with the operator, either
+      from before the batch or from an earlier event of the batch,
+    - a cost that would exceed the limit of the bill is rejected.
+A group whose total fits under the limit of its bill is added in a single step. Only the
+groups that reach the limit are replayed event by event, so rejections are the same as
+with sequential rating. Grouped totals are summed before they are added, so debts can
+differ from sequential rating in the last bits of the floating point value.
+
+Without NumPy the events are rated in a plain Python loop with the same result.
+
+Classes:
+    RatingResult: The costs of rated events and whether they were added to the bills.
+
+Functions:
+    index_by_id: Indexes operators or customers by their IDs.
+    rate_batch: Rates a batch of usage events.
+
+Dependencies:
+    - src.operator.Operator (for type checking)
+    - src.customer.Customer (for type checking)
+    - numpy (optional)
+"""
+
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, List, Mapping, NamedTuple, Optional, Sequence, Tuple, Union
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+if TYPE_CHECKING:
+    from src.customer import Customer
+    from src.operator import Operator
+
+TALK = 0
+MESSAGE = 1
+NETWORK = 2
+KINDS = {'talk': TALK, 'message': MESSAGE, 'network': NETWORK}
+NO_PEER = -1
+
+
+class RatingResult(NamedTuple):
+    """
+    The costs of rated events and whether they were added to the bills.
+
+    Attributes:
+        costs (Sequence[float]): The cost of every event, after discounts.
+        accepted (Sequence[bool]): False for the events rejected by the limit of a bill.
+    """
+
+    costs: Sequence[float]
+    accepted: Sequence[bool]
+
+    @property
+    def accepted_count(self) -> int:
+        """The number of events added to the bills."""
+        if isinstance(self.accepted, list):
+            return self.accepted.count(True)
+        return int(np.count_nonzero(self.accepted))
+
+
+def index_by_id(objects: Union[Mapping[int, object], Iterable[object]]) -> Mapping[int, object]:
+    """
+    Index operators or customers by their IDs.
+
+    Args:
+        objects (Union[Mapping[int, object], Iterable[object]]): The objects, or a mapping
+            of them by ID.
+
+    Returns:
+        Mapping[int, object]: The objects by ID.
+    """
+    if isinstance(objects, Mapping):
+        return objects
+    return {obj.id: obj for obj in objects}
+
+
+def _kind_code(kind: Union[int, str]) -> int:
+    """
+    Get the code of an event kind.
+
+    Args:
+        kind (Union[int, str]): TALK, MESSAGE, NETWORK or one of the names in KINDS.
+
+    Returns:
+        int: The code of the kind.
+
+    Raises:
+        ValueError: If the kind is unknown.
+    """
+    code = KINDS.get(kind, kind) if isinstance(kind, str) else kind
+    if code not in (TALK, MESSAGE, NETWORK):
+        raise ValueError(f"Unknown event kind {kind!r}")
+    return code
+
+
+def rate_batch(operators: Union[Mapping[int, 'Operator'], Iterable['Operator']],
+               customers: Union[Mapping[int, 'Customer'], Iterable['Customer']],
+               customer_ids: Sequence[int], operator_ids: Sequence[int],
+               kinds: Sequence[Union[int, str]], quantities: Sequence[float],
+               peer_ids: Optional[Sequence[int]] = None) -> RatingResult:
+    """
+    Rate a batch of usage events and add their costs to the customers' bills.
+
+    Args:
+        operators (Union[Mapping[int, Operator], Iterable[Operator]]): The operators, or a
+            mapping of them by ID.
+        customers (Union[Mapping[int, Customer], Iterable[Customer]]): The customers who
+            made the events, or a mapping of them by ID.
+        customer_ids (Sequence[int]): The ID of the customer of every event.
+        operator_ids (Sequence[int]): The ID of the operator of every event.
+        kinds (Sequence[Union[int, str]]): The kind of every event: TALK, MESSAGE or NETWORK.
+        quantities (Sequence[float]): Minutes, messages or megabytes of every event.
+        peer_ids (Optional[Sequence[int]]): The ID of the other customer of every event,
+            NO_PEER for network usage. Only used for messages. Defaults to None (no peers).
+
+    Returns:
+        RatingResult: The costs of the events and whether they were added to the bills,
+        as NumPy arrays if NumPy is available and as lists otherwise.
+
+    Raises:
+        ValueError: If the columns have different lengths or an event kind is unknown.
+        KeyError: If an operator or customer ID is unknown.
+    """
+    operators = index_by_id(operators)
+    customers = index_by_id(customers)
+    if peer_ids is None:
+        peer_ids = [NO_PEER] * len(customer_ids)
+    if not len(customer_ids) == len(operator_ids) == len(kinds) == len(quantities) == len(peer_ids):
+        raise ValueError("All event columns must have the same length")
+    if np is not None:
+        costs, groups = _rate_numpy(operators, customers, customer_ids, operator_ids, kinds, quantities, peer_ids)
+    else:
+        costs, groups = _rate_python(operators, customers, customer_ids, operator_ids, kinds, quantities, peer_ids)
+    return RatingResult(costs, _fold(operators, customers, costs, groups))
+
+
+# A group is ((operator ID, customer ID), total cost, has negative costs, event indices).
+# The event indices are only needed for groups that reach the limit, so they are computed
+# on demand.
+Group = Tuple[Tuple[int, int], float, bool, Callable[[], Sequence[int]]]
+
+
+def _rate_python(operators: Mapping[int, 'Operator'], customers: Mapping[int, 'Customer'],
+                 customer_ids: Sequence[int], operator_ids: Sequence[int],
+                 kinds: Sequence[Union[int, str]], quantities: Sequence[float],
+                 peer_ids: Sequence[int]) -> Tuple[List[float], List[Group]]:
+    """
+    Compute the costs of the events and group them by bill in a Python loop.
+
+    Args:
+        operators (Mapping[int, Operator]): The operators by ID.
+        customers (Mapping[int, Customer]): The customers by ID.
+        customer_ids, operator_ids, kinds, quantities, peer_ids: The event columns.
+
+    Returns:
+        Tuple[List[float], List[Group]]: The costs and the groups, in order of their first event.
+    """
+    costs: List[float] = []
+    indices: Dict[Tuple[int, int], List[int]] = {}
+    for index, (customer_id, operator_id, kind, quantity, peer_id) in enumerate(
+            zip(customer_ids, operator_ids, kinds, quantities, peer_ids)):
+        operator = operators[operator_id]
+        kind = _kind_code(kind)
+        if kind == TALK:
+            cost = operator.talking_charge * quantity
+            age = customers[customer_id].age
+            if age < 18 or age > 65:
+                cost *= (1 - operator.discount_rate)
+        elif kind == MESSAGE:
+            cost = operator.message_cost * quantity
+            if (operator_id, peer_id) in indices or peer_id in operator.customer_bills:
+                cost *= (1 - operator.discount_rate)
+        else:
+            cost = operator.network_charge * quantity
+        costs.append(cost)
+        indices.setdefault((operator_id, customer_id), []).append(index)
+
+    groups = [(key, sum(costs[index] for index in group), any(costs[index] < 0 for index in group),
+               lambda group=group: group) for key, group in indices.items()]
+    return costs, groups
+
+
+def _rate_numpy(operators: Mapping[int, 'Operator'], customers: Mapping[int, 'Customer'],
+                customer_ids: Sequence[int], operator_ids: Sequence[int],
+                kinds: Sequence[Union[int, str]], quantities: Sequence[float],
+                peer_ids: Sequence[int]) -> Tuple['np.ndarray', List[Group]]:
+    """
+    Compute the costs of the events and group them by bill with NumPy.
+
+    Args:
+        operators (Mapping[int, Operator]): The operators by ID.
+        customers (Mapping[int, Customer]): The customers by ID.
+        customer_ids, operator_ids, kinds, quantities, peer_ids: The event columns.
+
+    Returns:
+        Tuple[np.ndarray, List[Group]]: The costs and the groups, in order of their first event.
+    """
+    customer_ids = np.asarray(customer_ids, dtype=np.int64)
+    operator_ids = np.asarray(operator_ids, dtype=np.int64)
+    quantities = np.asarray(quantities, dtype=np.float64)
+    peer_ids = np.asarray(peer_ids, dtype=np.int64)
+    kinds = np.asarray(kinds)
+    if kinds.dtype.kind in 'USO':
+        kinds = np.fromiter((_kind_code(kind) for kind in kinds), dtype=np.int8, count=len(kinds))
+    else:
+        kinds = kinds.astype(np.int8)
+        if len(kinds) and not np.isin(kinds, (TALK, MESSAGE, NETWORK)).all():
+            raise ValueError(f"Unknown event kind {kinds[~np.isin(kinds, (TALK, MESSAGE, NETWORK))][0]!r}")
+    size = len(customer_ids)
+
+    # Tariffs of the operators, indexed by the position of the operator ID in operator_keys
+    operator_keys, operator_index = _dense(operator_ids)
+    tariffs = np.array([(operators[key].talking_charge, operators[key].message_cost,
+                         operators[key].network_charge, operators[key].discount_rate)
+                        for key in operator_keys.tolist()], dtype=np.float64).reshape(-1, 4)
+    is_talk = kinds == TALK
+    is_message = kinds == MESSAGE
+    charges = np.where(is_talk, tariffs[operator_index, 0],
+                       np.where(is_message, tariffs[operator_index, 1], tariffs[operator_index, 2]))
+    costs = charges * quantities
+
+    # Every customer and message recipient gets a dense index, so (operator, customer)
+    # pairs become single integer keys
+    message_peers = peer_ids[is_message]
+    people, person_index = _dense(np.concatenate((customer_ids, message_peers)))
+    customer_index = person_index[:size]
+    keys = operator_index * len(people) + customer_index
+
+    customer_keys, customer_position = _dense(customer_ids)
+    ages = np.array([customers[key].age for key in customer_keys.tolist()], dtype=np.float64)[customer_position]
+    discounted = is_talk & ((ages < 18) | (ages > 65))
+
+    group_keys, group_index = _dense(keys)
+    first_event = np.full(len(group_keys), size, dtype=np.int64)
+    np.minimum.at(first_event, group_index, np.arange(size))
+
+    # A recipient is on-net if they had a bill before the batch or an earlier event of
+    # the batch opened one
+    if len(message_peers):
+        message_events = np.flatnonzero(is_message)
+        peer_keys = operator_index[message_events] * len(people) + person_index[size:]
+        position = np.minimum(np.searchsorted(group_keys, peer_keys), len(group_keys) - 1)
+        opened_in_batch = (group_keys[position] == peer_keys) & (first_event[position] < message_events)
+        peer_pairs, pair_index = _dense(peer_keys)
+        had_bill = np.array([int(people[key % len(people)]) in operators[int(operator_keys[key // len(people)])].customer_bills
+                             for key in peer_pairs.tolist()], dtype=bool)
+        discounted[message_events] = opened_in_batch | had_bill[pair_index]
+    costs = np.where(discounted, costs * (1 - tariffs[operator_index, 3]), costs)
+
+    # One grouped reduction for the totals of all bills
+    totals = np.bincount(group_index, weights=costs, minlength=len(group_keys))
+    negatives = np.bincount(group_index, weights=costs < 0, minlength=len(group_keys)) > 0
+    events: List[Sequence[int]] = []
+
+    def events_of(group: int) -> Sequence[int]:
+        if not events:
+            order = np.argsort(group_index, kind='stable')
+            events.extend(np.split(order, np.cumsum(np.bincount(group_index))[:-1]))
+        return events[group]
+
+    pairs = [(int(operator_keys[key // len(people)]), int(people[key % len(people)])) for key in group_keys.tolist()]
+    groups = [(pairs[group], float(totals[group]), bool(negatives[group]), lambda group=group: events_of(group))
+              for group in np.argsort(first_event).tolist()]
+    return costs, groups
+
+
+def _dense(ids: 'np.ndarray') -> Tuple['np.ndarray', 'np.ndarray']:
+    """
+    Get the distinct IDs and the position of every ID among them, like np.unique.
+
+    Small non-negative IDs are counted instead of sorted, which takes linear time.
+
+    Args:
+        ids (np.ndarray): The IDs.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: The sorted distinct IDs and the position of every ID.
+    """
+    if len(ids) and ids.min() >= 0 and ids.max() < 4 * len(ids) + 1024:
+        distinct = np.flatnonzero(np.bincount(ids))
+        position = np.zeros(distinct[-1] + 1, dtype=np.int64)
+        position[distinct] = np.arange(len(distinct))
+        return distinct, position[ids]
+    return np.unique(ids, return_inverse=True)
+
+
+def _fold(operators: Mapping[int, 'Operator'], customers: Mapping[int, 'Customer'],
+          costs: Sequence[float], groups: List[Group]) -> Sequence[bool]:
+    """
+    Add the grouped costs to the bills, opening the bills that do not exist yet.
+
+    The total of a group is added atomically if it fits, so this is safe while other
+    threads charge the same bills; the events of a group that does not fit are added one
+    by one.
+
+    Args:
+        operators (Mapping[int, Operator]): The operators by ID.
+        customers (Mapping[int, Customer]): The customers by ID.
+        costs (Sequence[float]): The cost of every event.
+        groups (List[Group]): The groups of events by bill.
+
+    Returns:
+        Sequence[bool]: Whether every event was added to its bill.
+    """
+    accepted = np.ones(len(costs), dtype=bool) if np is not None else [True] * len(costs)
+    for (operator_id, customer_id), total, has_negatives, events in groups:
+        bill = operators[operator_id].get_or_create_bill(customers[customer_id])
+        if not has_negatives and bill.add_if_fits(total):
+            continue
+        for index in events():
+            index = int(index)
+            accepted[index] = bill.add(float(costs[index]))
+    return accepted
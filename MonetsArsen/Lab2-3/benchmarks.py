@@ -0,0 +1,310 @@
+"""
+Benchmarks
+
+This module times the hot paths of the port simulation on synthetic worlds: creating
+containers, loading and unloading them, sailing ships between ports, writing the world
+as JSON and loading it back into a new world. Every benchmark is repeated and the best
+time is kept, as the best time is the least disturbed by other processes.
+
+With --save, the results are stored per commit in `benchmark_baselines.json`, so running
+the suite after a change shows how every benchmark compares with the last stored commit
+and flags the ones that got slower than the allowed threshold. The timings depend on the
+machine, so the file is kept locally and ignored by git: save a baseline before a change
+and compare with it after the change on the same machine.
+
+Usage:
+    python benchmarks.py --size small
+    python benchmarks.py --size medium --save --check
+
+Functions:
+    build_world: Creates a synthetic world.
+    world_to_dict: Converts a world to a JSON-serializable dictionary.
+    world_from_dict: Creates a world from such a dictionary.
+    run_benchmarks: Runs all benchmarks for one size.
+    compare: Compares results with a baseline.
+"""
+
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from managementSystem import PortManagementSystem
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_baselines.json')
+
+# The all-pairs distance matrix keeps n^2 distances, so the port counts stay within
+# what fits comfortably in memory.
+SIZES: Dict[str, Dict[str, int]] = {
+    'small': {'containers': 1_000, 'ports': 100, 'ships': 100},
+    'medium': {'containers': 100_000, 'ports': 1_000, 'ships': 1_000},
+    'large': {'containers': 1_000_000, 'ports': 2_000, 'ships': 10_000},
+}
+
+# The container types in the order of the limits of `create_ship`
+SHIP_LIMITS: Tuple[str, ...] = ('Container', 'HeavyContainer', 'LiquidContainer', 'RefrigeratedContainer')
+# The state `create_container` needs to create a container of a type again
+CONTAINER_STATES: Dict[str, str] = {'LiquidContainer': 'L', 'RefrigeratedContainer': 'R'}
+
+
+def build_world(containers: int, ports: int, ships: int, seed: int = 0) -> PortManagementSystem:
+    """Creates a synthetic world with randomly placed ports, containers and ships.
+
+    Args:
+        containers (int): The number of containers.
+        ports (int): The number of ports.
+        ships (int): The number of ships.
+        seed (int): The seed of the random generator. Defaults to 0.
+
+    Returns:
+        PortManagementSystem: The created world.
+    """
+    rng = random.Random(seed)
+    system = PortManagementSystem()
+    for _ in range(ports):
+        system.create_port(rng.uniform(0, 10000), rng.uniform(0, 10000))
+    for _ in range(containers):
+        system.create_container(rng.randint(1, ports), rng.uniform(1000, 6000), rng.choice('NNLR'))
+    for _ in range(ships):
+        ship = system.create_ship(rng.randint(1, ports), 100000, 30, 10, 5, 5, 50)
+        ship.re_fuel(float('inf'))
+    return system
+
+
+def world_to_dict(system: PortManagementSystem) -> Dict:
+    """Converts a world to a JSON-serializable dictionary.
+
+    Args:
+        system (PortManagementSystem): The world.
+
+    Returns:
+        Dict: The ports with their containers and the docked ships with their limits,
+        given as the arguments of `create_ship` followed by the fuel.
+    """
+    return {
+        'ports': [
+            {
+                'id': port.id,
+                'coordinates': port.coordinates,
+                'containers': [[cont.id, cont.__class__.__name__, cont.weight] for cont in port.containers],
+            }
+            for port in system.ports
+        ],
+        'ships': [
+            [ship.current_port.id, ship.total_weight_capacity]
+            + [ship.max_number_of_containers[name] for name in SHIP_LIMITS]
+            + [ship.fuel_consumption_per_KM, ship.fuel]
+            for ship in system.ships.values() if ship.current_port is not None
+        ],
+    }
+
+
+def world_from_dict(data: Dict) -> PortManagementSystem:
+    """Creates a world from a dictionary made by `world_to_dict`.
+
+    Ports, containers and ships get new IDs in the order they are created.
+
+    Args:
+        data (Dict): The ports with their containers and the ships.
+
+    Returns:
+        PortManagementSystem: The created world.
+    """
+    system = PortManagementSystem()
+    for port in data['ports']:
+        latitude, longitude = port['coordinates']
+        port_id = system.create_port(longitude, latitude).id
+        for _, type_name, weight in port['containers']:
+            system.create_container(port_id, weight, CONTAINER_STATES.get(type_name, 'N'))
+    for port_id, *limits, fuel in data['ships']:
+        system.create_ship(port_id, *limits).re_fuel(fuel)
+    return system
+
+
+def _bench_create_container(sizes: Dict[str, int]) -> Callable[[], int]:
+    system = build_world(0, sizes['ports'], 0)
+    rng = random.Random(1)
+    specs = [(rng.randint(1, sizes['ports']), rng.uniform(1000, 6000), rng.choice('NNLR'))
+             for _ in range(sizes['containers'])]
+
+    def run() -> int:
+        for port_id, weight, state in specs:
+            system.create_container(port_id, weight, state)
+        return len(specs)
+    return run
+
+
+def _bench_load_unload(sizes: Dict[str, int]) -> Callable[[], int]:
+    system = build_world(sizes['containers'], sizes['ports'], sizes['ships'])
+    ships = list(system.ships.values())
+
+    def run() -> int:
+        operations = 0
+        for ship in ships:
+            for cont in ship.current_port.containers.copy():
+                if ship.load(cont):
+                    operations += 1
+            for cont in ship.containers.copy():
+                ship.unload(cont)
+                operations += 1
+        return operations
+    return run
+
+
+def _bench_sail_to(sizes: Dict[str, int]) -> Callable[[], int]:
+    system = build_world(0, sizes['ports'], sizes['ships'])
+    rng = random.Random(2)
+    voyages = [(ship, system.ports[rng.randrange(sizes['ports'])])
+               for ship in system.ships.values() for _ in range(10)]
+
+    def run() -> int:
+        for ship, port in voyages:
+            ship.sail_to(port)
+        return len(voyages)
+    return run
+
+
+def _bench_json_write(sizes: Dict[str, int]) -> Callable[[], int]:
+    system = build_world(sizes['containers'], sizes['ports'], sizes['ships'])
+
+    def run() -> int:
+        json.dumps(world_to_dict(system))
+        return sizes['containers']
+    return run
+
+
+def _bench_json_load(sizes: Dict[str, int]) -> Callable[[], int]:
+    text = json.dumps(world_to_dict(build_world(sizes['containers'], sizes['ports'], sizes['ships'])))
+
+    def run() -> int:
+        world_from_dict(json.loads(text))
+        return sizes['containers']
+    return run
+
+
+BENCHMARKS: Dict[str, Callable[[Dict[str, int]], Callable[[], int]]] = {
+    'create_container': _bench_create_container,
+    'load_unload': _bench_load_unload,
+    'sail_to': _bench_sail_to,
+    'json_write': _bench_json_write,
+    'json_load': _bench_json_load,
+}
+
+
+def run_benchmarks(sizes: Dict[str, int], repeat: int = 3,
+                   names: Optional[List[str]] = None) -> Dict[str, Dict[str, float]]:
+    """Runs the benchmarks for one world size.
+
+    Every repetition runs on a freshly built world, and the world is built outside the
+    timed part.
+
+    Args:
+        sizes (Dict[str, int]): The number of containers, ports and ships.
+        repeat (int): The number of repetitions of each benchmark. Defaults to 3.
+        names (Optional[List[str]]): The benchmarks to run. Defaults to all of them.
+
+    Returns:
+        Dict[str, Dict[str, float]]: For every benchmark, the best time in seconds and the
+        number of operations per second.
+    """
+    results = {}
+    for name in names or BENCHMARKS:
+        best = float('inf')
+        operations = 0
+        for _ in range(repeat):
+            run = BENCHMARKS[name](sizes)
+            start = time.perf_counter()
+            operations = run()
+            best = min(best, time.perf_counter() - start)
+        results[name] = {'seconds': best, 'ops_per_second': operations / best if best else float('inf')}
+    return results
+
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]],
+            threshold: float = 1.2) -> List[Tuple[str, float]]:
+    """Finds the benchmarks that got slower than the baseline.
+
+    Args:
+        results (Dict[str, Dict[str, float]]): The new results.
+        baseline (Dict[str, Dict[str, float]]): The results to compare with.
+        threshold (float): The allowed ratio of the new time to the baseline time. Defaults to 1.2.
+
+    Returns:
+        List[Tuple[str, float]]: The slower benchmarks and their time ratios.
+    """
+    regressions = []
+    for name, result in results.items():
+        if name in baseline and baseline[name]['seconds'] > 0:
+            ratio = result['seconds'] / baseline[name]['seconds']
+            if ratio > threshold:
+                regressions.append((name, ratio))
+    return regressions
+
+
+def _current_commit() -> str:
+    """Gets the abbreviated hash of the checked out commit, or 'unknown' outside of git."""
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True, cwd=os.path.dirname(BASELINE_FILE)).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def _load_baselines() -> Dict:
+    """Loads the stored baselines, or an empty dictionary if there are none."""
+    if not os.path.exists(BASELINE_FILE):
+        return {}
+    with open(BASELINE_FILE) as file:
+        return json.load(file)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Runs the benchmarks from the command line.
+
+    Args:
+        argv (Optional[List[str]]): The command line arguments. Defaults to sys.argv.
+
+    Returns:
+        int: 1 if --check is given and a benchmark regressed, 0 otherwise.
+    """
+    parser = argparse.ArgumentParser(description='Benchmarks of the port simulation.')
+    parser.add_argument('--size', choices=SIZES, default='small')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--only', nargs='+', choices=BENCHMARKS)
+    parser.add_argument('--threshold', type=float, default=1.2)
+    parser.add_argument('--save', action='store_true', help='store the results for the current commit')
+    parser.add_argument('--check', action='store_true', help='exit with 1 if a benchmark regressed')
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(SIZES[args.size], args.repeat, args.only)
+    commit = _current_commit()
+    baselines = _load_baselines()
+    history = baselines.get(args.size, {})
+    previous = next((key for key in reversed(history) if key != commit), None)
+
+    print(f"Size: {args.size} {SIZES[args.size]}. Commit: {commit}")
+    for name, result in results.items():
+        line = f"{name:<18} {result['seconds']:>10.4f} s {result['ops_per_second']:>14.0f} ops/s"
+        if previous is not None and name in history[previous]:
+            line += f"   x{result['seconds'] / history[previous][name]['seconds']:.2f} vs {previous}"
+        print(line)
+
+    regressions = compare(results, history[previous], args.threshold) if previous is not None else []
+    for name, ratio in regressions:
+        print(f"Regression: {name} is {ratio:.2f} times slower than in {previous}")
+
+    if args.save:
+        history.pop(commit, None)
+        history[commit] = results
+        baselines[args.size] = history
+        with open(BASELINE_FILE, 'w') as file:
+            json.dump(baselines, file, indent=4)
+    return 1 if args.check and regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -20,11 +20,17 @@ class Container(ABC):
     """
     An abstract base class for containers.
 
+    Containers are created in large numbers, so the hierarchy uses `__slots__`
+    instead of a per-instance `__dict__`.
+
     Attributes:
         id (int): The unique identifier for the container.
         weight (float): The weight of the container.
+        items (List[Item]): The items put into the container.
     """
 
+    __slots__ = ('id', 'weight', 'items')
+
     def __init__(self, identifier: int, weight: float) -> None:
         """
         Initialize a Container object.
@@ -77,6 +83,7 @@ class BasicContainer(Container):
         UNIT (float): The constant consumption rate for basic containers.
     """
 
+    __slots__ = ()
     UNIT = 2.5
 
     def __init__(self, identifier: int, weight: float) -> None:
@@ -106,6 +113,7 @@ class HeavyContainer(Container):
         UNIT (float): The constant consumption rate for heavy containers.
     """
 
+    __slots__ = ()
     UNIT = 3.0
 
     def __init__(self, identifier: int, weight: float) -> None:
@@ -135,6 +143,7 @@ class LiquidContainer(HeavyContainer):
         UNIT (float): The constant consumption rate for liquid containers.
     """
 
+    __slots__ = ()
     UNIT = 4.0
 
     def __init__(self, identifier: int, weight: float) -> None:
@@ -155,6 +164,7 @@ class RefrigeratedContainer(HeavyContainer):
         UNIT (float): The constant consumption rate for refrigerated containers.
     """
 
+    __slots__ = ()
     UNIT = 5.0
 
     def __init__(self, identifier: int, weight: float) -> None:
@@ -0,0 +1,117 @@
+"""
+Container Store
+
+This module defines `ContainerStore`, an id-indexed collection of containers used by
+ports and ships. Containers are kept in a dictionary keyed by their identifier, so
+membership checks, insertion and removal are constant-time while iteration still
+follows insertion order.
+
+Classes:
+    ContainerStore: An insertion-ordered, id-indexed collection of containers.
+
+Dependencies:
+    - container.Container (for type checking)
+"""
+
+from typing import Dict, Iterator, List, Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from container import Container
+
+
+class ContainerStore:
+    """
+    An insertion-ordered, id-indexed collection of containers.
+
+    The store mirrors the parts of the list API used by ports and ships
+    (`append`, `remove`, `in`, `len`, iteration), so it can replace a plain
+    list of containers without changing the callers.
+
+    Attributes:
+        _containers (Dict[int, Container]): The stored containers, keyed by id.
+    """
+
+    def __init__(self, containers: Optional[List['Container']] = None) -> None:
+        """
+        Initialize a ContainerStore object.
+
+        Args:
+            containers (Optional[List[Container]]): Containers to store initially.
+        """
+        self._containers: Dict[int, 'Container'] = {}
+        for container in containers or []:
+            self.append(container)
+
+    def __contains__(self, cont: object) -> bool:
+        """
+        Check if the given container is in the store.
+
+        Args:
+            cont (Container): The container to look up.
+
+        Returns:
+            bool: True if this exact container is stored, False otherwise.
+        """
+        return self._containers.get(getattr(cont, 'id', None)) is cont
+
+    def __iter__(self) -> Iterator['Container']:
+        """Iterate over the containers in insertion order."""
+        return iter(self._containers.values())
+
+    def __len__(self) -> int:
+        """Return the number of stored containers."""
+        return len(self._containers)
+
+    def __repr__(self) -> str:
+        """Return the same representation as a list of the stored containers."""
+        return repr(list(self._containers.values()))
+
+    def append(self, cont: 'Container') -> None:
+        """
+        Add a container to the end of the store.
+
+        Args:
+            cont (Container): The container to add.
+
+        Raises:
+            ValueError: If another container with the same id is already stored.
+        """
+        stored = self._containers.get(cont.id)
+        if stored is not None and stored is not cont:
+            raise ValueError(f'Container with id {cont.id} is already stored')
+        self._containers[cont.id] = cont
+
+    def remove(self, cont: 'Container') -> None:
+        """
+        Remove a container from the store.
+
+        Args:
+            cont (Container): The container to remove.
+
+        Raises:
+            ValueError: If the container is not in the store.
+        """
+        if cont not in self:
+            raise ValueError('ContainerStore.remove(x): x not in store')
+        del self._containers[cont.id]
+
+    def get(self, identifier: int) -> Optional['Container']:
+        """
+        Get a stored container by its id.
+
+        Args:
+            identifier (int): The id of the container.
+
+        Returns:
+            Optional[Container]: The container, or None if it is not stored.
+        """
+        return self._containers.get(identifier)
+
+    def copy(self) -> List['Container']:
+        """
+        Get the stored containers as a new list in insertion order.
+
+        Returns:
+            List[Container]: A list of the stored containers.
+        """
+        return list(self._containers.values())
@@ -0,0 +1,127 @@
+"""
+Container Type Registry
+
+This module defines `ContainerTypeRegistry`, which assigns every container class an
+integer code and the set of limit categories it counts towards (every container counts
+towards 'Container', liquid and refrigerated ones also towards 'HeavyContainer', and so
+on). The categories of a class are kept both as a tuple of category indices and as a
+bitmask, so a ship can keep its counts in a list indexed by category and check all
+limits of a container with a single bitwise AND against the mask of its full categories.
+
+New container types are supported by registering them, optionally with new categories.
+Subclasses that are not registered use the entry of their nearest registered base class.
+
+Classes:
+    ContainerType: The registry entry of a container class.
+    ContainerTypeRegistry: The registry of container classes.
+
+Objects:
+    CONTAINER_TYPES: The registry with the container classes of the `container` module.
+
+Dependencies:
+    - container (the container classes)
+"""
+
+from typing import Dict, Iterable, List, NamedTuple, Tuple
+
+from container import BasicContainer, HeavyContainer, LiquidContainer, RefrigeratedContainer
+
+
+class ContainerType(NamedTuple):
+    """The registry entry of a container class.
+
+    Attributes:
+        code (int): The integer code of the class.
+        mask (int): The bitmask of the limit categories the class counts towards.
+        categories (Tuple[int, ...]): The indices of these categories.
+    """
+
+    code: int
+    mask: int
+    categories: Tuple[int, ...]
+
+
+class ContainerTypeRegistry:
+    """
+    The registry of container classes and the limit categories they count towards.
+
+    Attributes:
+        categories (List[str]): The names of the limit categories, by index.
+        classes (List[type]): The registered classes, by code.
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty registry."""
+        self.categories: List[str] = []
+        self.classes: List[type] = []
+        self._category_index: Dict[str, int] = {}
+        self._types: Dict[type, ContainerType] = {}
+
+    def category(self, name: str) -> int:
+        """
+        Get the index of a limit category, adding the category if it is new.
+
+        Args:
+            name (str): The name of the category, as used in the ship limits.
+
+        Returns:
+            int: The index of the category.
+        """
+        if name not in self._category_index:
+            self._category_index[name] = len(self.categories)
+            self.categories.append(name)
+        return self._category_index[name]
+
+    def register(self, cls: type, categories: Iterable[str]) -> ContainerType:
+        """
+        Register a container class.
+
+        Args:
+            cls (type): The container class.
+            categories (Iterable[str]): The names of the limit categories the class counts towards.
+
+        Returns:
+            ContainerType: The entry of the class.
+
+        Raises:
+            ValueError: If the class is already registered.
+        """
+        if cls in self.classes:
+            raise ValueError(f'{cls.__name__} is already registered')
+        indices = tuple(self.category(name) for name in categories)
+        entry = ContainerType(len(self.classes), sum(1 << index for index in set(indices)), indices)
+        self.classes.append(cls)
+        # Drop entries cached for subclasses, they may resolve to the new class now
+        self._types = {key: value for key, value in self._types.items() if self.classes[value.code] is key}
+        self._types[cls] = entry
+        return entry
+
+    def get(self, cls: type) -> ContainerType:
+        """
+        Get the entry of a container class.
+
+        Args:
+            cls (type): The container class.
+
+        Returns:
+            ContainerType: The entry of the class or of its nearest registered base class.
+
+        Raises:
+            KeyError: If neither the class nor any of its bases is registered.
+        """
+        entry = self._types.get(cls)
+        if entry is None:
+            for base in cls.__mro__[1:]:
+                if base in self._types and self.classes[self._types[base].code] is base:
+                    entry = self._types[cls] = self._types[base]
+                    break
+            else:
+                raise KeyError(f'{cls.__name__} is not a registered container type')
+        return entry
+
+
+CONTAINER_TYPES = ContainerTypeRegistry()
+CONTAINER_TYPES.register(BasicContainer, ['Container'])
+CONTAINER_TYPES.register(HeavyContainer, ['Container', 'HeavyContainer'])
+CONTAINER_TYPES.register(LiquidContainer, ['Container', 'HeavyContainer', 'LiquidContainer'])
+CONTAINER_TYPES.register(RefrigeratedContainer, ['Container', 'HeavyContainer', 'RefrigeratedContainer'])
@@ -0,0 +1,191 @@
+"""
+Distance Matrix
+
+This module defines `DistanceMatrix`, a service that keeps the distances between all
+registered ports. The distances from a new port to every known port are computed once,
+when the port is registered, so later lookups are a single index operation.
+
+When NumPy is installed, the distances are kept in a preallocated array and a whole
+row is computed at once; otherwise lists and the `math` module are used.
+
+Classes:
+    DistanceMatrix: All-pairs port distances with incremental registration.
+
+Dependencies:
+    - port.Port (for type checking)
+    - numpy (optional)
+"""
+
+import math
+from typing import Dict, List, Tuple, Union, TYPE_CHECKING
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+if TYPE_CHECKING:
+    from port import Port
+
+EARTH_RADIUS_KM = 6371.0
+
+
+class DistanceMatrix:
+    """
+    All-pairs distances between registered ports.
+
+    With NumPy, the distances are kept in a square float64 array with room for more
+    ports than are registered. When it is full, its capacity doubles, so registering a
+    port costs one row of distances and, amortized, a constant number of copies.
+    Without NumPy, the distances are kept in lists.
+
+    Attributes:
+        metric (str): 'euclidean' for plane distance or 'haversine' for great-circle
+            distance in kilometers between (latitude, longitude) coordinates.
+    """
+
+    METRICS = ('euclidean', 'haversine')
+
+    def __init__(self, metric: str = 'euclidean', capacity: int = 16) -> None:
+        """
+        Initialize a DistanceMatrix object.
+
+        Args:
+            metric (str): The distance metric, 'euclidean' or 'haversine'. Defaults to 'euclidean'.
+            capacity (int): The number of ports to reserve room for. Defaults to 16.
+
+        Raises:
+            ValueError: If the metric is unknown or the capacity is not positive.
+        """
+        if metric not in self.METRICS:
+            raise ValueError(f'Unknown metric: {metric}')
+        if capacity < 1:
+            raise ValueError('Capacity must be positive')
+        self.metric = metric
+        self._index: Dict[int, int] = {}
+        if np is not None:
+            self._coordinates = np.empty((capacity, 2))
+            self._matrix = np.empty((capacity, capacity))
+        else:
+            self._coordinates: List[Tuple[float, float]] = []
+            self._rows: List[List[float]] = []
+
+    def __contains__(self, port: 'Port') -> bool:
+        """Check if the port is registered in the matrix."""
+        return port.id in self._index
+
+    def __len__(self) -> int:
+        """Return the number of registered ports."""
+        return len(self._index)
+
+    def register(self, port: 'Port') -> None:
+        """
+        Register a port and compute its distances to all registered ports.
+
+        Registering an already known port does nothing.
+
+        Args:
+            port (Port): The port to register.
+        """
+        if port.id in self._index:
+            return
+        size = len(self._index)
+        row = self._distances_from(port.coordinates)
+        if np is not None:
+            if size == len(self._coordinates):
+                self._grow()
+            self._matrix[size, :size] = row
+            self._matrix[:size, size] = row
+            self._matrix[size, size] = 0.0
+            self._coordinates[size] = port.coordinates
+        else:
+            for other_row, distance in zip(self._rows, row):
+                other_row.append(distance)
+            row.append(0.0)
+            self._coordinates.append(port.coordinates)
+            self._rows.append(row)
+        self._index[port.id] = size
+
+    def get_distance(self, port: 'Port', other_port: 'Port') -> float:
+        """
+        Get the distance between two registered ports.
+
+        Args:
+            port (Port): The first port.
+            other_port (Port): The second port.
+
+        Returns:
+            float: The distance between the two ports.
+
+        Raises:
+            KeyError: If one of the ports is not registered.
+        """
+        if np is not None:
+            return self._matrix.item(self._index[port.id], self._index[other_port.id])
+        return self._rows[self._index[port.id]][self._index[other_port.id]]
+
+    def distance(self, point: Tuple[float, float], other_point: Tuple[float, float]) -> float:
+        """
+        Compute the distance between two points with the metric of the matrix.
+
+        Args:
+            point (Tuple[float, float]): The coordinates of the first point.
+            other_point (Tuple[float, float]): The coordinates of the second point.
+
+        Returns:
+            float: The distance between the two points.
+        """
+        if self.metric == 'euclidean':
+            return math.hypot(point[0] - other_point[0], point[1] - other_point[1])
+        return haversine_distance(point, other_point)
+
+    def _grow(self) -> None:
+        """
+        Double the capacity of the arrays, keeping the registered distances.
+        """
+        size = len(self._index)
+        capacity = 2 * len(self._coordinates)
+        coordinates = np.empty((capacity, 2))
+        coordinates[:size] = self._coordinates[:size]
+        matrix = np.empty((capacity, capacity))
+        matrix[:size, :size] = self._matrix[:size, :size]
+        self._coordinates, self._matrix = coordinates, matrix
+
+    def _distances_from(self, point: Tuple[float, float]) -> Union[List[float], 'np.ndarray']:
+        """
+        Compute the distances from a point to every registered port.
+
+        Args:
+            point (Tuple[float, float]): The coordinates of the point.
+
+        Returns:
+            Union[List[float], np.ndarray]: The distances, in registration order; an array
+            when NumPy is installed.
+        """
+        if np is not None:
+            coordinates = self._coordinates[:len(self._index)]
+            if self.metric == 'euclidean':
+                return np.hypot(coordinates[:, 0] - point[0], coordinates[:, 1] - point[1])
+            lat_1, lon_1 = np.radians(point[0]), np.radians(point[1])
+            lat_2, lon_2 = np.radians(coordinates[:, 0]), np.radians(coordinates[:, 1])
+            haversine = (np.sin((lat_2 - lat_1) / 2) ** 2
+                         + np.cos(lat_1) * np.cos(lat_2) * np.sin((lon_2 - lon_1) / 2) ** 2)
+            return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(haversine, 0.0, 1.0)))
+        return [self.distance(point, other) for other in self._coordinates]
+
+
+def haversine_distance(point: Tuple[float, float], other_point: Tuple[float, float]) -> float:
+    """
+    Calculate the great-circle distance between two (latitude, longitude) points.
+
+    Args:
+        point (Tuple[float, float]): The first point, in degrees.
+        other_point (Tuple[float, float]): The second point, in degrees.
+
+    Returns:
+        float: The distance in kilometers.
+    """
+    lat_1, lon_1 = math.radians(point[0]), math.radians(point[1])
+    lat_2, lon_2 = math.radians(other_point[0]), math.radians(other_point[1])
+    haversine = math.sin((lat_2 - lat_1) / 2) ** 2 + math.cos(lat_1) * math.cos(lat_2) * math.sin((lon_2 - lon_1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(min(1.0, haversine)))
@@ -0,0 +1,213 @@
+"""
+Instrumentation
+
+This module defines `Profiler`, an opt-in instrumentation layer for the hot paths of the
+port management system. While a profiler is enabled, the instrumented methods are
+replaced on their classes by wrappers that count the calls, add up the wall time and
+record why a call failed (for example 'weight limit', 'count limit' or 'fuel'). Disabling
+the profiler puts the original methods back, so there is no overhead at all when
+profiling is off.
+
+The collected figures can be printed as a report or written in the format of
+`cProfile`, so they can be opened with `pstats` or tools such as snakeviz.
+
+Classes:
+    OperationStats: The figures collected for one operation.
+    Profiler: Collects the figures of the instrumented operations.
+
+Dependencies:
+    - managementSystem (the management system and ship director)
+    - ship.Ship
+"""
+
+import functools
+import marshal
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from managementSystem import PortManagementSystem, AdvancedPortManagementSystem, ShipDirector
+from ship import Ship
+
+
+def _load_failure(result: Any, ship: Ship, cont: Any) -> Optional[str]:
+    """Gets the failure reason of Ship.load; the ship is unchanged after a failed load."""
+    return ship.load_rejection(cont) if result is False else None
+
+
+# (owner class, method name, failure reason of a returned value)
+TARGETS: List[Tuple[type, str, Optional[Callable[..., Optional[str]]]]] = [
+    (PortManagementSystem, 'create_container', None),
+    (PortManagementSystem, 'create_port', None),
+    (PortManagementSystem, 'create_ship', None),
+    (AdvancedPortManagementSystem, 'create_container', None),
+    (AdvancedPortManagementSystem, 'create_ship', None),
+    (AdvancedPortManagementSystem, 'load_batch', None),
+    (AdvancedPortManagementSystem, 'pack_items', None),
+    (ShipDirector, 'try_create_ship', lambda result, *args: 'requirements' if result is None else None),
+    (Ship, 'load', _load_failure),
+    (Ship, 'load_batch', None),
+    (Ship, 'unload', lambda result, *args: 'not on ship' if result is False else None),
+    (Ship, 'sail_to', lambda result, *args: 'fuel' if result is False else None),
+]
+
+
+class OperationStats:
+    """The figures collected for one operation.
+
+    Attributes:
+        name (str): The name of the operation, e.g. 'Ship.load'.
+        code (Tuple[str, int, str]): The file, line and function name of the operation.
+        calls (int): The number of calls.
+        total_time (float): The wall time spent in the calls, in seconds.
+        failures (Counter): The number of failed calls by reason.
+    """
+
+    __slots__ = ('name', 'code', 'calls', 'total_time', 'failures')
+
+    def __init__(self, name: str, function: Callable) -> None:
+        """Initialize an OperationStats object.
+
+        Args:
+            name (str): The name of the operation.
+            function (Callable): The instrumented function.
+        """
+        self.name = name
+        self.code = (function.__code__.co_filename, function.__code__.co_firstlineno, name)
+        self.calls = 0
+        self.total_time = 0.0
+        self.failures: Counter = Counter()
+
+
+class Profiler:
+    """Collects call counts, wall time and failure reasons of the instrumented operations.
+
+    Usage:
+        with Profiler() as profiler:
+            ...
+        print(profiler.report())
+
+    Attributes:
+        stats (Dict[str, OperationStats]): The collected figures by operation name.
+    """
+
+    _active: Optional['Profiler'] = None
+
+    def __init__(self) -> None:
+        """Initialize a disabled Profiler."""
+        self.stats: Dict[str, OperationStats] = {}
+        self._originals: List[Tuple[type, str, Callable]] = []
+
+    @property
+    def enabled(self) -> bool:
+        """True while the profiler is collecting figures."""
+        return Profiler._active is self
+
+    def enable(self) -> None:
+        """Start collecting figures by wrapping the instrumented methods.
+
+        Raises:
+            RuntimeError: If another profiler is enabled.
+        """
+        if self.enabled:
+            return
+        if Profiler._active is not None:
+            raise RuntimeError('Another profiler is already enabled')
+        Profiler._active = self
+        for owner, name, failure in TARGETS:
+            original = owner.__dict__[name]
+            self._originals.append((owner, name, original))
+            setattr(owner, name, self._wrap(owner, name, original, failure))
+
+    def disable(self) -> None:
+        """Stop collecting figures and restore the original methods."""
+        if not self.enabled:
+            return
+        for owner, name, original in reversed(self._originals):
+            setattr(owner, name, original)
+        self._originals.clear()
+        Profiler._active = None
+
+    def __enter__(self) -> 'Profiler':
+        """Enable the profiler for the duration of a with block."""
+        self.enable()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        """Disable the profiler at the end of a with block."""
+        self.disable()
+
+    def reset(self) -> None:
+        """Forget all collected figures."""
+        for stats in self.stats.values():
+            stats.calls = 0
+            stats.total_time = 0.0
+            stats.failures.clear()
+
+    def _wrap(self, owner: type, name: str, function: Callable,
+              failure: Optional[Callable[..., Optional[str]]]) -> Callable:
+        """Create the wrapper that collects the figures of one method.
+
+        Args:
+            owner (type): The class the method belongs to.
+            name (str): The name of the method.
+            function (Callable): The original method.
+            failure (Optional[Callable[..., Optional[str]]]): Gets the failure reason from
+                the returned value and the arguments, or None if failures are only raised.
+
+        Returns:
+            Callable: The wrapper.
+        """
+        key = f'{owner.__name__}.{name}'
+        stats = self.stats.get(key)
+        if stats is None:
+            stats = self.stats[key] = OperationStats(key, function)
+        perf_counter = time.perf_counter
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            start = perf_counter()
+            try:
+                result = function(*args, **kwargs)
+            except Exception as error:
+                stats.total_time += perf_counter() - start
+                stats.calls += 1
+                stats.failures[str(error) or type(error).__name__] += 1
+                raise
+            stats.total_time += perf_counter() - start
+            stats.calls += 1
+            if failure is not None:
+                reason = failure(result, *args, **kwargs)
+                if reason is not None:
+                    stats.failures[reason] += 1
+            return result
+        return wrapper
+
+    def report(self) -> str:
+        """Format the collected figures as a table, slowest operation first.
+
+        Returns:
+            str: The report.
+        """
+        lines = [f"{'Operation':<44} {'Calls':>9} {'Total ms':>10} {'us/call':>9}  Failures"]
+        for stats in sorted(self.stats.values(), key=lambda stats: stats.total_time, reverse=True):
+            if not stats.calls:
+                continue
+            failures = ', '.join(f'{reason}: {count}' for reason, count in stats.failures.most_common())
+            lines.append(f"{stats.name:<44} {stats.calls:>9} {stats.total_time * 1000:>10.2f} "
+                         f"{stats.total_time / stats.calls * 1e6:>9.2f}  {failures}")
+        return '\n'.join(lines)
+
+    def dump_stats(self, filename: str) -> None:
+        """Write the collected figures in the format of cProfile.Profile.dump_stats.
+
+        Wall time is reported both as own and as cumulative time, and no callers are
+        recorded, as the wrappers do not track which operation called which.
+
+        Args:
+            filename (str): The file to write, readable with pstats.Stats(filename).
+        """
+        entries = {stats.code: (stats.calls, stats.calls, stats.total_time, stats.total_time, {})
+                   for stats in self.stats.values() if stats.calls}
+        with open(filename, 'wb') as file:
+            marshal.dump(entries, file)
@@ -6,7 +6,14 @@ if TYPE_CHECKING:
 
 
 class Item(ABC):
-    """Abstract base class representing a generic item."""
+    """Abstract base class representing a generic item.
+
+    STATE is the state of the containers the item can be put in
+    ('N' for normal, 'L' for liquid, 'R' for refrigerated).
+    """
+
+    __slots__ = ('ID', 'weight', 'count', 'container_id')
+    STATE = 'N'
 
     def __init__(self, identifier: int, weight: float, count: int):
         """
@@ -20,7 +27,6 @@ class Item(ABC):
         self.weight = weight
         self.count = count
         self.container_id = -1
-        self.type = type
 
     @abstractmethod
     def get_total_weight(self) -> float:
@@ -51,6 +57,8 @@ class Item(ABC):
 class Small(Item):
     """Class representing a small item."""
 
+    __slots__ = ('description',)
+
     def __init__(self, identifier: int, weight: float, count: int, description: str):
         """
         Initializes a small item.
@@ -81,6 +89,8 @@ class Small(Item):
 class Heavy(Item):
     """Class representing a heavy item."""
 
+    __slots__ = ('max_load',)
+
     def __init__(self, identifier: int, weight: float, count: int, max_load: int):
         """
         Initializes a heavy item.
@@ -111,6 +121,9 @@ class Heavy(Item):
 class Refrigerated(Item):
     """Class representing a refrigerated item."""
 
+    __slots__ = ('temperature',)
+    STATE = 'R'
+
     def __init__(self, identifier: int, weight: float, count: int, temperature: float):
         """
         Initializes a refrigerated item.
@@ -141,6 +154,9 @@ class Refrigerated(Item):
 class Liquid(Item):
     """Class representing a liquid item."""
 
+    __slots__ = ('liquid_type',)
+    STATE = 'L'
+
     def __init__(self, identifier: int, weight: float, count: int, liquid_type: str):
         """
         Initializes a liquid item.
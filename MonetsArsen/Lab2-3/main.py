@@ -1,5 +1,19 @@
+import os
+import pstats
+import tempfile
 import unittest
-from managementSystem import AdvancedPortManagementSystem
+from managementSystem import AdvancedPortManagementSystem, ShipRequirementsError
+from simulation import Simulation
+from scenario_runner import ScenarioConfig, run_sweep
+from mmap_container_store import MmapContainerYard
+from ship_history import ShipHistory
+from item import ItemFactory
+from instrumentation import Profiler
+from ship import IShip, Ship
+from container import BasicContainer, HeavyContainer
+from container_types import CONTAINER_TYPES, ContainerTypeRegistry
+from distance_matrix import DistanceMatrix, haversine_distance
+from port import Port
 
 class TestPortManagementSystemIntegration(unittest.TestCase):
     """
@@ -54,6 +68,306 @@ class TestPortManagementSystemIntegration(unittest.TestCase):
         self.assertFalse(self.ship.unload(self.container3), "Container 3 should not unload because it wasn't loaded.")
         self.assertTrue(self.ship.unload(self.container4), "Container 4 should unload successfully.")
 
+    def test_containers_move_between_port_and_ship(self):
+        """
+        Test that loading and unloading move containers between the port and ship stores
+        while keeping them ordered.
+        """
+        self.assertTrue(self.ship.load(self.container2))
+        self.assertNotIn(self.container2, self.port1.containers)
+        self.assertEqual(self.port1.containers.copy(), [self.container1, self.container3, self.container4])
+        self.assertFalse(self.ship.load(self.container2), "Container 2 is no longer at the port.")
+
+        self.assertTrue(self.ship.load(self.container1))
+        self.assertEqual(self.ship.get_current_containers(), [self.container1, self.container2])
+
+        self.assertTrue(self.ship.unload(self.container2))
+        self.assertIn(self.container2, self.port1.containers)
+        self.assertEqual(len(self.port1.containers), 3)
+
+    def test_cached_consumption_follows_load_and_unload(self):
+        """
+        Test that the ship keeps its container consumption total up to date.
+        """
+        self.ship.load(self.container1)
+        self.ship.load(self.container4)
+        self.assertEqual(self.ship.containers_consumption, 4000 * 3 + 4000 * 5)
+        self.assertEqual(self.ship.weight_by_type, {'HeavyContainer': 4000, 'RefrigeratedContainer': 4000})
+        self.ship.unload(self.container1)
+        self.ship.check_cached_totals()
+        self.assertEqual(self.ship.containers_consumption, 4000 * 5)
+
+    def test_load_batch(self):
+        """
+        Test that a batch load takes every container the ship's limits allow in one call.
+        """
+        containers = [self.container1, self.container2, self.container3, self.container4]
+        loaded = self.management_system.load_batch(self.ship.id, containers)
+        self.assertEqual(loaded, [self.container2, self.container1, self.container4])
+        self.assertEqual(self.ship.weight_of_containers, 11000)
+        self.assertEqual(self.ship.number_of_containers['HeavyContainer'], 2)
+        self.assertEqual(self.port1.containers.copy(), [self.container3])
+        self.ship.check_cached_totals()
+        with self.assertRaises(Exception):
+            self.management_system.load_batch(42, containers)
+
+    def test_distances_are_served_from_matrix(self):
+        """
+        Test that distances between created ports come from the shared distance matrix.
+        """
+        port3 = self.management_system.create_port(4000, 6000)
+        matrix = self.management_system.port_management.distance_matrix
+        self.assertEqual(len(matrix), 3)
+        self.assertEqual(self.port1.get_distance(self.port2), 1000)
+        self.assertEqual(port3.get_distance(self.port1), 5000)
+        self.assertEqual(matrix.get_distance(self.port2, port3), self.port2.get_distance(port3))
+        self.assertEqual(self.port2.get_distance(self.port2), 0)
+
+    def test_distance_matrix_grows_and_keeps_its_metric(self):
+        """
+        Test that the matrix keeps all distances while it grows, and that ports outside it use its metric.
+        """
+        matrix = DistanceMatrix('haversine', capacity=2)
+        ports = [Port(index, (index * 3.5 - 40, index * 7.0 - 80), matrix) for index in range(20)]
+        for port in ports[::3]:
+            for other_port in ports[::4]:
+                self.assertAlmostEqual(port.get_distance(other_port),
+                                       haversine_distance(port.coordinates, other_port.coordinates))
+        outside = Port(99, (10, 20))
+        self.assertAlmostEqual(outside.get_distance(ports[0]), haversine_distance((10, 20), ports[0].coordinates))
+        self.assertAlmostEqual(ports[0].get_distance(outside), outside.get_distance(ports[0]))
+        with self.assertRaises(ValueError):
+            Port(100, (10, 20), DistanceMatrix()).get_distance(ports[0])
+
+    def test_simulation_voyages_and_berths(self):
+        """
+        Test that the simulation sails ships over time and makes them wait for a free berth.
+        """
+        other_ship = self.management_system.create_ship(1, 16000, 10, 3, 0, 1, 10)
+        self.ship.re_fuel(100000)
+        other_ship.re_fuel(100000)
+        simulation = Simulation(speed=100, load_time=1, unload_time=2)
+        first = simulation.schedule_voyage(self.ship, self.port2, load=[self.container1], unload=[self.container1])
+        second = simulation.schedule_voyage(other_ship, self.port2, start_time=0.5, load=[self.container2])
+        back = simulation.schedule_voyage(self.ship, self.port1, start_time=5)
+        simulation.run(until=5)
+        self.assertIsNone(self.ship.current_port, "The ship is still at sea.")
+        self.assertNotIn(self.ship, self.port1.ship_current)
+        self.assertNotIn(self.ship, self.port2.ship_current)
+        simulation.run()
+
+        self.assertEqual((first.departure_time, first.arrival_time), (1, 11))
+        self.assertEqual(second.departure_time, 2, "The second ship waits for the only berth.")
+        self.assertEqual(second.arrival_time, 12)
+        self.assertEqual((back.departure_time, back.arrival_time), (13, 23))
+        self.assertTrue(first.completed and second.completed and back.completed)
+        self.assertIn(self.container1, self.port2.containers)
+        self.assertIs(other_ship.current_port, self.port2)
+        self.assertIs(self.ship.current_port, self.port1)
+        self.assertEqual(simulation.berths(self.port1).busy_time, 2)
+        self.assertEqual(simulation.berths(self.port2).busy_time, 2)
+        self.assertEqual(simulation.now, 23)
+
+    def test_ship_interface_voyage_defaults(self):
+        """
+        Test that IShip does not require depart and arrive, and that by default a ship sails
+        the whole voyage when it departs.
+        """
+        self.assertFalse({'depart', 'arrive'} & IShip.__abstractmethods__)
+        self.ship.re_fuel(100000)
+        self.assertTrue(IShip.depart(self.ship, self.port2))
+        self.assertIs(self.ship.current_port, self.port2)
+        IShip.arrive(self.ship, self.port2)
+        self.assertIn(self.ship, self.port2.ship_current)
+        self.assertNotIn(self.ship, self.port1.ship_current)
+
+    def test_scenario_sweep(self):
+        """
+        Test that a sweep runs every scenario in worker processes and reports the cheapest one.
+        """
+        ports = ((1000, 2000), (1000, 3000))
+        containers = ((1, 2000, 'N'), (1, 2500, 'N'))
+        voyages = ((0, 2, (0, 1)),)
+        configs = [
+            ScenarioConfig('light', ports, ((1, 30000, 10, 0, 0, 0, 10, 100000),), containers, voyages),
+            ScenarioConfig('medium', ports, ((1, 80000, 20, 5, 0, 2, 30, 100000),), containers, voyages),
+            ScenarioConfig('too big', ports, ((1, 500000, 50, 0, 0, 0, 10, 100000),), containers, voyages),
+        ]
+        report = run_sweep(configs, max_workers=2)
+        self.assertEqual(report.results, run_sweep(configs, max_workers=1).results)
+        light, medium, too_big = report.results
+        self.assertEqual(light.fuel_used, 1000 * 10 + 4500 * 2.5)
+        self.assertEqual(medium.fuel_used, 1000 * 30 + 4500 * 2.5)
+        self.assertEqual(light.containers_moved, 2)
+        self.assertEqual(light.utilization, 4500 / 30000)
+        self.assertEqual((too_big.ships_rejected, too_big.voyages_failed), (1, 1))
+        self.assertIs(report.cheapest(), light)
+        with self.assertRaises(ShipRequirementsError):
+            self.management_system.create_ship(1, 500000, 50, 0, 0, 0, 10)
+
+    def test_mmap_container_yard(self):
+        """
+        Test that ports and ships can keep their containers in a memory-mapped yard file.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'yard.bin')
+            yard = MmapContainerYard(path, capacity=2)
+            try:
+                system = AdvancedPortManagementSystem(yard)
+                port1 = system.create_port(1000, 2000)
+                port2 = system.create_port(1000, 3000)
+                containers = [system.create_container(1, weight, state)
+                              for weight, state in ((4000, 'N'), (3000, 'N'), (4000, 'R'), (2000, 'N'))]
+                ship = system.create_ship(1, 16000, 10, 3, 0, 1, 10)
+                ship.re_fuel(100000)
+
+                self.assertEqual([cont.id for cont in port1.containers], [1, 2, 3, 4])
+                self.assertTrue(ship.load(containers[2]))
+                self.assertTrue(ship.load(containers[0]))
+                self.assertFalse(ship.load(containers[0]), "Container 1 is no longer at the port.")
+                self.assertEqual([cont.id for cont in port1.containers], [2, 4])
+                self.assertTrue(ship.sail_to(port2))
+                self.assertTrue(ship.unload(containers[2]))
+                self.assertEqual(port2.containers.copy()[0].__class__.__name__, 'RefrigeratedContainer')
+            finally:
+                yard.close()
+
+            reopened = MmapContainerYard(path)
+            try:
+                self.assertEqual([cont.id for cont in reopened.store(1)], [2, 4])
+                self.assertEqual([cont.id for cont in reopened.store(-ship.id)], [1])
+                self.assertEqual(reopened.store(2).get(3).weight, 4000)
+                self.assertEqual(len(reopened.store(2)), 1)
+            finally:
+                reopened.close()
+
+    def test_mmap_container_yard_registered_types(self):
+        """
+        Test that a yard stores the container types of its registry, including new ones.
+        """
+        class HazardousContainer(HeavyContainer):
+            pass
+
+        registry = ContainerTypeRegistry()
+        registry.register(HeavyContainer, ['Container', 'HeavyContainer'])
+        registry.register(HazardousContainer, ['Container', 'HeavyContainer', 'HazardousContainer'])
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'yard.bin')
+            yard = MmapContainerYard(path, types=registry)
+            try:
+                yard.store(1).append(HazardousContainer(identifier=1, weight=5000))
+                yard.store(1).append(HeavyContainer(identifier=2, weight=4000))
+                with self.assertRaises(ValueError):
+                    yard.store(1).append(BasicContainer(identifier=3, weight=2000))
+            finally:
+                yard.close()
+            reopened = MmapContainerYard(path, types=registry)
+            try:
+                self.assertEqual([(type(cont), cont.weight) for cont in reopened.store(1)],
+                                 [(HazardousContainer, 5000), (HeavyContainer, 4000)])
+            finally:
+                reopened.close()
+
+    def test_ship_history_is_bounded(self):
+        """
+        Test that a port keeps only recent visits in memory but counts every visit.
+        """
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, 'history.txt')
+        self.port1.ship_history = ShipHistory(limit=2, spill_path=path)
+        other_ship = self.management_system.create_ship(1, 16000, 10, 3, 0, 1, 10)
+        for ship in (self.ship, other_ship):
+            ship.re_fuel(1000000)
+        for ship in (self.ship, other_ship, self.ship):
+            self.assertIn(ship, self.port1.ship_current)
+            self.assertTrue(ship.sail_to(self.port2))
+            self.assertNotIn(ship, self.port1.ship_current)
+            self.assertTrue(ship.sail_to(self.port1))
+
+        history = self.port1.ship_history
+        self.assertEqual(list(history), [other_ship, self.ship])
+        self.assertEqual(history.visit_count(self.ship), 2)
+        self.assertIn(other_ship, history)
+        self.assertNotIn(other_ship, self.port2.ship_current)
+        self.assertEqual(history.spilled(), [self.ship.id])
+
+    def test_pack_items(self):
+        """
+        Test that items are packed into few containers of their own state.
+        """
+        specs = [('small', 500, 3), ('heavy', 1000, 2), ('liquid', 700, 5), ('small', 200, 4),
+                 ('refrigerated', 900, 1), ('heavy', 2500, 1), ('small', 9000, 1)]
+        items = (ItemFactory.create_item(kind, index, weight, count, 'x')
+                 for index, (kind, weight, count) in enumerate(specs))
+        report = self.management_system.pack_items(2, items, 4000)
+
+        self.assertEqual([cont.__class__.__name__ for cont in report.containers],
+                         ['HeavyContainer', 'HeavyContainer', 'LiquidContainer', 'RefrigeratedContainer'])
+        self.assertEqual([len(cont.items) for cont in report.containers], [2, 2, 1, 1])
+        self.assertEqual(report.fill_ratios, [4000 / 4000, 2800 / 4000, 3500 / 4000, 900 / 4000])
+        self.assertEqual([item.ID for item in report.rejected], [6])
+        self.assertEqual(len(self.port2.containers), 4)
+        self.assertTrue(all(item.container_id == report.containers[2].id for item in report.containers[2].items))
+
+    def test_profiler(self):
+        """
+        Test that the profiler counts calls and failure reasons only while it is enabled.
+        """
+        original_load = Ship.load
+        with Profiler() as profiler:
+            self.assertIsNot(Ship.load, original_load)
+            self.ship.load(self.container1)
+            self.ship.load(self.container3)
+            self.ship.load(self.container1)
+            self.assertFalse(self.ship.sail_to(self.port2))
+            with self.assertRaises(Exception):
+                self.management_system.create_container(1, 1000, 'X')
+            self.management_system.create_ship(1, 16000, 10, 3, 0, 1, 10)
+        self.assertIs(Ship.load, original_load)
+        self.ship.unload(self.container1)
+
+        stats = profiler.stats
+        self.assertEqual(stats['Ship.load'].calls, 3)
+        self.assertEqual(dict(stats['Ship.load'].failures), {'count limit': 1, 'not at port': 1})
+        self.assertEqual(dict(stats['Ship.sail_to'].failures), {'fuel': 1})
+        self.assertEqual(dict(stats['AdvancedPortManagementSystem.create_container'].failures), {'Invalid state': 1})
+        self.assertEqual(stats['ShipDirector.try_create_ship'].calls, 2)
+        self.assertEqual(stats['Ship.unload'].calls, 0)
+        self.assertIn('Ship.load', profiler.report())
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'port.prof')
+            profiler.dump_stats(path)
+            self.assertEqual(pstats.Stats(path).total_calls, sum(entry.calls for entry in stats.values()))
+
+    def test_container_type_counts(self):
+        """
+        Test that the per-category counts follow loads and unloads and that new container
+        types resolve through the type registry.
+        """
+        self.assertTrue(self.ship.load(self.container1))
+        self.assertTrue(self.ship.load(self.container4))
+        self.assertEqual(self.ship.number_of_containers,
+                         {'Container': 2, 'HeavyContainer': 2, 'LiquidContainer': 0, 'RefrigeratedContainer': 1})
+        self.assertEqual(self.ship.load_rejection(self.container3), 'count limit')
+        self.assertTrue(self.ship.unload(self.container1))
+        self.assertEqual(self.ship.number_of_containers['HeavyContainer'], 1)
+        self.ship.check_cached_totals()
+
+        class HazardousContainer(HeavyContainer):
+            pass
+
+        self.assertIs(CONTAINER_TYPES.get(HazardousContainer), CONTAINER_TYPES.get(HeavyContainer))
+        registry = ContainerTypeRegistry()
+        registry.register(HeavyContainer, ['Container', 'HeavyContainer'])
+        entry = registry.register(HazardousContainer, ['Container', 'HeavyContainer', 'HazardousContainer'])
+        self.assertEqual(entry.categories, (0, 1, 2))
+        self.assertEqual(entry.mask, 0b111)
+        with self.assertRaises(ValueError):
+            registry.register(HeavyContainer, ['Container'])
+        with self.assertRaises(KeyError):
+            registry.get(object)
 
 if __name__ == "__main__":
     unittest.main()
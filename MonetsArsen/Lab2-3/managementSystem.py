@@ -6,16 +6,25 @@ in a shipping simulation. It provides functionalities to create and manage conta
 and ships, as well as to print information about the ports in the system.
 
 Classes:
+    ShipRequirementsError: Raised when no ship type meets the requirements of a new ship.
     PortManagementSystem: A system for managing ports, ships, and containers.
 """
-from typing import List, Optional
+from typing import Dict, Iterable, List, Optional
 from abc import ABC, abstractmethod
 
 from port import Port, IPort
+from distance_matrix import DistanceMatrix
+from mmap_container_store import MmapContainerYard
+from packing import PackingReport, pack_items
 from ship import Ship, IShip, LightWeightShip, MediumShip, HeavyShip, Placeholder
 from item import Item
 from container import Container, BasicContainer, HeavyContainer, LiquidContainer, RefrigeratedContainer
 
+
+class ShipRequirementsError(Exception):
+    """Raised when no ship type meets the requirements of a new ship."""
+
+
 class IPortManagementSystem(ABC):
     """Interface for port management system operations."""
 
@@ -45,12 +54,21 @@ class IPortManagementSystem(ABC):
 class PortManagementSystem(IPortManagementSystem):
     """A system for managing ports, ships, and containers."""
 
-    def __init__(self):
-        """Initializes the PortManagementSystem with counters and a list of ports."""
+    def __init__(self, yard: Optional[MmapContainerYard] = None):
+        """Initializes the PortManagementSystem with counters, a list of ports, the created
+        ships by id and the distance matrix shared by the ports.
+
+        Args:
+            yard (Optional[MmapContainerYard]): A memory-mapped file to keep the containers of
+                all ports and ships in. Defaults to None, which keeps them in memory.
+        """
         self.container_id_count = 0
         self.port_id_count = 0
         self.ship_id_count = 0
         self.ports: List['Port'] = []
+        self.ships: Dict[int, 'Ship'] = {}
+        self.distance_matrix = DistanceMatrix()
+        self.yard = yard
 
     def create_container(self, port_id: int, weight: float, state: str = 'N', *items: Item) -> Container:
         """Creates a new container and adds it to the specified port.
@@ -93,7 +111,8 @@ class PortManagementSystem(IPortManagementSystem):
             IPort: The newly created port.
         """
         self.port_id_count += 1
-        self.ports.append(Port(self.port_id_count, (latitude, longitude)))
+        containers = self.yard.store(self.port_id_count) if self.yard is not None else None
+        self.ports.append(Port(self.port_id_count, (latitude, longitude), self.distance_matrix, containers))
         return self.ports[self.port_id_count - 1]
 
     def create_ship(self, port_id: int, max_weight: float, max_number: int,
@@ -121,9 +140,22 @@ class PortManagementSystem(IPortManagementSystem):
             RefrigeratedContainer.__name__: max_refrigerated_cont_number
         }
         ship = Ship(self.ship_id_count, 0, self.ports[port_id - 1], max_weight, max_number_cont, consumption)
-        self.ports[port_id - 1].incoming_ship(ship)
+        self.register_ship(ship)
         return ship
 
+    def register_ship(self, ship: Ship) -> None:
+        """Docks a newly created ship at its port and adds it to the system.
+
+        Ships keep their containers in the yard under the negated ship ID, when there is one.
+
+        Args:
+            ship (Ship): The new ship.
+        """
+        if self.yard is not None:
+            ship.containers = self.yard.store(-ship.id)
+        ship.current_port.incoming_ship(ship)
+        self.ships[ship.id] = ship
+
     def print_ports_information(self) -> None:
         """Prints information about all ports in the system, including
         their ID, coordinates, containers, ship history, and current ships."""
@@ -137,9 +169,14 @@ class PortManagementSystem(IPortManagementSystem):
 class AdvancedPortManagementSystem(IPortManagementSystem):
     """Advanced management system for managing ports with additional functionalities."""
 
-    def __init__(self):
-        """Initializes the AdvancedPortManagementSystem."""
-        self.port_management = PortManagementSystem()
+    def __init__(self, yard: Optional[MmapContainerYard] = None):
+        """Initializes the AdvancedPortManagementSystem.
+
+        Args:
+            yard (Optional[MmapContainerYard]): A memory-mapped file to keep the containers in.
+                Defaults to None, which keeps them in memory.
+        """
+        self.port_management = PortManagementSystem(yard)
 
     def create_container(self, port_id: int, weight: float, state: str = 'N', *items: Item) -> Container:
         """Creates a container and adds it to the specified port, managing item placement.
@@ -161,8 +198,7 @@ class AdvancedPortManagementSystem(IPortManagementSystem):
         for item in items:
             if total_weight + item.get_total_weight() > weight:
                 raise Exception(f"Cannot put item {item.get_item_details()} in container (no space)")
-            item_state = 'N' if item.__class__.__name__ == 'Normal' else 'L' if item.__class__.__name__ == 'Liquid' else 'R'
-            if state != item_state:
+            if state != item.STATE:
                 raise Exception(f"Cannot put item {item.get_item_details()} in container (state mismatch)")
             total_weight += item.get_total_weight()
             container.add_item(item)
@@ -198,7 +234,7 @@ class AdvancedPortManagementSystem(IPortManagementSystem):
             IShip: The newly created ship.
 
         Raises:
-            Exception: If the ship cannot be created due to constraints.
+            ShipRequirementsError: If the ship cannot be created due to constraints.
         """
         builders: List[IShipBuilder] = [
             LightWeightShipBuilder(self.port_management.ship_id_count + 1, self.port_management.ports[port_id - 1],
@@ -217,9 +253,45 @@ class AdvancedPortManagementSystem(IPortManagementSystem):
             ship = director.try_create_ship()
             if ship is not None:
                 self.port_management.ship_id_count += 1
-                self.port_management.ports[port_id - 1].incoming_ship(ship)
+                self.port_management.register_ship(ship)
                 return ship
-        raise Exception(f"Too big requirements")
+        raise ShipRequirementsError("Too big requirements")
+
+    def load_batch(self, ship_id: int, containers: List[Container]) -> List[Container]:
+        """Loads a batch of containers onto a ship in one pass.
+
+        The ship takes as many of the containers as its weight and type limits allow;
+        containers that are not at the ship's current port are skipped.
+
+        Args:
+            ship_id (int): The ID of the ship to load.
+            containers (List[Container]): The containers to load.
+
+        Returns:
+            List[Container]: The containers that were loaded.
+
+        Raises:
+            Exception: If there is no ship with the given ID.
+        """
+        if ship_id not in self.port_management.ships:
+            raise Exception(f"Ship {ship_id} does not exist")
+        return self.port_management.ships[ship_id].load_batch(containers)
+
+    def pack_items(self, port_id: int, items: Iterable[Item], capacity: float) -> PackingReport:
+        """Packs items into as few new containers at a port as possible.
+
+        Items are grouped by state and packed with the first-fit-decreasing heuristic.
+
+        Args:
+            port_id (int): The ID of the port to create the containers at.
+            items (Iterable[Item]): The items to pack.
+            capacity (float): The weight every container can hold.
+
+        Returns:
+            PackingReport: The created containers, their fill ratios and the items that are
+            too heavy for a container.
+        """
+        return pack_items(self, port_id, items, capacity)
 
     def print_ports_information(self) -> None:
         """Prints information about all ports in the advanced system."""
@@ -0,0 +1,350 @@
+"""
+Memory-Mapped Container Store
+
+This module defines a container store backend that keeps containers as fixed-width
+records in a memory-mapped file instead of as Python objects, so the size of a terminal
+is limited by disk space rather than by memory.
+
+All containers of a system live in one `MmapContainerYard` file. The record of a
+container is found at the offset given by its identifier, and holds its type, weight,
+location (the port or ship it is at) and links to the previous and next container at
+the same location. Every location is therefore a doubly linked list inside the file, and
+adding, removing and looking up a container are constant-time operations that touch only
+a few records. The operating system pages the records in and out as needed.
+
+`MmapContainerStore` is the view of one location and has the same API as
+`ContainerStore`, so ports and ships can use either backend. Iterating over it creates
+container objects from the records on the fly; items put into containers are not
+stored in the records. The type of a container is stored as its code in a container
+type registry, so every registered type can be stored; a container of an unregistered
+subclass comes back as its nearest registered base class.
+
+Classes:
+    MmapContainerYard: The memory-mapped file with the records of all containers.
+    MmapContainerStore: The containers at one location of a yard.
+
+Dependencies:
+    - container.Container
+    - container_types (the registry of the container types)
+"""
+
+import mmap
+import os
+import struct
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from container import Container
+from container_types import CONTAINER_TYPES, ContainerTypeRegistry
+
+# id, weight, location, previous id, next id, type code, padding
+RECORD = struct.Struct('<qdqqqB7x')
+NO_LINK = -1
+EMPTY = 0
+# The type code of a record is the code of the type in the registry plus one, as 0 marks
+# an empty record
+MAX_TYPE_CODE = 255
+
+
+class MmapContainerYard:
+    """
+    A memory-mapped file with fixed-width records of containers.
+
+    The file grows by doubling when a container with a larger identifier is added. It is
+    created sparse, so the unused records of missing identifiers take no disk space on
+    most file systems.
+
+    Attributes:
+        path (str): The path of the file.
+        types (ContainerTypeRegistry): The registry the type codes of the records refer to.
+    """
+
+    def __init__(self, path: str, capacity: int = 1024,
+                 types: ContainerTypeRegistry = CONTAINER_TYPES) -> None:
+        """
+        Open a yard file, creating it if it does not exist.
+
+        The locations of an existing file are restored by one scan over its records.
+
+        Args:
+            path (str): The path of the file.
+            capacity (int): The initial number of records of a new file. Defaults to 1024.
+            types (ContainerTypeRegistry): The registry the type codes of the records refer
+                to. Defaults to CONTAINER_TYPES.
+        """
+        self.path = path
+        self.types = types
+        self._file = open(path, 'a+b')
+        size = os.fstat(self._file.fileno()).st_size
+        if size < RECORD.size * capacity:
+            self._file.truncate(RECORD.size * capacity)
+            size = RECORD.size * capacity
+        self._capacity = size // RECORD.size
+        self._map = mmap.mmap(self._file.fileno(), self._capacity * RECORD.size)
+        # location -> [head, tail, count]
+        self._locations: Dict[int, List[int]] = {}
+        self._restore_locations()
+
+    def store(self, location: int) -> 'MmapContainerStore':
+        """
+        Get the store of the containers at a location.
+
+        Args:
+            location (int): The identifier of the location, e.g. a port id, or a negated
+                ship id for ships.
+
+        Returns:
+            MmapContainerStore: The store of the location.
+        """
+        return MmapContainerStore(self, location)
+
+    def flush(self) -> None:
+        """Write the changed records to the file."""
+        self._map.flush()
+
+    def close(self) -> None:
+        """Flush and close the file."""
+        self._map.flush()
+        self._map.close()
+        self._file.close()
+
+    def _restore_locations(self) -> None:
+        """Rebuild the heads, tails and sizes of the locations from the records."""
+        for identifier in range(self._capacity):
+            _, _, location, previous, following, code = self._read(identifier)
+            if code == EMPTY:
+                continue
+            head_tail_count = self._locations.setdefault(location, [NO_LINK, NO_LINK, 0])
+            if previous == NO_LINK:
+                head_tail_count[0] = identifier
+            if following == NO_LINK:
+                head_tail_count[1] = identifier
+            head_tail_count[2] += 1
+
+    def _read(self, identifier: int) -> Tuple[int, float, int, int, int, int]:
+        """
+        Read the record of a container.
+
+        Args:
+            identifier (int): The identifier of the container.
+
+        Returns:
+            Tuple[int, float, int, int, int, int]: The id, weight, location, previous id,
+            next id and type code. The type code is 0 if there is no such container.
+        """
+        if identifier < 0 or identifier >= self._capacity:
+            return identifier, 0.0, 0, NO_LINK, NO_LINK, EMPTY
+        return RECORD.unpack_from(self._map, identifier * RECORD.size)
+
+    def _set_link(self, identifier: int, field: int, value: int) -> None:
+        """
+        Change the previous (field 3) or next (field 4) link of a record.
+
+        Args:
+            identifier (int): The identifier of the container.
+            field (int): The index of the field in the record.
+            value (int): The new link.
+        """
+        record = list(self._read(identifier))
+        record[field] = value
+        RECORD.pack_into(self._map, identifier * RECORD.size, *record)
+
+    def _grow(self, identifier: int) -> None:
+        """
+        Grow the file so that it has a record for the given identifier.
+
+        Args:
+            identifier (int): The identifier that must fit.
+        """
+        capacity = max(identifier + 1, self._capacity * 2)
+        self._map.flush()
+        self._map.close()
+        self._file.truncate(capacity * RECORD.size)
+        self._capacity = capacity
+        self._map = mmap.mmap(self._file.fileno(), capacity * RECORD.size)
+
+    def _location_of(self, identifier: int) -> Optional[int]:
+        """
+        Get the location of a container.
+
+        Args:
+            identifier (int): The identifier of the container.
+
+        Returns:
+            Optional[int]: The location, or None if the container is not in the yard.
+        """
+        _, _, location, _, _, code = self._read(identifier)
+        return None if code == EMPTY else location
+
+    def _add(self, location: int, cont: Container) -> None:
+        """
+        Add a container to the end of a location.
+
+        Args:
+            location (int): The location.
+            cont (Container): The container to add.
+
+        Raises:
+            ValueError: If the container is already stored, its identifier is negative, or
+                its type is not registered.
+        """
+        if cont.id < 0:
+            raise ValueError(f'Container id {cont.id} cannot be stored')
+        try:
+            type_code = self.types.get(type(cont)).code + 1
+        except KeyError:
+            raise ValueError(f'{type(cont).__name__} is not a registered container type') from None
+        if type_code > MAX_TYPE_CODE:
+            raise ValueError(f'{type(cont).__name__} has no type code that fits into a record')
+        stored_at = self._location_of(cont.id)
+        if stored_at == location:
+            return
+        if stored_at is not None:
+            raise ValueError(f'Container with id {cont.id} is already stored')
+        if cont.id >= self._capacity:
+            self._grow(cont.id)
+        head_tail_count = self._locations.setdefault(location, [NO_LINK, NO_LINK, 0])
+        tail = head_tail_count[1]
+        RECORD.pack_into(self._map, cont.id * RECORD.size, cont.id, cont.weight, location,
+                         tail, NO_LINK, type_code)
+        if tail == NO_LINK:
+            head_tail_count[0] = cont.id
+        else:
+            self._set_link(tail, 4, cont.id)
+        head_tail_count[1] = cont.id
+        head_tail_count[2] += 1
+
+    def _remove(self, location: int, identifier: int) -> None:
+        """
+        Remove a container from a location and clear its record.
+
+        Args:
+            location (int): The location.
+            identifier (int): The identifier of the container.
+        """
+        _, _, _, previous, following, _ = self._read(identifier)
+        head_tail_count = self._locations[location]
+        if previous == NO_LINK:
+            head_tail_count[0] = following
+        else:
+            self._set_link(previous, 4, following)
+        if following == NO_LINK:
+            head_tail_count[1] = previous
+        else:
+            self._set_link(following, 3, previous)
+        head_tail_count[2] -= 1
+        RECORD.pack_into(self._map, identifier * RECORD.size, 0, 0.0, 0, NO_LINK, NO_LINK, EMPTY)
+
+    def _container(self, identifier: int) -> Container:
+        """
+        Create a container object from its record.
+
+        Args:
+            identifier (int): The identifier of the container.
+
+        Returns:
+            Container: The container.
+        """
+        _, weight, _, _, _, code = self._read(identifier)
+        return self.types.classes[code - 1](identifier=identifier, weight=weight)
+
+
+class MmapContainerStore:
+    """
+    The containers at one location of a memory-mapped yard.
+
+    The store has the same API as `ContainerStore`. Containers are matched by their
+    identifier, as the objects returned by the store are created from the records.
+
+    Attributes:
+        yard (MmapContainerYard): The yard the records are kept in.
+        location (int): The location of the containers in this store.
+    """
+
+    def __init__(self, yard: MmapContainerYard, location: int) -> None:
+        """
+        Initialize a MmapContainerStore object.
+
+        Args:
+            yard (MmapContainerYard): The yard the records are kept in.
+            location (int): The location of the containers in this store.
+        """
+        self.yard = yard
+        self.location = location
+
+    def __contains__(self, cont: object) -> bool:
+        """
+        Check if the given container is in the store.
+
+        Args:
+            cont (Container): The container to look up.
+
+        Returns:
+            bool: True if a container with this id is at this location, False otherwise.
+        """
+        identifier = getattr(cont, 'id', None)
+        return isinstance(identifier, int) and self.yard._location_of(identifier) == self.location
+
+    def __iter__(self) -> Iterator[Container]:
+        """Iterate over the containers in insertion order."""
+        identifier = self.yard._locations.get(self.location, [NO_LINK])[0]
+        while identifier != NO_LINK:
+            following = self.yard._read(identifier)[4]
+            yield self.yard._container(identifier)
+            identifier = following
+
+    def __len__(self) -> int:
+        """Return the number of stored containers."""
+        return self.yard._locations.get(self.location, [NO_LINK, NO_LINK, 0])[2]
+
+    def __repr__(self) -> str:
+        """Return the same representation as a list of the stored containers."""
+        return repr(list(self))
+
+    def append(self, cont: Container) -> None:
+        """
+        Add a container to the end of the store.
+
+        Args:
+            cont (Container): The container to add.
+
+        Raises:
+            ValueError: If a container with the same id is stored at another location.
+        """
+        self.yard._add(self.location, cont)
+
+    def remove(self, cont: Container) -> None:
+        """
+        Remove a container from the store.
+
+        Args:
+            cont (Container): The container to remove.
+
+        Raises:
+            ValueError: If the container is not in the store.
+        """
+        if cont not in self:
+            raise ValueError('MmapContainerStore.remove(x): x not in store')
+        self.yard._remove(self.location, cont.id)
+
+    def get(self, identifier: int) -> Optional[Container]:
+        """
+        Get a stored container by its id.
+
+        Args:
+            identifier (int): The id of the container.
+
+        Returns:
+            Optional[Container]: The container, or None if it is not stored.
+        """
+        if self.yard._location_of(identifier) != self.location:
+            return None
+        return self.yard._container(identifier)
+
+    def copy(self) -> List[Container]:
+        """
+        Get the stored containers as a new list in insertion order.
+
+        Returns:
+            List[Container]: A list of the stored containers.
+        """
+        return list(self)
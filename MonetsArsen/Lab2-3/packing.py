@@ -0,0 +1,130 @@
+"""
+Item Packing
+
+This module packs a stream of items into as few containers as possible. Items can only
+share a container with items of the same state ('N', 'L' or 'R'), so they are grouped by
+state first and every group is packed with the first-fit-decreasing heuristic: items are
+sorted from the heaviest to the lightest and each one is put into the first container
+that still has room for it.
+
+The first container with enough room is found with a tree of the remaining capacities
+(every inner node keeps the largest remaining capacity below it), so packing n items
+takes O(n log n) time instead of scanning all open containers for every item.
+
+Classes:
+    PackingReport: The containers created by a packing and how full they are.
+
+Functions:
+    first_fit_decreasing: Splits weights into bins of a fixed capacity.
+    pack_items: Packs items into new containers at a port.
+
+Dependencies:
+    - container.Container (for type checking)
+    - item.Item (for type checking)
+    - managementSystem.IPortManagementSystem (for type checking)
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from container import Container
+    from item import Item
+    from managementSystem import IPortManagementSystem
+
+STATES = ('N', 'L', 'R')
+
+
+@dataclass
+class PackingReport:
+    """The containers created by a packing and how full they are.
+
+    Attributes:
+        containers (List[Container]): The created containers.
+        fill_ratios (List[float]): The share of the capacity used in every container.
+        rejected (List[Item]): The items heavier than the capacity of a container.
+    """
+
+    containers: List['Container'] = field(default_factory=list)
+    fill_ratios: List[float] = field(default_factory=list)
+    rejected: List['Item'] = field(default_factory=list)
+
+    @property
+    def mean_fill_ratio(self) -> float:
+        """The mean fill ratio of the created containers, or 0 if none were created."""
+        return sum(self.fill_ratios) / len(self.fill_ratios) if self.fill_ratios else 0.0
+
+
+def first_fit_decreasing(weights: List[float], capacity: float) -> List[List[int]]:
+    """Splits weights into as few bins of a fixed capacity as the heuristic finds.
+
+    Args:
+        weights (List[float]): The weights to split. Every weight must fit into a bin.
+        capacity (float): The capacity of a bin.
+
+    Returns:
+        List[List[int]]: The indices of the weights in every bin, heaviest first.
+
+    Raises:
+        ValueError: If a weight is larger than the capacity.
+    """
+    if not weights:
+        return []
+    if max(weights) > capacity:
+        raise ValueError('A weight is larger than the bin capacity')
+    size = 1
+    while size < len(weights):
+        size *= 2
+    # Leaves are the remaining capacities of the bins, inner nodes the maximum of their children
+    remaining = [capacity] * (2 * size)
+    bins: List[List[int]] = []
+    for index in sorted(range(len(weights)), key=lambda index: weights[index], reverse=True):
+        weight = weights[index]
+        node = 1
+        while node < size:
+            node = 2 * node if remaining[2 * node] >= weight else 2 * node + 1
+        position = node - size
+        if position == len(bins):
+            bins.append([])
+        bins[position].append(index)
+        remaining[node] -= weight
+        node //= 2
+        while node:
+            remaining[node] = max(remaining[2 * node], remaining[2 * node + 1])
+            node //= 2
+    return bins
+
+
+def pack_items(system: 'IPortManagementSystem', port_id: int, items: Iterable['Item'],
+               capacity: float) -> PackingReport:
+    """Packs items into as few new containers at a port as the heuristic finds.
+
+    Containers are created through the management system, with `capacity` as their
+    weight and the state of their items.
+
+    Args:
+        system (IPortManagementSystem): The system to create the containers in.
+        port_id (int): The ID of the port to create the containers at.
+        items (Iterable[Item]): The items to pack, e.g. a generator of `ItemFactory` items.
+        capacity (float): The weight every container can hold.
+
+    Returns:
+        PackingReport: The created containers, their fill ratios and the items that fit
+        into no container.
+    """
+    report = PackingReport()
+    by_state: Dict[str, List['Item']] = {state: [] for state in STATES}
+    for item in items:
+        if item.get_total_weight() > capacity:
+            report.rejected.append(item)
+        else:
+            by_state[item.STATE].append(item)
+
+    for state in STATES:
+        group = by_state[state]
+        weights = [item.get_total_weight() for item in group]
+        for indices in first_fit_decreasing(weights, capacity):
+            container = system.create_container(port_id, capacity, state, *(group[index] for index in indices))
+            report.containers.append(container)
+            report.fill_ratios.append(sum(weights[index] for index in indices) / capacity)
+    return report
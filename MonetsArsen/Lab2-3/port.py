@@ -11,15 +11,23 @@ Classes:
 
 Dependencies:
     - container.Container (for type checking)
+    - container_store.ContainerStore
+    - mmap_container_store.MmapContainerStore (for type checking)
+    - ship_history.CurrentShips, ship_history.ShipHistory
     - ship.IShip (for type checking)
 """
 
 from abc import abstractmethod, ABC
-from typing import Tuple, List, Self, TYPE_CHECKING
+from typing import Tuple, Optional, Self, Union, TYPE_CHECKING
 import math
 
+from container_store import ContainerStore
+from ship_history import CurrentShips, ShipHistory
+
 if TYPE_CHECKING:
     from container import Container
+    from distance_matrix import DistanceMatrix
+    from mmap_container_store import MmapContainerStore
     from ship import IShip
 
 class IPort(ABC):
@@ -65,42 +73,75 @@ class Port(IPort):
     Attributes:
         id (int): The unique identifier for the port.
         coordinates (Tuple[float, float]): The geographic coordinates of the port.
-        containers (List[Container]): The list of containers at the port.
-        ship_history (List[IShip]): The list of ships that have visited the port.
-        ship_current (List[IShip]): The list of ships currently at the port.
+        containers (Union[ContainerStore, MmapContainerStore]): The containers at the port, indexed by id.
+        ship_history (ShipHistory): The recent departures from the port and the visit
+            counters of all ships that have visited it.
+        ship_current (CurrentShips): The ships currently at the port, indexed by id.
+        distance_matrix (Optional[DistanceMatrix]): The shared matrix the distances are read from.
     """
 
-    def __init__(self, identifier: int, coordinates: Tuple[float, float]) -> None:
+    def __init__(self, identifier: int, coordinates: Tuple[float, float],
+                 distance_matrix: Optional['DistanceMatrix'] = None,
+                 containers: Optional['MmapContainerStore'] = None,
+                 ship_history: Optional[ShipHistory] = None) -> None:
         """
         Initialize a Port object.
 
         Args:
             identifier (int): The unique identifier for the port.
             coordinates (Tuple[float, float]): The geographic coordinates of the port.
+            distance_matrix (Optional[DistanceMatrix]): The shared distance matrix. The port
+                is registered in it. Defaults to None.
+            containers (Optional[MmapContainerStore]): A memory-mapped store to keep the
+                containers in. Defaults to None, which keeps them in a ContainerStore.
+            ship_history (Optional[ShipHistory]): The history to record the visits in, e.g.
+                one with a different limit or a spill file. Defaults to None, which
+                creates a history of the last 1000 visits.
         """
         self.id = identifier
         self.coordinates = coordinates
-        self.containers: List[Container] = []
-        self.ship_history: List['IShip'] = []
-        self.ship_current: List['IShip'] = []
+        self.distance_matrix = distance_matrix
+        if distance_matrix is not None:
+            distance_matrix.register(self)
+        self.containers: Union[ContainerStore, 'MmapContainerStore'] = \
+            containers if containers is not None else ContainerStore()
+        self.ship_history: ShipHistory = ship_history if ship_history is not None else ShipHistory()
+        self.ship_current: CurrentShips = CurrentShips()
 
     def get_distance(self, port: Self) -> float:
         """
         Calculate the distance between two ports.
 
+        The distance is read from the shared distance matrix when both ports are
+        registered in it. Otherwise it is computed with the metric of the matrix of
+        either port, or as a plane distance if neither port has a matrix.
+
         Args:
             port (Port): The other port to calculate the distance to.
 
         Returns:
             float: The distance between the two ports.
+
+        Raises:
+            ValueError: If the ports are registered in matrices with different metrics.
         """
+        matrix, other_matrix = self.distance_matrix, port.distance_matrix
+        if matrix is not None and other_matrix is matrix:
+            return matrix.get_distance(self, port)
+        if matrix is not None and other_matrix is not None and matrix.metric != other_matrix.metric:
+            raise ValueError(f"Ports {self.id} and {port.id} use different distance metrics: "
+                             f"{matrix.metric} and {other_matrix.metric}")
+        if matrix is None:
+            matrix = other_matrix
+        if matrix is not None:
+            return matrix.distance(self.coordinates, port.coordinates)
         return math.sqrt((self.coordinates[0] - port.coordinates[0]) ** 2 + (self.coordinates[1] - port.coordinates[1]) ** 2)
 
     def incoming_ship(self, ship: 'IShip') -> None:
         """
         Handle an incoming ship.
 
-        Add the ship to the list of ships currently at the port.
+        Add the ship to the ships currently at the port.
 
         Args:
             ship (IShip): The ship that is arriving at the port.
@@ -114,8 +155,8 @@ class Port(IPort):
         """
         Handle an outgoing ship.
 
-        Remove the ship from the list of ships currently at the port and add it to the
-        list of ships that have visited the port.
+        Remove the ship from the ships currently at the port and record the visit in the
+        ship history.
 
         Args:
             ship (IShip): The ship that is departing from the port.
@@ -123,10 +164,7 @@ class Port(IPort):
         Returns:
             None
         """
-        if ship in self.ship_current:
-            self.ship_current.remove(ship)
-
-            if ship not in self.ship_history:
-                self.ship_history.append(ship)
+        if self.ship_current.discard(ship):
+            self.ship_history.record(ship)
 
 
@@ -0,0 +1,186 @@
+"""
+Scenario Runner
+
+This module runs many variations of a port scenario and compares their fuel costs. A
+scenario is described by a `ScenarioConfig` made only of numbers and tuples, so it is
+cheap to pickle and send to another process; every worker builds its own world from
+the config with `AdvancedPortManagementSystem` (ships are created through the ship
+builders and `ShipDirector`), sails the voyages and sends back a small
+`ScenarioResult`. `run_sweep` fans the configs out over a `ProcessPoolExecutor` and
+collects the results into a `SweepReport`.
+
+Classes:
+    ScenarioConfig: The description of one scenario.
+    ScenarioResult: The fuel and utilization figures of one scenario.
+    SweepReport: The results of a sweep over many scenarios.
+
+Functions:
+    run_scenario: Runs a single scenario.
+    run_sweep: Runs many scenarios in parallel.
+
+Dependencies:
+    - managementSystem.AdvancedPortManagementSystem
+    - managementSystem.ShipRequirementsError
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import List, Optional, Sequence, Tuple
+
+from managementSystem import AdvancedPortManagementSystem, ShipRequirementsError
+
+
+@dataclass(frozen=True)
+class ScenarioConfig:
+    """The description of one scenario.
+
+    Attributes:
+        name (str): The name of the scenario in the report.
+        ports (Tuple[Tuple[float, float], ...]): The (longitude, latitude) of every port.
+            Ports get the IDs 1, 2, ... in this order.
+        ships (Tuple[Tuple, ...]): For every ship: (port_id, max_weight, max_number,
+            max_heavy_cont_number, max_liquid_cont_number, max_refrigerated_cont_number,
+            consumption, fuel).
+        containers (Tuple[Tuple[int, float, str], ...]): For every container:
+            (port_id, weight, state).
+        voyages (Tuple[Tuple[int, int, Tuple[int, ...]], ...]): For every voyage:
+            (ship index, destination port ID, indices of the containers to load). The
+            loaded containers are unloaded at the destination.
+    """
+
+    name: str
+    ports: Tuple[Tuple[float, float], ...]
+    ships: Tuple[Tuple, ...]
+    containers: Tuple[Tuple[int, float, str], ...] = ()
+    voyages: Tuple[Tuple[int, int, Tuple[int, ...]], ...] = ()
+
+
+@dataclass
+class ScenarioResult:
+    """The fuel and utilization figures of one scenario.
+
+    Attributes:
+        name (str): The name of the scenario.
+        fuel_used (float): The fuel burned by all ships.
+        voyages_sailed (int): The number of voyages that were sailed.
+        voyages_failed (int): The number of voyages the ship could not sail.
+        ships_rejected (int): The number of ships no builder could create.
+        containers_moved (int): The number of containers carried to their destination.
+        utilization (float): The mean share of the ship's weight capacity used on the
+            sailed voyages.
+    """
+
+    name: str
+    fuel_used: float = 0.0
+    voyages_sailed: int = 0
+    voyages_failed: int = 0
+    ships_rejected: int = 0
+    containers_moved: int = 0
+    utilization: float = 0.0
+
+
+@dataclass
+class SweepReport:
+    """The results of a sweep over many scenarios.
+
+    Attributes:
+        results (List[ScenarioResult]): The result of every scenario, in input order.
+    """
+
+    results: List[ScenarioResult] = field(default_factory=list)
+
+    @property
+    def total_fuel(self) -> float:
+        """The fuel burned over all scenarios."""
+        return sum(result.fuel_used for result in self.results)
+
+    def cheapest(self) -> Optional[ScenarioResult]:
+        """Gets the scenario with the lowest fuel cost among those where every voyage was sailed.
+
+        Returns:
+            Optional[ScenarioResult]: The cheapest scenario, or None if every scenario had failures.
+        """
+        complete = [result for result in self.results if not result.voyages_failed and not result.ships_rejected]
+        return min(complete, key=lambda result: result.fuel_used, default=None)
+
+    def format(self) -> str:
+        """Formats the report as a table with one row per scenario.
+
+        Returns:
+            str: The formatted report.
+        """
+        lines = [f"{'Scenario':<20} {'Fuel':>14} {'Sailed':>7} {'Failed':>7} {'Moved':>7} {'Util':>6}"]
+        for result in self.results:
+            lines.append(f"{result.name:<20} {result.fuel_used:>14.1f} {result.voyages_sailed:>7} "
+                         f"{result.voyages_failed + result.ships_rejected:>7} {result.containers_moved:>7} "
+                         f"{result.utilization:>6.1%}")
+        cheapest = self.cheapest()
+        lines.append(f"Total fuel: {self.total_fuel:.1f}. Cheapest: {cheapest.name if cheapest else '-'}")
+        return '\n'.join(lines)
+
+
+def run_scenario(config: ScenarioConfig) -> ScenarioResult:
+    """Builds the world of a scenario and sails its voyages in order.
+
+    Args:
+        config (ScenarioConfig): The scenario to run.
+
+    Returns:
+        ScenarioResult: The figures of the run.
+    """
+    result = ScenarioResult(config.name)
+    system = AdvancedPortManagementSystem()
+    for longitude, latitude in config.ports:
+        system.create_port(longitude, latitude)
+    ships = []
+    for port_id, *limits, fuel in config.ships:
+        try:
+            ship = system.create_ship(port_id, *limits)
+        except ShipRequirementsError:
+            result.ships_rejected += 1
+            ships.append(None)
+            continue
+        ship.re_fuel(fuel)
+        ships.append(ship)
+    containers = [system.create_container(port_id, weight, state) for port_id, weight, state in config.containers]
+
+    utilization = 0.0
+    for ship_index, port_id, container_indices in config.voyages:
+        ship = ships[ship_index]
+        if ship is None:
+            result.voyages_failed += 1
+            continue
+        loaded = system.load_batch(ship.id, [containers[index] for index in container_indices])
+        fuel = ship.get_fuel()
+        if not ship.sail_to(system.port_management.ports[port_id - 1]):
+            result.voyages_failed += 1
+            continue
+        result.fuel_used += fuel - ship.get_fuel()
+        result.voyages_sailed += 1
+        utilization += ship.weight_of_containers / ship.total_weight_capacity
+        for cont in loaded:
+            if ship.unload(cont):
+                result.containers_moved += 1
+    if result.voyages_sailed:
+        result.utilization = utilization / result.voyages_sailed
+    return result
+
+
+def run_sweep(configs: Sequence[ScenarioConfig], max_workers: Optional[int] = None,
+              chunksize: int = 1) -> SweepReport:
+    """Runs many scenarios, in parallel processes when more than one worker is allowed.
+
+    Args:
+        configs (Sequence[ScenarioConfig]): The scenarios to run.
+        max_workers (Optional[int]): The number of worker processes. Defaults to the
+            number of CPUs; 1 runs the scenarios in the current process.
+        chunksize (int): The number of scenarios sent to a worker at once. Larger chunks
+            pay off for many small scenarios. Defaults to 1.
+
+    Returns:
+        SweepReport: The results of all scenarios, in input order.
+    """
+    if max_workers == 1 or len(configs) <= 1:
+        return SweepReport([run_scenario(config) for config in configs])
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        return SweepReport(list(executor.map(run_scenario, configs, chunksize=chunksize)))
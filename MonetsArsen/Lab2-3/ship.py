@@ -12,7 +12,7 @@ Classes:
 Key Functionalities:
     - Loading and unloading containers with weight and type checks.
     - Sailing to different ports while calculating fuel consumption based on distance
-      and current container loads.
+      and current container loads, which are kept as running totals by load/unload.
     - Refueling operations to manage the ship's fuel reserves.
     - Retrieving the list of currently loaded containers, sorted by their identifier.
 
@@ -21,8 +21,10 @@ the port and container classes used in ship operations.
 """
 from abc import abstractmethod, ABC
 from dataclasses import dataclass
-from container import HeavyContainer
-from typing import Dict, List, TYPE_CHECKING
+import math
+from container_store import ContainerStore
+from container_types import CONTAINER_TYPES, ContainerType
+from typing import Dict, List, Optional, TYPE_CHECKING
 
 if TYPE_CHECKING:
     from port import Port, IPort
@@ -44,6 +46,28 @@ class IShip(ABC):
         """
         pass
 
+    def depart(self, port: 'IPort') -> bool:
+        """Leaves the current port for the specified port, without arriving there yet.
+
+        Ships that cannot split a voyage sail the whole way here with `sail_to`.
+
+        Args:
+            port (IPort): The port to sail to.
+
+        Returns:
+            bool: True if the ship leaves for the port, False otherwise.
+        """
+        return self.sail_to(port)
+
+    def arrive(self, port: 'IPort') -> None:
+        """Arrives at the port the ship departed for.
+
+        Ships that sail the whole way in `depart` have nothing left to do here.
+
+        Args:
+            port (IPort): The port the ship arrives at.
+        """
+
     @abstractmethod
     def re_fuel(self, new_fuel: float) -> None:
         """Refuels the ship with the specified amount of fuel.
@@ -79,7 +103,19 @@ class IShip(ABC):
 
 
 class Ship(IShip):
-    """Class representing a ship with cargo management capabilities."""
+    """Class representing a ship with cargo management capabilities.
+
+    The number of containers is kept per limit category of the container type registry,
+    in a list indexed by category, together with a bitmask of the categories that are
+    full. Checking whether a container fits the type limits is a single AND of that mask
+    with the mask of the container type.
+
+    Attributes:
+        DEBUG (bool): If True, the cached container totals are recomputed and checked
+            before every voyage.
+    """
+
+    DEBUG = False
 
     def __init__(self, identifier: int, fuel: float, current_port: 'Port', total_weight_capacity: float,
                  max_number_of_containers: Dict[str, int], fuel_consumption: float):
@@ -95,18 +131,19 @@ class Ship(IShip):
         """
         self.id: int = identifier
         self.fuel: float = fuel
-        self.current_port: 'Port' = current_port
+        # None while the ship is at sea, between depart and arrive
+        self.current_port: Optional['Port'] = current_port
         self.total_weight_capacity: float = total_weight_capacity
         self.fuel_consumption_per_KM: float = fuel_consumption
         self.max_number_of_containers: Dict[str, int] = max_number_of_containers
-        self.number_of_containers: Dict[str, int] = {
-            'Container': 0,
-            'HeavyContainer': 0,
-            'LiquidContainer': 0,
-            'RefrigeratedContainer': 0
-        }
+        self._counts: List[int] = []
+        self._limits: List[float] = []
+        self._full_mask: int = 0
+        self._add_categories()
         self.weight_of_containers: float = 0
-        self.containers: List['Container'] = []
+        self.weight_by_type: Dict[str, float] = {}
+        self.containers_consumption: float = 0
+        self.containers: ContainerStore = ContainerStore()
 
     def re_fuel(self, new_fuel: float) -> None:
         """Refuels the ship with the specified amount of fuel.
@@ -125,19 +162,46 @@ class Ship(IShip):
         Returns:
             bool: True if the ship successfully sails to the port, False otherwise.
         """
+        if not self.depart(port):
+            return False
+        self.arrive(port)
+        return True
+
+    def depart(self, port: 'IPort') -> bool:
+        """Leaves the current port for the specified port, burning the fuel of the voyage.
+
+        Until `arrive` is called the ship is at sea: it is at no port and its
+        `current_port` is None, so it cannot load or unload containers.
+
+        Args:
+            port (IPort): The port to sail to.
+
+        Returns:
+            bool: True if the ship leaves for the port, False if it does not have enough fuel.
+        """
+        if self.current_port is None:
+            raise Exception('The ship is at sea')
         if not isinstance(port, self.current_port.__class__):
             raise Exception('Cannot reach this port (maybe is not a port)')
-        consumed_fuel = self.current_port.get_distance(port) * self.fuel_consumption_per_KM
-        for container in self.containers:
-            consumed_fuel += container.consumption()
+        if self.DEBUG:
+            self.check_cached_totals()
+        consumed_fuel = self.current_port.get_distance(port) * self.fuel_consumption_per_KM + self.containers_consumption
         if consumed_fuel <= self.fuel:
             self.fuel -= consumed_fuel
             self.current_port.outgoing_ship(self)
-            self.current_port = port
-            self.current_port.incoming_ship(self)
+            self.current_port = None
             return True
         return False
 
+    def arrive(self, port: 'IPort') -> None:
+        """Arrives at the port the ship departed for.
+
+        Args:
+            port (IPort): The port the ship arrives at.
+        """
+        self.current_port = port
+        port.incoming_ship(self)
+
     def load(self, cont: 'Container') -> bool:
         """Loads a container onto the ship.
 
@@ -147,27 +211,112 @@ class Ship(IShip):
         Returns:
             bool: True if the container is successfully loaded, False otherwise.
         """
-        if cont not in self.current_port.containers:
-            return False
-        if self.weight_of_containers + cont.weight > self.total_weight_capacity:
-            return False
-        if self.max_number_of_containers['Container'] == self.number_of_containers['Container']:
+        if self.load_rejection(cont) is not None:
             return False
-        if isinstance(cont, HeavyContainer):
-            if self.max_number_of_containers['HeavyContainer'] == self.number_of_containers['HeavyContainer']:
-                return False
-            if self.max_number_of_containers[cont.__class__.__name__] == self.number_of_containers[cont.__class__.__name__]:
-                return False
         self.weight_of_containers += cont.weight
-        self.number_of_containers['Container'] += 1
-        if isinstance(cont, HeavyContainer):
-            self.number_of_containers['HeavyContainer'] += 1
-            if cont.__class__.__name__ != 'HeavyContainer':
-                self.number_of_containers[cont.__class__.__name__] += 1
-        self.containers.append(cont)
+        self._count(CONTAINER_TYPES.get(cont.__class__), 1)
+        self.weight_by_type[cont.__class__.__name__] = self.weight_by_type.get(cont.__class__.__name__, 0) + cont.weight
+        self.containers_consumption += cont.consumption()
         self.current_port.containers.remove(cont)
+        self.containers.append(cont)
         return True
 
+    def load_rejection(self, cont: 'Container') -> Optional[str]:
+        """Gets the reason the container cannot be loaded onto the ship.
+
+        Args:
+            cont (Container): The container to check.
+
+        Returns:
+            Optional[str]: 'not at port', 'weight limit' or 'count limit', or None if the
+            container can be loaded.
+        """
+        if self.current_port is None or cont not in self.current_port.containers:
+            return 'not at port'
+        if self.weight_of_containers + cont.weight > self.total_weight_capacity:
+            return 'weight limit'
+        if len(self._counts) < len(CONTAINER_TYPES.categories):
+            self._add_categories()
+        if CONTAINER_TYPES.get(cont.__class__).mask & self._full_mask:
+            return 'count limit'
+        return None
+
+    def load_batch(self, containers: List['Container']) -> List['Container']:
+        """Loads as many of the given containers onto the ship as its limits allow.
+
+        The type limits are nested (every container counts towards 'Container', liquid and
+        refrigerated ones also towards 'HeavyContainer'), so taking the lightest containers
+        first while they fit gives the largest possible number of loaded containers. All
+        accepted containers are then committed in one pass.
+
+        Args:
+            containers (List[Container]): The containers to load.
+
+        Returns:
+            List[Container]: The containers that were loaded, lightest first.
+        """
+        if self.current_port is None:
+            return []
+        candidates = {cont.id: cont for cont in containers if cont in self.current_port.containers}
+        if len(self._counts) < len(CONTAINER_TYPES.categories):
+            self._add_categories()
+        counts = list(self._counts)
+        full_mask = self._full_mask
+        weight_of_containers = self.weight_of_containers
+        accepted: List['Container'] = []
+        for cont in sorted(candidates.values(), key=lambda cont: cont.weight):
+            if weight_of_containers + cont.weight > self.total_weight_capacity:
+                break
+            entry = CONTAINER_TYPES.get(cont.__class__)
+            if entry.mask & full_mask:
+                continue
+            for category in entry.categories:
+                counts[category] += 1
+                if counts[category] >= self._limits[category]:
+                    full_mask |= 1 << category
+            weight_of_containers += cont.weight
+            accepted.append(cont)
+
+        self._counts = counts
+        self._full_mask = full_mask
+        self.weight_of_containers = weight_of_containers
+        for cont in accepted:
+            self.weight_by_type[cont.__class__.__name__] = self.weight_by_type.get(cont.__class__.__name__, 0) + cont.weight
+            self.containers_consumption += cont.consumption()
+            self.current_port.containers.remove(cont)
+            self.containers.append(cont)
+        return accepted
+
+    @property
+    def number_of_containers(self) -> Dict[str, int]:
+        """The number of containers on board per limit category."""
+        return dict(zip(CONTAINER_TYPES.categories, self._counts))
+
+    def _add_categories(self) -> None:
+        """Adds counters for the limit categories registered since the ship was created.
+
+        Categories without a limit in `max_number_of_containers` are unlimited.
+        """
+        for index in range(len(self._counts), len(CONTAINER_TYPES.categories)):
+            self._counts.append(0)
+            self._limits.append(self.max_number_of_containers.get(CONTAINER_TYPES.categories[index], float('inf')))
+            if self._limits[index] <= 0:
+                self._full_mask |= 1 << index
+
+    def _count(self, entry: ContainerType, change: int) -> None:
+        """Changes the counters of the categories of a container type and updates the full mask.
+
+        Args:
+            entry (ContainerType): The registry entry of the container type.
+            change (int): 1 for a loaded container, -1 for an unloaded one.
+        """
+        for category in entry.categories:
+            self._counts[category] += change
+            if self._counts[category] >= self._limits[category]:
+                self._full_mask |= 1 << category
+            else:
+                self._full_mask &= ~(1 << category)
+
     def unload(self, cont: 'Container') -> bool:
         """Unloads a container from the ship.
 
@@ -177,17 +326,42 @@ class Ship(IShip):
         Returns:
             bool: True if the container is successfully unloaded, False otherwise.
         """
-        if cont not in self.containers:
+        if self.current_port is None or cont not in self.containers:
             return False
         self.weight_of_containers -= cont.weight
-        self.number_of_containers['Container'] -= 1
-        if isinstance(cont, HeavyContainer):
-            self.number_of_containers['HeavyContainer'] -= 1
-            self.number_of_containers[cont.__class__.__name__] -= 1
+        self._count(CONTAINER_TYPES.get(cont.__class__), -1)
+        self.weight_by_type[cont.__class__.__name__] -= cont.weight
+        self.containers_consumption -= cont.consumption()
         self.containers.remove(cont)
+        if not self.containers:
+            # Reset the running totals so floating point error does not pile up
+            self.weight_by_type.clear()
+            self.containers_consumption = 0
         self.current_port.containers.append(cont)
         return True
 
+    def check_cached_totals(self) -> None:
+        """Recomputes the container totals from scratch and checks them against the cached ones.
+
+        Raises:
+            AssertionError: If a cached total does not match the recomputed value.
+        """
+        weight_by_type: Dict[str, float] = {}
+        consumption = 0.0
+        counts = [0] * len(self._counts)
+        for container in self.containers:
+            name = container.__class__.__name__
+            weight_by_type[name] = weight_by_type.get(name, 0) + container.weight
+            consumption += container.consumption()
+            for category in CONTAINER_TYPES.get(container.__class__).categories:
+                counts[category] += 1
+        assert counts == self._counts, f'Cached container counts {self._counts} differ from {counts}'
+        assert math.isclose(consumption, self.containers_consumption, abs_tol=1e-6), \
+            f'Cached consumption {self.containers_consumption} differs from {consumption}'
+        for name in weight_by_type.keys() | self.weight_by_type.keys():
+            assert math.isclose(weight_by_type.get(name, 0), self.weight_by_type.get(name, 0), abs_tol=1e-6), \
+                f'Cached weight of {name} differs from {weight_by_type.get(name, 0)}'
+
     def get_current_containers(self) -> List['Container']:
         """Gets a sorted list of the current containers on the ship.
 
@@ -0,0 +1,198 @@
+"""
+Ship History
+
+This module defines the collections a port keeps its ships in. `CurrentShips` holds the
+ships that are at the port, indexed by id, so arrivals, departures and membership checks
+are constant-time. `ShipHistory` records the departures from the port: the most recent
+visits are kept in a ring buffer of a fixed size, and every ship has a visit counter, so
+"has this ship ever visited" is answered in constant time no matter how long the
+simulation runs. Visits that fall out of the ring buffer can be spilled to a file.
+
+Classes:
+    CurrentShips: An insertion-ordered, id-indexed collection of ships.
+    ShipHistory: Bounded visit history with per-ship visit counters.
+
+Dependencies:
+    - ship.IShip (for type checking)
+"""
+
+import os
+from collections import deque
+from typing import Deque, Dict, Iterator, List, Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from ship import IShip
+
+
+class CurrentShips:
+    """
+    An insertion-ordered, id-indexed collection of ships.
+
+    The collection mirrors the parts of the list API used by ports (`append`,
+    `remove`, `in`, `len`, iteration).
+
+    Attributes:
+        _ships (Dict[int, IShip]): The ships, keyed by id.
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty CurrentShips object."""
+        self._ships: Dict[int, 'IShip'] = {}
+
+    def __contains__(self, ship: object) -> bool:
+        """
+        Check if the given ship is in the collection.
+
+        Args:
+            ship (IShip): The ship to look up.
+
+        Returns:
+            bool: True if this exact ship is in the collection, False otherwise.
+        """
+        return self._ships.get(getattr(ship, 'id', None)) is ship
+
+    def __iter__(self) -> Iterator['IShip']:
+        """Iterate over the ships in arrival order."""
+        return iter(self._ships.values())
+
+    def __len__(self) -> int:
+        """Return the number of ships."""
+        return len(self._ships)
+
+    def __repr__(self) -> str:
+        """Return the same representation as a list of the ships."""
+        return repr(list(self._ships.values()))
+
+    def append(self, ship: 'IShip') -> None:
+        """
+        Add a ship to the collection.
+
+        Args:
+            ship (IShip): The ship to add.
+        """
+        self._ships[ship.id] = ship
+
+    def remove(self, ship: 'IShip') -> None:
+        """
+        Remove a ship from the collection.
+
+        Args:
+            ship (IShip): The ship to remove.
+
+        Raises:
+            ValueError: If the ship is not in the collection.
+        """
+        if ship not in self:
+            raise ValueError('CurrentShips.remove(x): x not in collection')
+        del self._ships[ship.id]
+
+    def discard(self, ship: 'IShip') -> bool:
+        """
+        Remove a ship from the collection if it is there.
+
+        Args:
+            ship (IShip): The ship to remove.
+
+        Returns:
+            bool: True if the ship was removed, False if it was not in the collection.
+        """
+        if self._ships.get(ship.id) is not ship:
+            return False
+        del self._ships[ship.id]
+        return True
+
+
+class ShipHistory:
+    """
+    Bounded visit history with per-ship visit counters.
+
+    Attributes:
+        limit (int): The number of recent visits kept in memory.
+        spill_path (Optional[str]): The file the visits pushed out of memory are appended
+            to, one ship id per line, or None to drop them.
+        total_visits (int): The number of visits recorded.
+    """
+
+    def __init__(self, limit: int = 1000, spill_path: Optional[str] = None) -> None:
+        """
+        Initialize a ShipHistory object.
+
+        Args:
+            limit (int): The number of recent visits kept in memory. Defaults to 1000.
+            spill_path (Optional[str]): The file to append older visits to. Defaults to None.
+
+        Raises:
+            ValueError: If the limit is not positive.
+        """
+        if limit < 1:
+            raise ValueError('History limit must be positive')
+        self.limit = limit
+        self.spill_path = spill_path
+        self.total_visits = 0
+        self._recent: Deque['IShip'] = deque()
+        self._visits: Dict[int, int] = {}
+
+    def __contains__(self, ship: object) -> bool:
+        """
+        Check if the given ship has ever visited the port.
+
+        Args:
+            ship (IShip): The ship to look up.
+
+        Returns:
+            bool: True if a ship with this id has visited the port, False otherwise.
+        """
+        return getattr(ship, 'id', None) in self._visits
+
+    def __iter__(self) -> Iterator['IShip']:
+        """Iterate over the recent visits, oldest first."""
+        return iter(self._recent)
+
+    def __len__(self) -> int:
+        """Return the number of recent visits kept in memory."""
+        return len(self._recent)
+
+    def __repr__(self) -> str:
+        """Return the same representation as a list of the recent visits."""
+        return repr(list(self._recent))
+
+    def record(self, ship: 'IShip') -> None:
+        """
+        Record a visit of a ship.
+
+        Args:
+            ship (IShip): The ship that visited the port.
+        """
+        self._visits[ship.id] = self._visits.get(ship.id, 0) + 1
+        self.total_visits += 1
+        if len(self._recent) == self.limit:
+            evicted = self._recent.popleft()
+            if self.spill_path is not None:
+                # The file is opened for every spill, so the history never holds it open
+                with open(self.spill_path, 'a') as file:
+                    file.write(f'{evicted.id}\n')
+        self._recent.append(ship)
+
+    def visit_count(self, ship: 'IShip') -> int:
+        """
+        Get the number of visits of a ship.
+
+        Args:
+            ship (IShip): The ship.
+
+        Returns:
+            int: The number of times the ship has visited the port.
+        """
+        return self._visits.get(ship.id, 0)
+
+    def spilled(self) -> List[int]:
+        """
+        Read the ids of the ships whose visits were spilled to the file, oldest first.
+
+        Returns:
+            List[int]: The ship ids, or an empty list if nothing was spilled.
+        """
+        if self.spill_path is None or not os.path.exists(self.spill_path):
+            return []
+        with open(self.spill_path) as file:
+            return [int(line) for line in file]
@@ -0,0 +1,311 @@
+"""
+Port Traffic Simulation
+
+This module defines `Simulation`, a discrete-event scheduler that runs voyages of many
+ships over simulated time. Events are kept in a heap ordered by their time, so the
+simulation jumps straight from one event to the next instead of ticking a clock.
+
+A voyage is modelled as: wait for a berth at the current port, load the containers,
+depart, sail for `distance / speed` hours, wait for a berth at the destination and unload
+the containers. While it sails, the ship is at no port; it joins the ships of the
+destination only when it arrives. The actual loading, unloading and sailing is done
+through the `IShip` interface, so fuel and container limits are checked exactly as in a
+synchronous run. Ships that do not split a voyage into `depart` and `arrive` sail the
+whole way when they depart.
+Every port has a limited number of berths; ships that find all berths busy wait in a
+first come, first served queue.
+
+Classes:
+    Voyage: A planned voyage of a ship.
+    Berths: The berths of a port and the ships waiting for them.
+    Simulation: The discrete-event scheduler.
+
+Dependencies:
+    - port.IPort (for type checking)
+    - ship.IShip (for type checking)
+    - container.Container (for type checking)
+"""
+
+import heapq
+import itertools
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Callable, Deque, Dict, List, Optional, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from container import Container
+    from port import IPort
+    from ship import IShip
+
+
+@dataclass
+class Voyage:
+    """A planned voyage of a ship.
+
+    Attributes:
+        ship (IShip): The ship making the voyage.
+        destination (IPort): The port to sail to.
+        start_time (float): The earliest time the voyage may start.
+        load (List[Container]): The containers to load before departure.
+        unload (List[Container]): The containers to unload on arrival.
+        departure_time (Optional[float]): The time the ship left its port, once it did.
+        arrival_time (Optional[float]): The time the ship arrived, once it did.
+        berthed_at (Optional[float]): The time the ship last got a berth.
+        completed (bool): True once the containers are unloaded at the destination.
+    """
+
+    ship: 'IShip'
+    destination: 'IPort'
+    start_time: float
+    load: List['Container'] = field(default_factory=list)
+    unload: List['Container'] = field(default_factory=list)
+    departure_time: Optional[float] = None
+    arrival_time: Optional[float] = None
+    berthed_at: Optional[float] = None
+    completed: bool = False
+
+
+class Berths:
+    """The berths of a port and the ships waiting for them.
+
+    Attributes:
+        count (int): The number of berths.
+        free (int): The number of berths that are not occupied.
+        queue (Deque[Tuple[Voyage, Callable]]): Voyages waiting for a berth and the handler
+            to call once they get one.
+        busy_time (float): The total time the berths have been occupied.
+    """
+
+    def __init__(self, count: int) -> None:
+        """Initialize the berths of a port.
+
+        Args:
+            count (int): The number of berths.
+        """
+        self.count = count
+        self.free = count
+        self.queue: Deque[Tuple[Voyage, Callable[[Voyage], None]]] = deque()
+        self.busy_time = 0.0
+
+
+class Simulation:
+    """Discrete-event simulation of ships sailing between ports.
+
+    Attributes:
+        now (float): The current simulated time in hours.
+        speed (float): The distance a ship sails in one hour.
+        load_time (float): The time needed to load one container.
+        unload_time (float): The time needed to unload one container.
+        berths_per_port (int): The number of berths of ports without their own setting.
+        processed_events (int): The number of events processed so far.
+        failed_voyages (List[Voyage]): Voyages the ship could not sail, e.g. for lack of fuel.
+    """
+
+    def __init__(self, speed: float = 30.0, load_time: float = 0.5, unload_time: float = 0.5,
+                 berths_per_port: int = 1) -> None:
+        """Initialize a Simulation object.
+
+        Args:
+            speed (float): The distance a ship sails in one hour. Defaults to 30.
+            load_time (float): The time needed to load one container. Defaults to 0.5.
+            unload_time (float): The time needed to unload one container. Defaults to 0.5.
+            berths_per_port (int): The number of berths of every port. Defaults to 1.
+
+        Raises:
+            ValueError: If the speed is not positive or there are no berths.
+        """
+        if speed <= 0:
+            raise ValueError('Speed must be positive')
+        if berths_per_port < 1:
+            raise ValueError('A port needs at least one berth')
+        self.now = 0.0
+        self.speed = speed
+        self.load_time = load_time
+        self.unload_time = unload_time
+        self.berths_per_port = berths_per_port
+        self.processed_events = 0
+        self.failed_voyages: List[Voyage] = []
+        self._events: List[Tuple[float, int, Callable[[Voyage], None], Voyage]] = []
+        self._counter = itertools.count()
+        self._berths: Dict[int, Berths] = {}
+        self._planned: Dict[int, Deque[Voyage]] = {}
+        self._busy_ships: set = set()
+
+    def set_berths(self, port: 'IPort', count: int) -> None:
+        """Set the number of berths of a port.
+
+        Args:
+            port (IPort): The port.
+            count (int): The number of berths.
+
+        Raises:
+            ValueError: If there are no berths or the port's berths are already in use.
+        """
+        if count < 1:
+            raise ValueError('A port needs at least one berth')
+        berths = self._berths.get(port.id)
+        if berths is not None and berths.free != berths.count:
+            raise ValueError(f'Berths of port {port.id} are in use')
+        self._berths[port.id] = Berths(count)
+
+    def berths(self, port: 'IPort') -> Berths:
+        """Get the berths of a port.
+
+        Args:
+            port (IPort): The port.
+
+        Returns:
+            Berths: The berths of the port.
+        """
+        if port.id not in self._berths:
+            self._berths[port.id] = Berths(self.berths_per_port)
+        return self._berths[port.id]
+
+    def schedule_voyage(self, ship: 'IShip', destination: 'IPort', start_time: Optional[float] = None,
+                        load: Optional[List['Container']] = None,
+                        unload: Optional[List['Container']] = None) -> Voyage:
+        """Plan a voyage of a ship.
+
+        Voyages of the same ship are made in the order they were scheduled; a voyage starts
+        at its start time or as soon as the ship has finished the previous one.
+
+        Args:
+            ship (IShip): The ship making the voyage.
+            destination (IPort): The port to sail to.
+            start_time (Optional[float]): The earliest time the voyage may start. Defaults to now.
+            load (Optional[List[Container]]): The containers to load before departure.
+            unload (Optional[List[Container]]): The containers to unload on arrival.
+
+        Returns:
+            Voyage: The planned voyage.
+        """
+        voyage = Voyage(ship, destination, self.now if start_time is None else max(start_time, self.now),
+                        list(load or []), list(unload or []))
+        self._planned.setdefault(ship.id, deque()).append(voyage)
+        if ship.id not in self._busy_ships:
+            self._busy_ships.add(ship.id)
+            self._push(voyage.start_time, self._on_start, voyage)
+        return voyage
+
+    def run(self, until: Optional[float] = None) -> int:
+        """Process events in time order.
+
+        Args:
+            until (Optional[float]): Stop before the first event later than this time.
+                Defaults to running until no events are left.
+
+        Returns:
+            int: The number of events processed by this call.
+        """
+        events = self._events
+        processed = 0
+        while events and (until is None or events[0][0] <= until):
+            time, _, handler, voyage = heapq.heappop(events)
+            self.now = time
+            handler(voyage)
+            processed += 1
+        if until is not None and until > self.now:
+            self.now = until
+        self.processed_events += processed
+        return processed
+
+    def _push(self, time: float, handler: Callable[[Voyage], None], voyage: Voyage) -> None:
+        """Add an event to the queue.
+
+        Args:
+            time (float): The time the event happens.
+            handler (Callable[[Voyage], None]): The method that handles the event.
+            voyage (Voyage): The voyage the event belongs to.
+        """
+        heapq.heappush(self._events, (time, next(self._counter), handler, voyage))
+
+    def _request_berth(self, port: 'IPort', voyage: Voyage, handler: Callable[[Voyage], None]) -> None:
+        """Give a ship a berth at a port, or put it in the queue if all berths are busy.
+
+        Args:
+            port (IPort): The port.
+            voyage (Voyage): The voyage that needs a berth.
+            handler (Callable[[Voyage], None]): The method to call once the ship has a berth.
+        """
+        berths = self.berths(port)
+        if berths.free:
+            berths.free -= 1
+            handler(voyage)
+        else:
+            berths.queue.append((voyage, handler))
+
+    def _release_berth(self, port: 'IPort', occupied_since: float) -> None:
+        """Free a berth at a port and give it to the next waiting ship.
+
+        Args:
+            port (IPort): The port.
+            occupied_since (float): The time the berth was taken.
+        """
+        berths = self.berths(port)
+        berths.busy_time += self.now - occupied_since
+        if berths.queue:
+            voyage, handler = berths.queue.popleft()
+            handler(voyage)
+        else:
+            berths.free += 1
+
+    def _on_start(self, voyage: Voyage) -> None:
+        """Start a voyage by loading its containers, or depart right away if there are none."""
+        if voyage.load:
+            self._request_berth(voyage.ship.current_port, voyage, self._on_loading)
+        else:
+            self._depart(voyage)
+
+    def _on_loading(self, voyage: Voyage) -> None:
+        """Load the containers of a voyage once the ship has a berth."""
+        voyage.berthed_at = self.now
+        loaded = sum(1 for cont in voyage.load if voyage.ship.load(cont))
+        self._push(self.now + loaded * self.load_time, self._on_loaded, voyage)
+
+    def _on_loaded(self, voyage: Voyage) -> None:
+        """Free the berth after loading and depart."""
+        self._release_berth(voyage.ship.current_port, voyage.berthed_at)
+        self._depart(voyage)
+
+    def _depart(self, voyage: Voyage) -> None:
+        """Send the ship to sea and schedule its arrival, or give up the voyage if it cannot sail."""
+        ship = voyage.ship
+        distance = ship.current_port.get_distance(voyage.destination)
+        if not ship.depart(voyage.destination):
+            self.failed_voyages.append(voyage)
+            self._finish(voyage)
+            return
+        voyage.departure_time = self.now
+        self._push(self.now + distance / self.speed, self._on_arrival, voyage)
+
+    def _on_arrival(self, voyage: Voyage) -> None:
+        """Bring the ship into the destination and unload the containers, or finish the voyage if there are none."""
+        voyage.arrival_time = self.now
+        voyage.ship.arrive(voyage.destination)
+        if voyage.unload:
+            self._request_berth(voyage.destination, voyage, self._on_unloading)
+        else:
+            voyage.completed = True
+            self._finish(voyage)
+
+    def _on_unloading(self, voyage: Voyage) -> None:
+        """Unload the containers of a voyage once the ship has a berth."""
+        voyage.berthed_at = self.now
+        unloaded = sum(1 for cont in voyage.unload if voyage.ship.unload(cont))
+        self._push(self.now + unloaded * self.unload_time, self._on_unloaded, voyage)
+
+    def _on_unloaded(self, voyage: Voyage) -> None:
+        """Free the berth after unloading and finish the voyage."""
+        self._release_berth(voyage.destination, voyage.berthed_at)
+        voyage.completed = True
+        self._finish(voyage)
+
+    def _finish(self, voyage: Voyage) -> None:
+        """Start the next planned voyage of the ship, if there is one."""
+        planned = self._planned[voyage.ship.id]
+        planned.popleft()
+        if planned:
+            following = planned[0]
+            self._push(max(following.start_time, self.now), self._on_start, following)
+        else:
+            self._busy_ships.discard(voyage.ship.id)
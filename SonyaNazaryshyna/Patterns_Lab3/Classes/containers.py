@@ -1,5 +1,5 @@
 from abc import abstractmethod, ABC
-from typing import Self, List
+from typing import Self, List, Dict, Tuple
 import uuid
 from item import Item
 from port import Port
@@ -160,6 +160,33 @@ class LiquidContainer(HeavyContainer):
         return self.weight * LiquidContainer.UNIT
 
 
+# The container types a ship limits, in the order their limits are checked
+LIMITED_CONTAINER_TYPES: Tuple[type, ...] = (BasicContainer, HeavyContainer, RefrigeratedContainer, LiquidContainer)
+_type_masks: Dict[type, int] = {}
+
+
+def container_type_mask(container_class: type) -> int:
+    """
+    Returns the bitmask of the limited container types a container class counts towards.
+
+    Bit i is set if the class is a subclass of LIMITED_CONTAINER_TYPES[i], e.g. a
+    refrigerated container counts towards the heavy and the refrigerated limit. The
+    mask is computed once per class, so new container subclasses need no registration.
+
+    Args:
+        container_class (type): The class of the container.
+
+    Returns:
+        int: The bitmask of the limited types.
+    """
+    mask = _type_masks.get(container_class)
+    if mask is None:
+        mask = sum(1 << index for index, limited_type in enumerate(LIMITED_CONTAINER_TYPES)
+                   if issubclass(container_class, limited_type))
+        _type_masks[container_class] = mask
+    return mask
+
+
 def create_container(weight: float, max_item: int, container_type: str) -> Container:
     """
     Creates and returns an instance of a Container subclass based on the specified type and weight.
@@ -5,6 +5,7 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 import uuid
 from ship import ShipFactory
 from port import Port
+from port_registry import PortRegistry
 from item import ItemFactory
 from containers import create_container
 
@@ -33,14 +34,14 @@ class Main:
             item.item_id = item_id
             items.append(item)
 
-        ports = []
+        ports = PortRegistry()
         for port_data in data['port']:
             port_id = port_data.get('port_id', str(uuid.uuid4()))
             coordinates = tuple(port_data['coordinates'])
 
             port = Port(coordinates=coordinates)
             port.port_id = port_id
-            ports.append(port)
+            ports.add(port)
 
         containers = []
         for container_data in data['container']:
@@ -58,7 +59,7 @@ class Main:
         for ship_data in data['ship']:
             ship_type = ship_data['type']
             current_port_id = ship_data.get('current_port', None)
-            current_port = next((port for port in ports if port.port_id == current_port_id), None)
+            current_port = ports.get(current_port_id)
             if current_port:
                 ship = self.ship_factory.create_ship(ship_type, current_port)
                 ships.append(ship)
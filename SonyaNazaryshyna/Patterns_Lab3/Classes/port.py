@@ -50,6 +50,7 @@ class Port(IPort):
         history_of_ship (List[Ship]): A list of ships that have previously docked at the port.
         containers (List[Container]): A list of containers available at the port.
     """
+
     def __init__(self, coordinates: Tuple[float, float]) -> None:
         self.port_id = str(uuid.uuid4())
         self.coordinates = coordinates
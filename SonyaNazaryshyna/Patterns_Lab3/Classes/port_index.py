@@ -0,0 +1,221 @@
+import math
+from typing import Iterable, List, Optional, Tuple, TYPE_CHECKING
+if TYPE_CHECKING:
+    from port import Port
+
+
+EARTH_RADIUS = 6371.0
+
+
+def _to_unit_vector(coordinates: Tuple[float, float]) -> Tuple[float, float, float]:
+    """
+    Converts (latitude, longitude) coordinates in degrees to a point on the unit sphere.
+
+    Args:
+        coordinates (Tuple[float, float]): The latitude and longitude of the point.
+
+    Returns:
+        Tuple[float, float, float]: The cartesian coordinates of the point.
+    """
+    latitude, longitude = math.radians(coordinates[0]), math.radians(coordinates[1])
+    return (math.cos(latitude) * math.cos(longitude),
+            math.cos(latitude) * math.sin(longitude),
+            math.sin(latitude))
+
+
+def _chord_length(distance: float) -> float:
+    """
+    Converts a great-circle distance in kilometers to the matching chord length on the unit sphere.
+
+    Args:
+        distance (float): The great-circle distance in kilometers.
+
+    Returns:
+        float: The chord length between two points that are `distance` apart.
+    """
+    if distance >= math.pi * EARTH_RADIUS:
+        return 2.0
+    return 2 * math.sin(distance / (2 * EARTH_RADIUS))
+
+
+class _Node:
+    """
+    A node of the k-d tree.
+
+    Attributes:
+        point (Tuple[float, float, float]): The port position on the unit sphere.
+        port (Port): The port stored in the node.
+        axis (int): The axis the node splits its subtree on.
+        left (_Node): The subtree with smaller values on the axis.
+        right (_Node): The subtree with greater or equal values on the axis.
+    """
+    __slots__ = ('point', 'port', 'axis', 'left', 'right')
+
+    def __init__(self, point: Tuple[float, float, float], port: 'Port', axis: int) -> None:
+        self.point = point
+        self.port = port
+        self.axis = axis
+        self.left: Optional[_Node] = None
+        self.right: Optional[_Node] = None
+
+
+class PortIndex:
+    """
+    Spatial index that answers nearest-port queries by great-circle distance.
+
+    Ports are stored as points on the unit sphere in a k-d tree, where the straight
+    (chord) distance between points grows together with the great-circle distance.
+    The index of the ports of one scenario is kept by its PortRegistry, which shares
+    it between all ships. Ports added later are inserted into the tree directly, and the tree is rebuilt balanced every time the number of
+    ports doubles, so adding ports stays cheap and queries stay logarithmic.
+
+    Attributes:
+        ports (List[Port]): All ports added to the index.
+    """
+
+    def __init__(self, ports: Iterable['Port'] = ()) -> None:
+        self.ports: List['Port'] = list(ports)
+        self._root: Optional[_Node] = None
+        self._built_size = 0
+        self._rebuild()
+
+    def add(self, port: 'Port') -> None:
+        """
+        Adds a port to the index.
+
+        Args:
+            port (Port): The port to add.
+        """
+        self.ports.append(port)
+        if len(self.ports) >= 2 * self._built_size:
+            self._rebuild()
+            return
+        point = _to_unit_vector(port.coordinates)
+        node = self._root
+        while True:
+            side = 'left' if point[node.axis] < node.point[node.axis] else 'right'
+            child = getattr(node, side)
+            if child is None:
+                setattr(node, side, _Node(point, port, (node.axis + 1) % 3))
+                return
+            node = child
+
+    def nearest(self, coordinates: Tuple[float, float], max_distance: float = float('inf'),
+                exclude: Optional['Port'] = None) -> Optional['Port']:
+        """
+        Finds the nearest port to the given coordinates within the given distance.
+
+        Args:
+            coordinates (Tuple[float, float]): The latitude and longitude to search from.
+            max_distance (float): The largest allowed distance in kilometers.
+            exclude (Port): A port that must not be returned, usually the current one.
+
+        Returns:
+            Port: The nearest port, or None if there is no port within `max_distance`.
+        """
+        best: List = [None, _chord_length(max_distance) ** 2]
+        self._search(self._root, _to_unit_vector(coordinates), exclude, best)
+        return best[0]
+
+    def within(self, coordinates: Tuple[float, float], max_distance: float) -> List['Port']:
+        """
+        Finds all ports within the given distance of the given coordinates.
+
+        Args:
+            coordinates (Tuple[float, float]): The latitude and longitude to search from.
+            max_distance (float): The largest allowed distance in kilometers.
+
+        Returns:
+            List[Port]: The ports within `max_distance`, in no particular order.
+        """
+        found: List['Port'] = []
+        self._collect(self._root, _to_unit_vector(coordinates), _chord_length(max_distance) ** 2, found)
+        return found
+
+    def _rebuild(self) -> None:
+        """Builds a balanced k-d tree over all ports."""
+        entries = [(_to_unit_vector(port.coordinates), port) for port in self.ports]
+        self._root = self._build(entries, 0)
+        self._built_size = len(self.ports)
+
+    def _build(self, entries: List[Tuple[Tuple[float, float, float], 'Port']], depth: int) -> Optional[_Node]:
+        """
+        Builds a balanced k-d tree for the given entries.
+
+        Args:
+            entries (List[Tuple[Tuple[float, float, float], Port]]): The points and their ports.
+            depth (int): The depth of the subtree root.
+
+        Returns:
+            _Node: The root of the subtree, or None if there are no entries.
+        """
+        if not entries:
+            return None
+        axis = depth % 3
+        entries.sort(key=lambda entry: entry[0][axis])
+        median = len(entries) // 2
+        node = _Node(entries[median][0], entries[median][1], axis)
+        node.left = self._build(entries[:median], depth + 1)
+        node.right = self._build(entries[median + 1:], depth + 1)
+        return node
+
+    def _search(self, node: Optional[_Node], target: Tuple[float, float, float],
+                exclude: Optional['Port'], best: List) -> None:
+        """
+        Searches a subtree for a port closer than the current best one.
+
+        Args:
+            node (_Node): The root of the subtree.
+            target (Tuple[float, float, float]): The point to search from.
+            exclude (Port): A port that must not be returned.
+            best (List): The best port so far and its squared chord distance, updated in place.
+        """
+        if node is None:
+            return
+        self._consider(target, node.point, node.port, exclude, best)
+        difference = target[node.axis] - node.point[node.axis]
+        near, far = (node.left, node.right) if difference < 0 else (node.right, node.left)
+        self._search(near, target, exclude, best)
+        if difference * difference <= best[1]:
+            self._search(far, target, exclude, best)
+
+    def _collect(self, node: Optional[_Node], target: Tuple[float, float, float],
+                 limit: float, found: List['Port']) -> None:
+        """
+        Collects the ports of a subtree within the given squared chord distance.
+
+        Args:
+            node (_Node): The root of the subtree.
+            target (Tuple[float, float, float]): The point to search from.
+            limit (float): The largest allowed squared chord distance.
+            found (List[Port]): The ports found so far, extended in place.
+        """
+        if node is None:
+            return
+        if sum((a - b) ** 2 for a, b in zip(target, node.point)) <= limit:
+            found.append(node.port)
+        difference = target[node.axis] - node.point[node.axis]
+        near, far = (node.left, node.right) if difference < 0 else (node.right, node.left)
+        self._collect(near, target, limit, found)
+        if difference * difference <= limit:
+            self._collect(far, target, limit, found)
+
+    @staticmethod
+    def _consider(target: Tuple[float, float, float], point: Tuple[float, float, float], port: 'Port',
+                  exclude: Optional['Port'], best: List) -> None:
+        """
+        Replaces the best port with the given one if it is closer.
+
+        Args:
+            target (Tuple[float, float, float]): The point to search from.
+            point (Tuple[float, float, float]): The position of the candidate port.
+            port (Port): The candidate port.
+            exclude (Port): A port that must not be returned.
+            best (List): The best port so far and its squared chord distance, updated in place.
+        """
+        if port is exclude:
+            return
+        distance = sum((a - b) ** 2 for a, b in zip(target, point))
+        if distance <= best[1] and (best[0] is None or distance < best[1]):
+            best[0] = port
+            best[1] = distance
@@ -0,0 +1,63 @@
+from typing import Dict, Iterable, Iterator, List, Optional, TYPE_CHECKING
+from port_index import PortIndex
+if TYPE_CHECKING:
+    from port import Port
+
+
+class PortRegistry:
+    """
+    The ports of one scenario together with their spatial index.
+
+    Ports are added through `add`, which inserts them into the index, so the index is
+    shared by all ships of the scenario and never rebuilt from scratch. Every addition
+    increases `version`, which lets the route planner tell in constant time whether its
+    memoized routes still belong to the current set of ports.
+
+    Attributes:
+        index (PortIndex): The spatial index of all ports.
+        version (int): The number of ports added so far.
+    """
+
+    def __init__(self, ports: Iterable['Port'] = ()) -> None:
+        self._ports: List['Port'] = list(ports)
+        self._by_id: Dict[str, 'Port'] = {port.port_id: port for port in self._ports}
+        self.index = PortIndex(self._ports)
+        self.version = len(self._ports)
+
+    def add(self, port: 'Port') -> None:
+        """
+        Adds a port to the registry and its index.
+
+        Args:
+            port (Port): The port to add. A port that is already registered is ignored.
+        """
+        if port.port_id in self._by_id:
+            return
+        self._ports.append(port)
+        self._by_id[port.port_id] = port
+        self.index.add(port)
+        self.version += 1
+
+    def get(self, port_id: str) -> Optional['Port']:
+        """
+        Finds a port by its ID.
+
+        Args:
+            port_id (str): The ID of the port.
+
+        Returns:
+            Port: The port, or None if there is no port with this ID.
+        """
+        return self._by_id.get(port_id)
+
+    def __contains__(self, port: object) -> bool:
+        return getattr(port, 'port_id', None) in self._by_id
+
+    def __iter__(self) -> Iterator['Port']:
+        return iter(self._ports)
+
+    def __len__(self) -> int:
+        return len(self._ports)
+
+    def __getitem__(self, position: int) -> 'Port':
+        return self._ports[position]
@@ -0,0 +1,106 @@
+import heapq
+import itertools
+from typing import Dict, List, Optional, Tuple, TYPE_CHECKING
+from port_index import PortIndex
+from port_registry import PortRegistry
+if TYPE_CHECKING:
+    from port import Port
+
+
+class RoutePlanner:
+    """
+    Plans refuelling routes between ports.
+
+    A ship fills its tank at every port it stops at, so it can sail any leg that is not
+    longer than its fuel range. The planner runs Dijkstra's algorithm over the ports
+    to find the route with the fewest stops, preferring the shorter one when the number
+    of stops is equal. The ports in range of a stop are found through the index of the
+    port registry. Routes are memoized per origin, destination and consumption class (the
+    fuel range of the ship), so a repeated voyage is planned only once. The memo belongs
+    to one version of one registry and is dropped when a port is added or the planner is
+    asked about another registry.
+
+    Attributes:
+        routes (Dict[Tuple[str, str, float], Optional[List[Port]]]): Memoized routes for
+        the current version of the registry.
+    """
+
+    def __init__(self) -> None:
+        self.routes: Dict[Tuple[str, str, float], Optional[List['Port']]] = {}
+        self._registry: Optional[PortRegistry] = None
+        self._version = -1
+
+    def plan(self, origin: 'Port', destination: 'Port', all_ports: PortRegistry,
+             fuel_range: float) -> Optional[List['Port']]:
+        """
+        Finds the route with the fewest refuelling stops between two ports.
+
+        Args:
+            origin (Port): The port the voyage starts at.
+            destination (Port): The port the voyage ends at. It is added to the registry if
+            it is not registered yet.
+            all_ports (PortRegistry): The ports the ship can stop at.
+            fuel_range (float): The distance the ship can sail on a full tank.
+
+        Returns:
+            List[Port]: The ports to sail to in order, ending with the destination, or None
+            if the destination cannot be reached.
+        """
+        all_ports.add(destination)
+        if all_ports is not self._registry or all_ports.version != self._version:
+            self.routes.clear()
+            self._registry = all_ports
+            self._version = all_ports.version
+        key = (origin.port_id, destination.port_id, fuel_range)
+        if key not in self.routes:
+            self.routes[key] = self._find_route(origin, destination, all_ports.index, fuel_range)
+        route = self.routes[key]
+        return list(route) if route is not None else None
+
+    @staticmethod
+    def _find_route(origin: 'Port', destination: 'Port', index: PortIndex,
+                    fuel_range: float) -> Optional[List['Port']]:
+        """
+        Runs Dijkstra's algorithm with (stops, distance) costs from the origin to the destination.
+
+        Args:
+            origin (Port): The port the voyage starts at.
+            destination (Port): The port the voyage ends at.
+            index (PortIndex): The index of all ports the ship can stop at, including the destination.
+            fuel_range (float): The distance the ship can sail on a full tank.
+
+        Returns:
+            List[Port]: The ports to sail to in order, or None if there is no route.
+        """
+        if origin is destination:
+            return []
+        counter = itertools.count()
+        best: Dict[int, Tuple[int, float]] = {id(origin): (0, 0.0)}
+        previous: Dict[int, 'Port'] = {}
+        visited = set()
+        queue = [(0, 0.0, next(counter), origin)]
+        while queue:
+            stops, distance, _, port = heapq.heappop(queue)
+            if port is destination:
+                route = [destination]
+                while route[-1] is not origin:
+                    route.append(previous[id(route[-1])])
+                route.reverse()
+                return route[1:]
+            if id(port) in visited:
+                continue
+            visited.add(id(port))
+            # The index works with chord lengths, so it is asked with a margin for rounding
+            # and the legs are checked exactly below
+            for other_port in index.within(port.coordinates, fuel_range * (1 + 1e-9) + 1e-9):
+                if id(other_port) in visited:
+                    continue
+                leg = port.get_distance(other_port)
+                if leg > fuel_range:
+                    continue
+                cost = (stops + 1, distance + leg)
+                if cost < best.get(id(other_port), (float('inf'), float('inf'))):
+                    best[id(other_port)] = cost
+                    previous[id(other_port)] = port
+                    heapq.heappush(queue, (cost[0], cost[1], next(counter), other_port))
+        return None
@@ -2,9 +2,11 @@ from abc import ABC, abstractmethod
 from typing import List
 from dataclasses import dataclass
 import uuid
-from containers import Container, HeavyContainer, BasicContainer, LiquidContainer, RefrigeratedContainer
+from containers import Container, LIMITED_CONTAINER_TYPES, container_type_mask
 from port import Port
 from item import Item
+from port_registry import PortRegistry
+from route_planner import RoutePlanner
 
 
 class IShip(ABC):
@@ -16,7 +18,7 @@ class IShip(ABC):
     - unloading containers
     """
     @abstractmethod
-    def sail_to(self, other_port: 'Port', all_ports: List['Port']) -> bool:
+    def sail_to(self, other_port: 'Port', all_ports: PortRegistry) -> bool:
         """
         Describes the process of sailing the ship to a specified port.
 
@@ -99,7 +101,11 @@ class Ship(IShip):
         for the ship's capacity and fuel.
         containers_on_the_ship (List[Container]): A list of containers currently 
         loaded on the ship.
+        route_planner (RoutePlanner): Planner of refuelling routes shared by all ships.
+        type_counts (List[int]): The number of containers on the ship of every type in
+        LIMITED_CONTAINER_TYPES.
     """
+    route_planner = RoutePlanner()
 
     def __init__(self, fuel: float, current_port: 'Port', ship_configurations: Ship_Configuration, containers: List['Container'], items: List['Item']) -> None:
         self.ship_id = str(uuid.uuid4())
@@ -107,6 +113,15 @@ class Ship(IShip):
         self.current_port = current_port
         self.ship_configurations = ship_configurations
         self.containers_on_the_ship: List[Container] = []
+        self.type_counts: List[int] = [0] * len(LIMITED_CONTAINER_TYPES)
+        self._type_limits = (
+            ship_configurations.max_number_of_basic_containers,
+            ship_configurations.max_number_of_heavy_containers,
+            ship_configurations.max_number_of_refrigerated_containers,
+            ship_configurations.max_number_of_liquid_containers
+        )
+        # Bit i is set while the limit of LIMITED_CONTAINER_TYPES[i] is reached
+        self._full_mask = sum(1 << index for index, limit in enumerate(self._type_limits) if limit <= 0)
         self.current_port.incoming_ship(self)
         self.items = []
 
@@ -135,60 +150,37 @@ class Ship(IShip):
             'Containers on the ship: ': [container.container_data() for container in self.containers_on_the_ship]
         }
 
-    def _find_nearest_port(self, current_port:'Port', all_ports: List['Port']) -> 'Port':
-        """
-        Finds the nearest port that the ship can reach based on its current fuel level.
-
-        Args:
-            current_port (Port): The current port where the ship is docked.
-            all_ports (List[Port]): A list of all available ports.
-
-        Returns:
-            Port: The nearest port that can be reached with the remaining fuel.
-        """
-        neareast_port = None
-        min_distance = float('inf')
-        for port in all_ports:
-            if port == current_port:
-                continue
-            distance = self.current_port.get_distance(port)
-            fuel_consumption = distance * self.ship_configurations.fuel_consumption_per_km
-            if neareast_port is None or (distance < min_distance and fuel_consumption <= self.fuel):
-                min_distance = distance
-                neareast_port = port
-        return neareast_port
-
-
-    def sail_to(self, other_port: 'Port', all_ports: List['Port']) -> bool:
+    def sail_to(self, other_port: 'Port', all_ports: PortRegistry) -> bool:
         """
         Sails the ship to a specified port, calculating the distance and fuel consumption.
-        If there is not enough fuel, it finds the nearest port to refuel.
+        If the port is out of the ship's fuel range, the ship follows the route with the
+        fewest refuelling stops found by the shared route planner.
 
         Args:
             other_port (Port): The destination port to sail to.
-            all_ports (List[Port]): A list of all available ports for finding the nearest port.
+            all_ports (PortRegistry): The registry of all available ports for refuelling stops.
 
         Returns:
-            bool: True if the ship successfully sails to the destination port; otherwise, False.
+            float: The distance sailed if the ship reaches the destination port; otherwise, False.
         """
-        distance = self.current_port.get_distance(other_port)
-        fuel_consumption = distance * self.ship_configurations.fuel_consumption_per_km
+        fuel_range = self.ship_configurations.maximum_amount_of_fuel / self.ship_configurations.fuel_consumption_per_km
+        route = Ship.route_planner.plan(self.current_port, other_port, all_ports, fuel_range)
+        if route is None:
+            return False
 
-        if fuel_consumption > self.fuel:
-            near_port = self._find_nearest_port(self.current_port, all_ports)
-            self.current_port.outgoing_ship(self)
-            self.current_port = near_port
-            self.current_port.incoming_ship(self)
-            self.re_fuel(self.ship_configurations.maximum_amount_of_fuel - self.fuel)
-            self.sail_to(other_port, all_ports)
-        else:
+        sailed_distance = 0.0
+        for port in route:
+            distance = self.current_port.get_distance(port)
+            fuel_consumption = distance * self.ship_configurations.fuel_consumption_per_km
+            if fuel_consumption > self.fuel:
+                self.re_fuel(self.ship_configurations.maximum_amount_of_fuel - self.fuel)
             self.current_port.outgoing_ship(self)
             self.fuel -= fuel_consumption
-            self.current_port = other_port
+            self.current_port = port
             self.current_port.incoming_ship(self)
-            self.current_port = other_port
             self.re_fuel(self.ship_configurations.maximum_amount_of_fuel)
-        return distance
+            sailed_distance += distance
+        return sailed_distance
 
     def re_fuel(self, new_fuel) -> None:
         """
@@ -225,12 +217,16 @@ class Ship(IShip):
         """
         Counts the number of containers of a specific type currently on the ship.
 
-        Args:`
+        The limited container types are answered from the kept counts.
+
+        Args:
             container_type: The type of container to count.
 
         Returns:
             int: The number of containers of the specified type.
         """
+        if container_type in LIMITED_CONTAINER_TYPES:
+            return self.type_counts[LIMITED_CONTAINER_TYPES.index(container_type)]
         return sum(1 for container in self.containers_on_the_ship if isinstance(container, container_type))
 
     def _checking_the_type_of_containers(self, cont: 'Container') -> bool:
@@ -243,18 +239,31 @@ class Ship(IShip):
         Returns:
             bool: True if the container can be loaded; otherwise, False.
         """
-        container_limits = {
-            BasicContainer: self.ship_configurations.max_number_of_basic_containers,
-            HeavyContainer: self.ship_configurations.max_number_of_heavy_containers,
-            RefrigeratedContainer: self.ship_configurations.max_number_of_refrigerated_containers,
-            LiquidContainer: self.ship_configurations.max_number_of_liquid_containers
-        }
-        for container_type, limit in container_limits.items():
-            if isinstance(cont, container_type) and self.count_container_type(container_type) >= limit:
-                print(f"Cannot load more '{container_type.__name__}': limit reached.")
-                return False
+        full = container_type_mask(cont.__class__) & self._full_mask
+        if full:
+            # The lowest set bit is the first limit reached
+            container_type = LIMITED_CONTAINER_TYPES[(full & -full).bit_length() - 1]
+            print(f"Cannot load more '{container_type.__name__}': limit reached.")
+            return False
         return True
 
+    def _count_container(self, cont: 'Container', change: int) -> None:
+        """
+        Changes the counts of the limited types a container counts towards.
+
+        Args:
+            cont (Container): The loaded or unloaded container.
+            change (int): 1 for a loaded container, -1 for an unloaded one.
+        """
+        mask = container_type_mask(cont.__class__)
+        for index, limit in enumerate(self._type_limits):
+            if mask >> index & 1:
+                self.type_counts[index] += change
+                if self.type_counts[index] >= limit:
+                    self._full_mask |= 1 << index
+                else:
+                    self._full_mask &= ~(1 << index)
+
     def load(self, cont: 'Container') -> bool:
         """
         Loads a container onto the ship if it meets capacity and type restrictions.
@@ -277,6 +286,7 @@ class Ship(IShip):
 
         if self._checking_the_type_of_containers(cont):
             self.containers_on_the_ship.append(cont)
+            self._count_container(cont, 1)
             return True
         return False
 
@@ -295,6 +305,7 @@ class Ship(IShip):
         if cont in self.containers_on_the_ship:
             if cont not in port.containers:
                 self.containers_on_the_ship.remove(cont)
+                self._count_container(cont, -1)
                 port.containers.append(cont)
             return True
         return False
@@ -1,7 +1,11 @@
+import random
 import unittest
 from Classes.containers import BasicContainer, HeavyContainer, create_container
 from Classes.item import Small
 from Classes.port import Port
+from Classes.port_index import PortIndex
+from Classes.port_registry import PortRegistry
+from Classes.route_planner import RoutePlanner
 
 
 class Test(unittest.TestCase):
@@ -49,4 +53,78 @@ class Test(unittest.TestCase):
         
     def test_create_heavy_basic_container(self):
         with self.assertRaises(ValueError):
-            create_container(3200, 20, 'basic')
\ No newline at end of file
+            create_container(3200, 20, 'basic')
+
+    def test_port_index_nearest(self):
+        index = PortIndex()
+        kyiv = Port(coordinates=(50.45, 30.52))
+        lviv = Port(coordinates=(49.84, 24.03))
+        london = Port(coordinates=(51.50, -0.12))
+        for port in (kyiv, lviv, london):
+            index.add(port)
+        self.assertIs(index.nearest(kyiv.coordinates, exclude=kyiv), lviv)
+        self.assertIs(index.nearest(london.coordinates, exclude=london), lviv)
+        self.assertIsNone(index.nearest(kyiv.coordinates, max_distance=100, exclude=kyiv))
+
+    def test_port_index_matches_brute_force(self):
+        generator = random.Random(4)
+        ports = [Port(coordinates=(generator.uniform(-80, 80), generator.uniform(-180, 180))) for _ in range(40)]
+        index = PortIndex(ports)
+        # Enough added ports to insert into the tree and to rebuild it twice
+        for _ in range(200):
+            port = Port(coordinates=(generator.uniform(-80, 80), generator.uniform(-180, 180)))
+            ports.append(port)
+            index.add(port)
+        for _ in range(100):
+            origin = Port(coordinates=(generator.uniform(-80, 80), generator.uniform(-180, 180)))
+            max_distance = generator.uniform(100, 3000)
+            in_range = [port for port in ports if origin.get_distance(port) <= max_distance]
+            expected = min(in_range, key=origin.get_distance) if in_range else None
+            self.assertIs(index.nearest(origin.coordinates, max_distance), expected)
+            self.assertIs(index.nearest(origin.coordinates), min(ports, key=origin.get_distance))
+
+    def test_route_planner_fewest_stops(self):
+        planner = RoutePlanner()
+        start = Port(coordinates=(0, 0))
+        middle = Port(coordinates=(0, 5))
+        near_end = Port(coordinates=(0, 9))
+        end = Port(coordinates=(0, 10))
+        ports = PortRegistry([start, near_end, middle, end])
+        fuel_range = start.get_distance(middle) + 1
+        self.assertEqual(planner.plan(start, end, ports, fuel_range), [middle, end])
+        self.assertIsNone(planner.plan(start, end, ports, fuel_range / 2))
+        self.assertEqual(planner.plan(start, end, ports, start.get_distance(end)), [end])
+        self.assertEqual(len(planner.routes), 3)
+
+    def test_route_planner_other_ports_of_same_count(self):
+        planner = RoutePlanner()
+        start = Port(coordinates=(0, 0))
+        middle = Port(coordinates=(0, 5))
+        other_middle = Port(coordinates=(0, 6))
+        end = Port(coordinates=(0, 10))
+        fuel_range = start.get_distance(other_middle) + 1
+        self.assertEqual(planner.plan(start, end, PortRegistry([start, middle, end]), fuel_range), [middle, end])
+        self.assertEqual(planner.plan(start, end, PortRegistry([start, other_middle, end]), fuel_range),
+                         [other_middle, end])
+
+    def test_route_planner_follows_registry(self):
+        planner = RoutePlanner()
+        start = Port(coordinates=(0, 0))
+        middle = Port(coordinates=(0, 5))
+        end = Port(coordinates=(0, 10))
+        registry = PortRegistry([start])
+        index = registry.index
+        fuel_range = start.get_distance(middle) + 1
+        # The destination is registered by the planner
+        self.assertIsNone(planner.plan(start, end, registry, fuel_range))
+        self.assertIn(end, registry)
+        self.assertEqual(len(planner.routes), 1)
+        registry.add(middle)
+        registry.add(middle)
+        self.assertEqual(registry.version, 3)
+        self.assertEqual(planner.plan(start, end, registry, fuel_range), [middle, end])
+        self.assertEqual(planner.plan(start, middle, registry, fuel_range), [middle])
+        self.assertEqual(len(planner.routes), 2)
+        self.assertIs(registry.index, index)
+        self.assertIs(registry.get(middle.port_id), middle)
+        self.assertEqual(list(registry), [start, end, middle])
@@ -57,6 +57,9 @@ class Container(ABC):
         self.max_items = max_items 
         self.items: List[Item] = []
         self.weight: float = 0.0
+        # Running totals of the items, updated on add/remove
+        self.current_weight: float = 0.0
+        self.item_count: int = 0
         
     def to_dict(self):
         return {
@@ -68,15 +71,38 @@ class Container(ABC):
         }
         
     def add_item(self, item: 'Item') -> None:
-        total_weight = self.get_current_weight() + item.get_total_weight()
-        if len(self.items) < self.max_items and total_weight <= self.max_weight:
+        item_weight = item.get_total_weight()
+        if len(self.items) < self.max_items and self.current_weight + item_weight <= self.max_weight:
             self.items.append(item)
             item.containerId = self.id
+            self.current_weight += item_weight
+            self.item_count += item.count
         else:
             raise ValueError("Exceeded container capacity or weight limit")
-              
+
+    def add_items(self, items: List['Item']) -> None:
+        """
+        Adds a batch of items, checking the capacity for the whole batch at once.
+        Either all items are added or none of them.
+        """
+        items = list(items)
+        batch_weight = sum(item.get_total_weight() for item in items)
+        if len(self.items) + len(items) > self.max_items or self.current_weight + batch_weight > self.max_weight:
+            raise ValueError("Exceeded container capacity or weight limit")
+        for item in items:
+            item.containerId = self.id
+            self.item_count += item.count
+        self.items.extend(items)
+        self.current_weight += batch_weight
+
+    def remove_item(self, item: 'Item') -> None:
+        self.items.remove(item)
+        self.item_count -= item.count
+        # An empty container starts again from exact zero, so rounding errors do not pile up
+        self.current_weight = self.current_weight - item.get_total_weight() if self.items else 0.0
+
     def get_current_weight(self) -> float:
-        return sum(item.get_total_weight() for item in self.items)
+        return self.current_weight
         
     def __repr__(self) -> str:
         return f"Container(id={self.id}, container_type={self.__class__.__name__})"
@@ -0,0 +1,49 @@
+import unittest
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from container import create_container, ItemFactory
+
+
+class TestContainer(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Creates a test container and items for testing.
+        """
+        self.container = create_container(max_weight=100, max_items=3, container_type='basic')
+        self.small = ItemFactory.create_item('small', 1, 10, 2)
+        self.heavy = ItemFactory.create_item('heavy', 2, 30, 1)
+        self.liquid = ItemFactory.create_item('liquid', 3, 25, 3)
+
+    def test_running_totals(self):
+        """
+        Tests that the weight and item count follow adding and removing items.
+        """
+        self.container.add_item(self.small)
+        self.container.add_item(self.heavy)
+        self.assertEqual(self.container.get_current_weight(), 50)
+        self.assertEqual(self.container.item_count, 3)
+        self.assertEqual(self.container.consumption(), 50 * 2.5)
+
+        self.container.remove_item(self.small)
+        self.assertEqual(self.container.get_current_weight(), 30)
+        self.assertEqual(self.container.item_count, 1)
+
+    def test_add_items(self):
+        """
+        Tests that a batch is either added as a whole or rejected as a whole.
+        """
+        self.container.add_items([self.small, self.heavy])
+        self.assertEqual(self.container.get_current_weight(), 50)
+        self.assertEqual(self.small.containerId, self.container.id)
+
+        with self.assertRaises(ValueError):
+            self.container.add_items([self.liquid])
+        self.assertEqual(len(self.container.items), 2)
+        self.assertEqual(self.container.get_current_weight(), 50)
+
+
+if __name__ == '__main__':
+    unittest.main()
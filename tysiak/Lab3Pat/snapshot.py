@@ -0,0 +1,129 @@
+import os
+import struct
+import sys
+from array import array
+from typing import Dict, Tuple
+from containers import BasicContainer, HeavyContainer, RefrigeratedContainer, LiquidContainer
+from port import Port
+from ship import Ship, LightWeightShip, MediumShip, HeavyShip
+
+# Бінарний знімок стану симуляції.
+# Після заголовка йдуть колонки (array) у фіксованому порядку; кожна колонка записана як
+# код типу (1 байт), кількість елементів (8 байт) і сирі байти масиву.
+MAGIC = b'PSNP'
+VERSION = 1
+HEADER = struct.Struct('<4sHB')
+
+CONTAINER_TYPES = (BasicContainer, HeavyContainer, RefrigeratedContainer, LiquidContainer)
+SHIP_TYPES = (LightWeightShip, MediumShip, HeavyShip)
+CONTAINER_CODES = {cls: code for code, cls in enumerate(CONTAINER_TYPES)}
+SHIP_CODES = {cls: code for code, cls in enumerate(SHIP_TYPES)}
+
+
+def _write_column(f, column: array) -> None:
+    f.write(struct.pack('<cQ', column.typecode.encode(), len(column)))
+    column.tofile(f)
+
+
+def _read_column(f, swap: bool) -> array:
+    typecode, length = struct.unpack('<cQ', f.read(9))
+    column = array(typecode.decode())
+    column.fromfile(f, length)
+    if swap:
+        column.byteswap()
+    return column
+
+
+def _lookup(table: Dict[int, object], key: int, kind: str, filename: str):
+    # Посилання на відсутній порт, корабель чи контейнер означає пошкоджений файл
+    try:
+        return table[key]
+    except (KeyError, IndexError):
+        raise ValueError(f"{filename}: {kind} {key} is not in the snapshot") from None
+
+
+def save_snapshot(ports: Dict[int, Port], ships: Dict[int, Ship], filename: str) -> None:
+    """Зберігає порти, кораблі, контейнери та історії відвідувань у бінарний файл."""
+    container_index: Dict[int, int] = {}
+    container_ids, container_weights, container_types = array('q'), array('d'), array('B')
+
+    def index_of(container) -> int:
+        # Один і той самий контейнер може бути і в порту, і на кораблі
+        key = id(container)
+        if key not in container_index:
+            container_index[key] = len(container_ids)
+            container_ids.append(container.id)
+            container_weights.append(container.weight)
+            container_types.append(CONTAINER_CODES[type(container)])
+        return container_index[key]
+
+    port_ids, latitudes, longitudes = array('q'), array('d'), array('d')
+    port_containers, port_current, port_history = (array('q'), array('q')), (array('q'), array('q')), (array('q'), array('q'))
+    for port in ports.values():
+        port_ids.append(port.id)
+        latitudes.append(port.coordinates[0])
+        longitudes.append(port.coordinates[1])
+        for container in port.containers:
+            port_containers[0].append(port.id)
+            port_containers[1].append(index_of(container))
+        for pairs, visitors in ((port_current, port.current_ships), (port_history, port.ship_history)):
+            for ship in visitors:
+                pairs[0].append(port.id)
+                pairs[1].append(ship.id)
+
+    ship_ids, ship_types, ship_fuel, ship_ports = array('q'), array('B'), array('d'), array('q')
+    ship_containers = (array('q'), array('q'))
+    for ship in ships.values():
+        ship_ids.append(ship.id)
+        ship_types.append(SHIP_CODES[type(ship)])
+        ship_fuel.append(ship.fuel)
+        ship_ports.append(ship.current_port.id)
+        for container in ship.containers:
+            ship_containers[0].append(ship.id)
+            ship_containers[1].append(index_of(container))
+
+    columns = [container_ids, container_weights, container_types,
+               port_ids, latitudes, longitudes, *port_containers, *port_current, *port_history,
+               ship_ids, ship_types, ship_fuel, ship_ports, *ship_containers]
+    # Знімок пишеться у тимчасовий файл і підміняє старий лише повністю записаним,
+    # тож збій під час запису не знищує попередній знімок
+    with open(filename + '.tmp', 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, sys.byteorder == 'little'))
+        for column in columns:
+            _write_column(f, column)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(filename + '.tmp', filename)
+
+
+def load_snapshot(filename: str) -> Tuple[Dict[int, Port], Dict[int, Ship]]:
+    """Відновлює порти та кораблі з файлу, записаного save_snapshot."""
+    with open(filename, 'rb') as f:
+        magic, version, little_endian = HEADER.unpack(f.read(HEADER.size))
+        if magic != MAGIC:
+            raise ValueError(f"{filename} is not a simulation snapshot")
+        if version != VERSION:
+            raise ValueError(f"Unsupported snapshot version {version}")
+        swap = bool(little_endian) != (sys.byteorder == 'little')
+        (container_ids, container_weights, container_types,
+         port_ids, latitudes, longitudes, port_container_owners, port_container_refs,
+         port_current_owners, port_current_ships, port_history_owners, port_history_ships,
+         ship_ids, ship_types, ship_fuel, ship_ports,
+         ship_container_owners, ship_container_refs) = [_read_column(f, swap) for _ in range(18)]
+
+    containers = [CONTAINER_TYPES[kind](container_id, weight)
+                  for container_id, weight, kind in zip(container_ids, container_weights, container_types)]
+    ports = {port_id: Port(port_id, (latitude, longitude))
+             for port_id, latitude, longitude in zip(port_ids, latitudes, longitudes)}
+    ships = {ship_id: SHIP_TYPES[kind](ship_id, fuel, _lookup(ports, port_id, 'port', filename))
+             for ship_id, kind, fuel, port_id in zip(ship_ids, ship_types, ship_fuel, ship_ports)}
+
+    for port_id, ref in zip(port_container_owners, port_container_refs):
+        _lookup(ports, port_id, 'port', filename).containers.append(_lookup(containers, ref, 'container', filename))
+    for ship_id, ref in zip(ship_container_owners, ship_container_refs):
+        _lookup(ships, ship_id, 'ship', filename).containers.append(_lookup(containers, ref, 'container', filename))
+    for port_id, ship_id in zip(port_current_owners, port_current_ships):
+        _lookup(ports, port_id, 'port', filename).current_ships.append(_lookup(ships, ship_id, 'ship', filename))
+    for port_id, ship_id in zip(port_history_owners, port_history_ships):
+        _lookup(ports, port_id, 'port', filename).ship_history.append(_lookup(ships, ship_id, 'ship', filename))
+    return ports, ships
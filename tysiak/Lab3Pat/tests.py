@@ -2,6 +2,10 @@ import unittest
 from containers import BasicContainer, HeavyContainer, RefrigeratedContainer, LiquidContainer
 from port import Port
 from ship import ShipFactory
+from snapshot import save_snapshot, load_snapshot
+import os
+import tempfile
+from unittest import mock
 
 class TestContainers(unittest.TestCase):
 
@@ -38,5 +42,59 @@ class TestPort(unittest.TestCase):
         ship.containers.remove(container)  # Розвантажуємо контейнер
         self.assertEqual(len(ship.containers), 0)  # Корабель порожній
 
+
+class TestSnapshot(unittest.TestCase):
+
+    def test_save_and_load_snapshot(self):
+        ports = {1: Port(1, (46.48, 30.73)), 2: Port(2, (38.37, 21.24))}
+        ships = {101: ShipFactory.create_medium_ship(101, 15000.0, ports[1])}
+        container = HeavyContainer(2, 3500)
+        ports[1].load_container(BasicContainer(1, 1000))
+        ports[1].load_container(container)
+        ships[101].add_item(container)  # Той самий контейнер і в порту, і на кораблі
+        ports[1].incoming_ship(ships[101])
+        ships[101].sail_to(ports[2])
+
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, "snapshot.bin")
+            save_snapshot(ports, ships, filename)
+            loaded_ports, loaded_ships = load_snapshot(filename)
+
+        ship = loaded_ships[101]
+        self.assertIsInstance(ship, type(ships[101]))
+        self.assertEqual(ship.fuel, ships[101].fuel)
+        self.assertIs(ship.current_port, loaded_ports[2])
+        self.assertEqual([c.id for c in loaded_ports[1].containers], [1, 2])
+        self.assertIs(ship.containers[0], loaded_ports[1].containers[1])
+        self.assertIsInstance(ship.containers[0], HeavyContainer)
+        self.assertEqual(loaded_ports[2].current_ships, [ship])
+        self.assertEqual(loaded_ports[1].ship_history, [ship])
+        self.assertEqual(loaded_ports[2].coordinates, (38.37, 21.24))
+
+    def test_failed_save_keeps_previous_snapshot(self):
+        ports = {1: Port(1, (46.48, 30.73))}
+        ports[1].load_container(BasicContainer(1, 1000))
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, "snapshot.bin")
+            save_snapshot(ports, {}, filename)
+            ports[1].load_container(BasicContainer(2, 2000))
+            # Запис обривається посередині нового знімка
+            with mock.patch("snapshot._write_column", side_effect=[None] * 4 + [OSError("Disk full")]):
+                with self.assertRaises(OSError):
+                    save_snapshot(ports, {}, filename)
+            loaded_ports, _ = load_snapshot(filename)
+        self.assertEqual([c.id for c in loaded_ports[1].containers], [1])
+
+    def test_history_ship_missing_from_snapshot(self):
+        ports = {1: Port(1, (46.48, 30.73))}
+        ports[1].ship_history.append(ShipFactory.create_lightweight_ship(7, 500, ports[1]))
+
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, "snapshot.bin")
+            save_snapshot(ports, {}, filename)  # Корабля 7 немає серед кораблів знімка
+            with self.assertRaisesRegex(ValueError, "ship 7 is not in the snapshot"):
+                load_snapshot(filename)
+
+
 if __name__ == "__main__":
     unittest.main()